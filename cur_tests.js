@@ -1,5 +1,29 @@
-import { tileSetHandler, MahjongGameStateHandler } from './gameLogicHandlers.js';
+import assert from 'node:assert/strict';
+import { tileSetHandler, MahjongGameStateHandler, isCompleteHand } from './gameLogicHandlers.js';
 
 let M = new MahjongGameStateHandler()
 
-M.startRound();
\ No newline at end of file
+M.startRound();
+console.log(M.tileManager.deadWall);
+for (let hand of M.getPlayerHands()) {
+    console.log(hand);
+}
+
+// A seeded wall is the same every time and holds the whole tileset
+let seeded = [new MahjongGameStateHandler(7), new MahjongGameStateHandler(7)].map(game => game.tileManager);
+assert.deepEqual(seeded[0].undrawn_tiles, seeded[1].undrawn_tiles);
+assert.deepEqual(seeded[0].deadWall, seeded[1].deadWall);
+assert.equal(seeded[0].undrawn_tiles.length, 122);
+assert.deepEqual([...seeded[0].undrawn_tiles, ...seeded[0].deadWall].sort(), tileSetHandler.prototype.createTileset().sort());
+
+// Win detection on hands worked out by hand
+let hand = text => text.split(" ");
+assert.ok(isCompleteHand(hand("1s 2s 3s 4p 5p* 6p 7m 8m 9m Ea Ea Ea Re Re")));
+assert.ok(isCompleteHand(hand("1s 1s 1s 2s 3s 4s 5s 6s 7s 8s 9s 9s 9s 5s")));  // Nine gates shape
+assert.ok(isCompleteHand(hand("1s 1s 2p 2p 3m 3m 4s 4s 5p 5p Ea Ea Wh Wh")));  // Seven pairs
+assert.ok(isCompleteHand(hand("1s 9s 1p 9p 1m 9m Ea No So We Gr Re Wh Wh")));  // Kokushi
+assert.ok(!isCompleteHand(hand("1s 1s 1s 1s 2p 2p 3m 3m 4s 4s 5p 5p Ea Ea")));  // Four of a kind is not two pairs
+assert.ok(!isCompleteHand(hand("1s 2s 4s 4p 5p 6p 7m 8m 9m Ea Ea Ea Re Re")));
+assert.ok(!isCompleteHand(hand("8s 9s 1p 2p 3p 4p 5p 6p 7m 8m 9m Re Re Re")));  // Sequences do not wrap across suits
+assert.ok(!isCompleteHand(hand("Ea So We 1s 2s 3s 4s 5s 6s 7s 8s 9s Re Re")));  // Nor run through honors
+console.log("ok");
@@ -1,23 +1,83 @@
 const SUITS = ["s", "p", "m"];
 const HONORS = ["Ea", "No", "So", "We", "Gr", "Re", "Wh"]
 const SEAT_NAMES = ["East", "South", "West", "North"]
+const HONOR_START = 27
+const NUM_KINDS = 34
 
 class MahjongPlayer {
     constructor() {
         this.hand = [];
-        this.discarded = null;
+        this.discarded = [];
         this.melds = null;
 
         this.inRichii = false;
     }
 }
 
+// mulberry32: a small 32-bit PRNG, simple enough for other engines to match exactly
+function mulberry32(seed) {
+    let state = seed >>> 0;
+    return function () {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return (t ^ (t >>> 14)) >>> 0;
+    };
+}
+
+// An integer in [0, n) from one 32-bit output
+function below(random, n) {
+    return Math.floor(random() * n / 4294967296);
+}
+
+// Lays the shuffled tiles out as four walls of two 17-tile stacks and cuts the
+// 2x7 dead wall where the dice roll says. Returns the live tiles in drawing order
+// (each wall's rows right to left) and the dead wall row by row.
+function layoutWall(tiles, dealerRoll) {
+    let walls = [];
+    for (let start = 0; start < tiles.length; start += 34) {
+        walls.push([tiles.slice(start, start + 17), tiles.slice(start + 17, start + 34)]);
+    }
+    let wallIndex = (dealerRoll - 1) % 4;
+    let previous = (wallIndex + 3) % 4;
+    let cut = 17 - dealerRoll; // Counted from the right, both rows
+    let deadWall;
+    if (cut > 10) {
+        // The dead wall runs on into the previous wall
+        let rest = (cut + 7) % 17;
+        deadWall = [0, 1].map(row => [...walls[wallIndex][row].slice(cut), ...walls[previous][row].slice(0, rest)]);
+        walls[wallIndex] = walls[wallIndex].map(row => row.slice(0, cut));
+        walls[previous] = walls[previous].map(row => row.slice(rest));
+    } else {
+        deadWall = walls[wallIndex].map(row => row.slice(cut, cut + 7));
+        walls[previous] = [0, 1].map(row => [...walls[wallIndex][row].slice(cut + 7), ...walls[previous][row]]);
+        walls[wallIndex] = walls[wallIndex].map(row => row.slice(0, cut));
+    }
+    let live = [];
+    for (let wall of walls) {
+        for (let row of wall) {
+            live.push(...[...row].reverse());
+        }
+    }
+    return { live: live, dead: [...deadWall[0], ...deadWall[1]] };
+}
+
 class tileSetHandler {
-    constructor(players) {
-        this.undrawn_tiles = this.createTileset();
+    // seed, if given, builds the wall deterministically: the tileset is shuffled
+    // (Fisher-Yates) and two dice are rolled with mulberry32(seed), the walls are laid
+    // out and the dead wall cut by the roll, and tiles are drawn in order instead of at random.
+    constructor(players, seed = null) {
+        this.seeded = seed !== null;
         this.players = players;
         this.deadWall = [];
-        this.buildDeadWall();
+        this.dealerRoll = null;
+        if (this.seeded) {
+            this.buildSeededWall(seed);
+        } else {
+            this.undrawn_tiles = this.createTileset();
+            this.buildDeadWall();
+        }
         this.dora = null;
         this.hasDealt = false;      
     }
@@ -25,7 +85,7 @@ class tileSetHandler {
     createTileset(){
         let tiles = []
         for (let suit of SUITS) {
-            for (let i = 1; i < 11; i++) {
+            for (let i = 1; i < 10; i++) {
                 for (let j = 0; j < 4; j++) {
                     let tile = `${i}${suit}`;
                     tiles.push(tile);
@@ -49,6 +109,10 @@ class tileSetHandler {
             return -1 // could emit?
         }
 
+        if (this.seeded) {
+            return this.undrawn_tiles.shift();
+        }
+
         let i = Math.floor(Math.random() * this.undrawn_tiles.length);
         let tile = this.undrawn_tiles[i];
         this.undrawn_tiles.splice(i, 1);
@@ -56,6 +120,19 @@ class tileSetHandler {
         return tile;
     }
 
+    buildSeededWall(seed) {
+        let random = mulberry32(seed);
+        let tiles = this.createTileset();
+        for (let i = tiles.length - 1; i > 0; i--) {
+            let j = below(random, i + 1);
+            [tiles[i], tiles[j]] = [tiles[j], tiles[i]];
+        }
+        this.dealerRoll = 2 + below(random, 6) + below(random, 6);
+        let wall = layoutWall(tiles, this.dealerRoll);
+        this.undrawn_tiles = wall.live;
+        this.deadWall = wall.dead;
+    }
+
     buildDeadWall(){
         for (let i = 0; i < 14; i++) {
             this.deadWall.push(this.drawTile());
@@ -68,47 +145,161 @@ class tileSetHandler {
             throw new Error('Invalid Deal Attempt')
         }
 
-        for (let player of this.players){ 
-            for (let i = 0; i < 13; i++) {
+        // Three tiles at a time around the table, four times, then one each
+        for (let turn = 0; turn < 16; turn++) {
+            let player = this.players[turn % 4];
+            for (let i = 0; i < 3; i++) {
                 player.hand.push(this.drawTile());
             }
         }
+        for (let player of this.players) {
+            player.hand.push(this.drawTile());
+        }
+        this.hasDealt = true;
     }
 }
 
 class MahjongGameStateHandler {
-    constructor() {
+    // seed, if given, deals a reproducible wall (see tileSetHandler)
+    constructor(seed = null) {
         this.players = [];
         for (let i = 0; i < 4; i++) {
             this.players.push(new MahjongPlayer);
         }
-        this.tileManager = new tileSetHandler(this.players);
+        this.tileManager = new tileSetHandler(this.players, seed);
         
     }
 
     startRound() {
         this.tileManager.dealHands();
-        console.log(this.tileManager.deadWall);
-        for (let player of this.players) {
-            console.log(player.hand);
+    }
+
+    drawTile(playerIndex) {
+        let tile = this.tileManager.drawTile();
+        if (tile !== -1) {
+            this.players[playerIndex].hand.push(tile);
+        }
+        return tile;
+    }
+
+    discardTile(playerIndex, tile) {
+        let player = this.players[playerIndex];
+        let i = player.hand.indexOf(tile);
+        if (i === -1) {
+            throw new Error(`${tile} is not in hand`);
         }
+        player.hand.splice(i, 1);
+        player.discarded.push(tile);
     }
 
     getPlayers() {
-        // return all the players
+        return this.players;
     }
 
     getPlayerHands() {
-        // return all player hands in single datastructure
+        return this.players.map(player => player.hand);
     }
 
     getDiscarded() {
-        // return all the discarded tiles for each player in single datastructure
+        return this.players.map(player => player.discarded);
+    }
+}
+
+function tileKind(tile) {
+    let honor = HONORS.indexOf(tile);
+    if (honor !== -1) {
+        return HONOR_START + honor;
+    }
+    return SUITS.indexOf(tile[1]) * 9 + Number(tile[0]) - 1; // A red five ("5s*") is its plain kind
+}
+
+function isTerminalOrHonor(kind) {
+    return kind >= HONOR_START || kind % 9 === 0 || kind % 9 === 8;
+}
+
+// True if counts[start..start+size) can all be used as sets plus `pairs` pairs
+function groupCompletes(counts, start, size, pairs) {
+    let i = start;
+    while (i < start + size && counts[i] === 0) {
+        i++;
+    }
+    if (i === start + size) {
+        return pairs === 0;
+    }
+
+    let found = false;
+    if (pairs > 0 && counts[i] >= 2) {
+        counts[i] -= 2;
+        found = groupCompletes(counts, start, size, pairs - 1);
+        counts[i] += 2;
+    }
+    if (!found && counts[i] >= 3) {
+        counts[i] -= 3;
+        found = groupCompletes(counts, start, size, pairs);
+        counts[i] += 3;
+    }
+    let honors = start === HONOR_START;
+    if (!found && !honors && i + 2 < start + size && counts[i + 1] && counts[i + 2]) {
+        counts[i]--; counts[i + 1]--; counts[i + 2]--;
+        found = groupCompletes(counts, start, size, pairs);
+        counts[i]++; counts[i + 1]++; counts[i + 2]++;
+    }
+    return found;
+}
+
+// Sets plus exactly one pair; each suit and the honors are checked on their own
+function isStandardHand(counts) {
+    let pairs = 0;
+    for (let [start, size] of [[0, 9], [9, 9], [18, 9], [HONOR_START, 7]]) {
+        let total = 0;
+        for (let i = start; i < start + size; i++) {
+            total += counts[i];
+        }
+        if (total % 3 === 1) {
+            return false;
+        }
+        let pair = total % 3 === 2 ? 1 : 0;
+        pairs += pair;
+        if (pairs > 1 || !groupCompletes(counts, start, size, pair)) {
+            return false;
+        }
+    }
+    return pairs === 1;
+}
+
+// A complete concealed hand: sets and a pair, seven distinct pairs, or kokushi
+function isCompleteHand(hand) {
+    let counts = new Array(NUM_KINDS).fill(0);
+    for (let tile of hand) {
+        counts[tileKind(tile)]++;
+    }
+    if (isStandardHand(counts)) {
+        return true;
+    }
+    if (hand.length !== 14) {
+        return false;
+    }
+    if (counts.every(count => count === 0 || count === 2)) {
+        return true;
+    }
+    let terminals = 0;
+    for (let kind = 0; kind < NUM_KINDS; kind++) {
+        if (isTerminalOrHonor(kind)) {
+            if (counts[kind] === 0) {
+                return false;
+            }
+            terminals += counts[kind];
+        }
     }
+    return terminals === 14;
 }
 
 export {
     MahjongGameStateHandler,
     tileSetHandler,
-    MahjongPlayer
+    MahjongPlayer,
+    isCompleteHand,
+    tileKind,
+    mulberry32,
+    layoutWall
 }
\ No newline at end of file
@@ -0,0 +1,56 @@
+// Runs a batch of parity cases through the JS engine for python_reference/parity.py.
+// Reads one JSON batch on stdin and writes one JSON result on stdout, so a whole
+// batch costs a single Node process.
+//
+// A "round" case gives a wall seed, from which the JS engine builds its own wall,
+// and the actions the Python engine played on its wall from the same seed; its trace
+// holds the deal, then the state after every action. A "hand" case only asks whether
+// a hand is complete.
+
+import { MahjongGameStateHandler, tileSetHandler, isCompleteHand } from './gameLogicHandlers.js';
+
+function runRound(testCase) {
+    let game = new MahjongGameStateHandler(testCase.seed);
+    let trace = [];
+    try {
+        game.tileManager.dealHands();
+        trace.push({
+            hands: game.getPlayerHands().map(hand => [...hand]),
+            live: [...game.tileManager.undrawn_tiles],
+            dead: [...game.tileManager.deadWall],
+        });
+        for (let [action, player, tile] of testCase.actions) {
+            let hand = game.players[player].hand;
+            if (action === "draw") {
+                let drawn = game.drawTile(player);
+                trace.push({ tile: drawn, hand: [...hand], complete: isCompleteHand(hand) });
+            } else {
+                game.discardTile(player, tile);
+                let ron = game.players.map((other, i) => i !== player && isCompleteHand([...other.hand, tile]));
+                trace.push({ hand: [...hand], ron: ron });
+            }
+        }
+    } catch (error) {
+        trace.push({ error: error.message });
+    }
+    return trace;
+}
+
+function runCase(testCase) {
+    if (testCase.type === "hand") {
+        return { complete: isCompleteHand(testCase.hand) };
+    }
+    return runRound(testCase);
+}
+
+let input = "";
+process.stdin.setEncoding("utf8");
+process.stdin.on("data", chunk => { input += chunk; });
+process.stdin.on("end", () => {
+    let batch = JSON.parse(input);
+    let result = {
+        tileset: tileSetHandler.prototype.createTileset(),
+        results: batch.cases.map(runCase),
+    };
+    process.stdout.write(JSON.stringify(result));
+});
@@ -0,0 +1,51 @@
+"""
+Riichi Mahjong reference engine.
+
+The modules import each other relatively, so the command-line tools run as
+modules of the package (`python -m python_reference.simulator`). Nothing
+happens on import: the names below are loaded from their modules the first
+time they are used.
+
+    import python_reference as mj
+    game = mj.MahjongGame(agents=[mj.ShantenAgent() for _ in range(4)], rng=random.Random(7))
+"""
+
+import importlib
+
+# Public name -> module it lives in
+_EXPORTS = {
+    "MahjongGame": "main",
+    "Hand": "tiles",
+    "tile_from_str": "tiles",
+    "tile_to_str": "tiles",
+    "Agent": "agents",
+    "RandomAgent": "agents",
+    "ShantenAgent": "agents",
+    "Wall": "wall",
+    "ukeire": "shanten",  # shanten() itself is python_reference.shanten.shanten: the submodule owns the name
+    "is_agari": "agari",
+    "score_hand": "scoring",
+    "simulate": "simulator",
+    "play_round": "simulator",
+    "Match": "match",
+    "RecordWriter": "record",
+    "RecordReader": "record",
+    "Replay": "replay",
+    "Profiler": "profiling",
+    "EvaluationCache": "cache",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,11 @@
+"""Interactive console round: python -m python_reference [--seed N] [--kan-demo]."""
+
+import argparse
+
+from .main import play
+
+parser = argparse.ArgumentParser(prog="python -m python_reference", description="Play a round of Riichi Mahjong on the console.")
+parser.add_argument("--seed", type=int, default=None, help="Seed for the shuffle and dice (random by default)")
+parser.add_argument("--kan-demo", action="store_true", help="Give the fourth player a hand with Kan chances")
+args = parser.parse_args()
+play(args.seed, args.kan_demo)
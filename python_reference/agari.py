@@ -0,0 +1,130 @@
+"""
+Win (agari) detection and decomposition on 34-entry count vectors.
+
+Each suit, and the honors, is decomposed on its own and the result is memoized
+by that group's count pattern, so after warm-up a win check is one dictionary
+lookup per group. Chiitoitsu and kokushi are recognised separately.
+"""
+
+from collections import namedtuple
+
+from .tiles import HONOR_START, NUM_KINDS, is_terminal_or_honor
+
+# Start kind and size of each independently decomposed group
+GROUPS = ((0, 9), (9, 9), (18, 9), (HONOR_START, 7))
+TERMINALS_AND_HONORS = tuple(k for k in range(NUM_KINDS) if is_terminal_or_honor(k))
+
+# form is "standard", "chiitoitsu" or "kokushi". pair is the kind of the pair
+# (None for chiitoitsu), triplets are kinds and sequences are their lowest kind.
+Decomposition = namedtuple("Decomposition", ["form", "pair", "triplets", "sequences"])
+
+_group_cache = {}  # (pattern, honors) -> tuple of (pair, triplets, sequences) in local indices
+
+
+def _decompose_group(pattern, honors):
+    """Lists every way to use all tiles of one group as sets plus at most one pair."""
+    key = (pattern, honors)
+    cached = _group_cache.get(key)
+    if cached is not None:
+        return cached
+
+    total = sum(pattern)
+    if total == 0:
+        result = ((None, (), ()),)
+    elif total % 3 == 1:
+        result = ()
+    else:
+        i = next(index for index, count in enumerate(pattern) if count)
+        counts = list(pattern)
+        found = set()
+
+        if total % 3 == 2 and counts[i] >= 2:
+            counts[i] -= 2
+            for _, triplets, sequences in _decompose_group(tuple(counts), honors):
+                found.add((i, triplets, sequences))
+            counts[i] += 2
+
+        if counts[i] >= 3:
+            counts[i] -= 3
+            for pair, triplets, sequences in _decompose_group(tuple(counts), honors):
+                found.add((pair, tuple(sorted(triplets + (i,))), sequences))
+            counts[i] += 3
+
+        if not honors and i + 2 < len(counts) and counts[i + 1] and counts[i + 2]:
+            for offset in range(3):
+                counts[i + offset] -= 1
+            for pair, triplets, sequences in _decompose_group(tuple(counts), honors):
+                found.add((pair, triplets, tuple(sorted(sequences + (i,)))))
+
+        result = tuple(sorted(found, key=lambda d: (d[0] is None, d)))
+
+    _group_cache[key] = result
+    return result
+
+
+def is_standard_agari(counts):
+    """True if the counts form sets plus exactly one pair (called melds excluded)."""
+    pairs = 0
+    for start, size in GROUPS:
+        pattern = tuple(counts[start:start + size])
+        total = sum(pattern)
+        if total % 3 == 1:
+            return False
+        if total % 3 == 2:
+            pairs += 1
+            if pairs > 1:
+                return False
+        if total and not _decompose_group(pattern, start == HONOR_START):
+            return False
+    return pairs == 1
+
+
+def is_chiitoitsu(counts):
+    """True for seven distinct pairs."""
+    return sum(counts) == 14 and all(count in (0, 2) for count in counts)
+
+
+def is_kokushi(counts):
+    """True for one of each terminal and honor plus a pair of one of them."""
+    if sum(counts) != 14:
+        return False
+    return all(counts[kind] for kind in TERMINALS_AND_HONORS) and \
+        sum(counts[kind] for kind in TERMINALS_AND_HONORS) == 14
+
+
+def is_agari(counts):
+    """True if the concealed counts complete a hand in any form."""
+    return is_standard_agari(counts) or is_chiitoitsu(counts) or is_kokushi(counts)
+
+
+def decompositions(counts):
+    """Returns every Decomposition of the concealed counts, for scoring to choose from."""
+    results = []
+
+    if is_standard_agari(counts):
+        partial = [(None, (), ())]
+        for start, size in GROUPS:
+            pattern = tuple(counts[start:start + size])
+            options = _decompose_group(pattern, start == HONOR_START)
+            partial = [
+                (pair if group_pair is None else start + group_pair,
+                 triplets + tuple(start + t for t in group_triplets),
+                 sequences + tuple(start + s for s in group_sequences))
+                for pair, triplets, sequences in partial
+                for group_pair, group_triplets, group_sequences in options
+            ]
+        results.extend(Decomposition("standard", *parts) for parts in partial)
+
+    if is_chiitoitsu(counts):
+        results.append(Decomposition("chiitoitsu", None, (), ()))
+
+    if is_kokushi(counts):
+        pair = next(kind for kind in TERMINALS_AND_HONORS if counts[kind] == 2)
+        results.append(Decomposition("kokushi", pair, (), ()))
+
+    return results
+
+
+def cache_size():
+    """Number of memoized group patterns."""
+    return len(_group_cache)
@@ -0,0 +1,140 @@
+"""
+Decision makers for MahjongGame seats.
+
+The game asks its seat's agent at every decision point instead of reading
+input(), so any mix of bots and humans can play. Every method receives the
+game and the deciding player's index so agents can inspect the public state.
+"""
+
+import random
+
+from . import cache, shanten
+from .tiles import KIND_MASK, NUM_KINDS
+
+
+class Agent:
+    """
+    Base agent: discards the drawn tile, always wins and declares Riichi when
+    it can, and never calls. Subclasses override only the decisions they care about.
+    """
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        """
+        Returns the tile to discard. drawn_tile is None right after a call;
+        allowed is None or the list of kinds that may be discarded (after declaring Riichi).
+        """
+        hand = game.hands[player_index]
+        if drawn_tile is not None and (allowed is None or drawn_tile & KIND_MASK in allowed):
+            return drawn_tile
+        kinds = allowed if allowed is not None else [k for k, count in enumerate(hand.counts) if count]
+        return hand.find(kinds[-1])
+
+    def wants_riichi(self, game, player_index, riichi_discards):
+        return True
+
+    def wants_tsumo(self, game, player_index, tile):
+        return True
+
+    def wants_ron(self, game, player_index, tile, discarding_player_index):
+        return True
+
+    def wants_kan(self, game, player_index, tile, discarding_player_index):
+        return False
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return False
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return False
+
+    def choose_chii(self, game, player_index, tile, sequences):
+        """Returns the index of the sequence to form when several are possible."""
+        return 0
+
+    def wants_concealed_kan(self, game, player_index, tile):
+        return False
+
+
+class RandomAgent(Agent):
+    """Discards a random legal tile and accepts each call with a fixed probability."""
+
+    def __init__(self, rng=None, call_rate=0.5):
+        self.rng = rng if rng is not None else random.Random()
+        self.call_rate = call_rate
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        hand = game.hands[player_index]
+        kinds = allowed if allowed is not None else [k for k, count in enumerate(hand.counts) if count]
+        return hand.find(self.rng.choice(kinds))
+
+    def wants_kan(self, game, player_index, tile, discarding_player_index):
+        return self.rng.random() < self.call_rate
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return self.rng.random() < self.call_rate
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return self.rng.random() < self.call_rate
+
+    def choose_chii(self, game, player_index, tile, sequences):
+        return self.rng.randrange(len(sequences))
+
+    def wants_concealed_kan(self, game, player_index, tile):
+        return self.rng.random() < self.call_rate
+
+
+class ShantenAgent(Agent):
+    """
+    Discards the tile leaving the lowest shanten and widest ukeire, breaking ties with
+    rng when given (else by kind). With open_hand it also calls Pon and Chii whenever
+    the call lowers its shanten.
+    """
+
+    def __init__(self, open_hand=False, rng=None):
+        self.open_hand = open_hand
+        self.rng = rng
+
+    def call_improves(self, game, player_index, used_kinds):
+        """True if fixing a called set from used_kinds lowers the hand's shanten after the best discard."""
+        counts = list(game.hands[player_index].counts)
+        melds = game.called_meld_count(player_index)
+        current = shanten.shanten(counts, melds)
+        for kind in used_kinds:
+            counts[kind] -= 1
+        for kind in range(NUM_KINDS):
+            if counts[kind]:
+                counts[kind] -= 1
+                improves = shanten.shanten(counts, melds + 1) < current
+                counts[kind] += 1
+                if improves:
+                    return True
+        return False
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        kind = tile & KIND_MASK
+        return self.open_hand and self.call_improves(game, player_index, (kind, kind))
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return self.open_hand and any(
+            self.call_improves(game, player_index, others)
+            for others in game.chii_options(player_index, tile))
+
+    def choose_chii(self, game, player_index, tile, sequences):
+        for index, sequence in enumerate(sequences):
+            others = [t & KIND_MASK for t in sequence if t != tile]
+            if self.call_improves(game, player_index, others):
+                return index
+        return 0
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        hand = game.hands[player_index]
+        options = cache.discard_options(hand.counts, game.called_meld_count(player_index), game.visible_counts)
+        if allowed is not None:
+            options = {kind: option for kind, option in options.items() if kind in allowed}
+        ranks = {kind: (option[0], -sum(option[1].values())) for kind, option in options.items()}
+        best = min(ranks, key=ranks.get)
+        if self.rng is not None:
+            best = self.rng.choice([kind for kind, rank in ranks.items() if rank == ranks[best]])
+        if drawn_tile is not None and drawn_tile & KIND_MASK == best:
+            return drawn_tile
+        return hand.find(best)
@@ -0,0 +1,268 @@
+"""
+Benchmarks for the engine's hot paths, on fixed seeds so runs are comparable.
+
+The hand corpus is taken from seeded headless rounds: every state where a
+player has just drawn (14-tile hands for win and Riichi checks) and every
+state right after a discard (for Ron and call checks). Each benchmark runs
+its whole corpus `repeat` times and keeps the fastest pass.
+
+    python -m python_reference.bench --out before.json
+    python -m python_reference.bench --out after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from . import dealing, encoder, safety, shanten
+from .agents import RandomAgent
+from .main import CALLS, SELF_ACTIONS, MahjongGame
+from .simulator import play_round
+from .tiles import create_tileset
+
+CORPUS_SEED = 2024
+CORPUS_ROUNDS = 200
+
+
+def build_corpus(seed=CORPUS_SEED, rounds=CORPUS_ROUNDS):
+    """
+    Plays seeded rounds with calling random agents and keeps a copy of the game
+    at every draw (SELF_ACTIONS) and every discard (CALLS) without a Ron.
+    """
+    drawn, discarded = [], []
+    for round_index in range(rounds):
+        rng = random.Random(seed * 100003 + round_index)
+        game = MahjongGame(agents=[RandomAgent(rng, 0.3) for _ in range(4)], rng=rng)
+        game.start_game()
+        while True:
+            if game.phase == SELF_ACTIONS:
+                drawn.append(game.clone())
+            elif game.phase == CALLS and not game.clone().handle_ron(game.last_discard, game.current_player):
+                discarded.append(game.clone())
+            if not game.step():
+                break
+    return drawn, discarded
+
+
+def call_opportunities(game, tile, discarder):
+    """What handle_call checks before asking any agent: who could Kan, Pon or Chii the discard."""
+    found = 0
+    for player in range(4):
+        if player != discarder and not game.riichi_players[player]:
+            found += game.can_kan(player, tile) + game.can_pon(player, tile) + game.can_chii(player, tile)
+    return found
+
+
+def _is_complete_hand_temp(drawn, discarded):
+    items = [(game, game.hands[game.current_player]) for game in drawn]
+
+    def run():
+        for game, hand in items:
+            game.is_complete_hand_temp(hand)
+    return run, len(items)
+
+
+def _check_riichi_ready(drawn, discarded):
+    items = [(game, game.current_player) for game in drawn]
+
+    def run():
+        for game, player in items:
+            game.check_riichi_ready(player)
+    return run, len(items)
+
+
+def _ron_check(drawn, discarded):
+    items = [(game, game.last_discard, game.current_player) for game in discarded]
+
+    def run():
+        for game, tile, discarder in items:
+            game.handle_ron(tile, discarder)
+    return run, len(items)
+
+
+def _call_detection(drawn, discarded):
+    items = [(game, game.last_discard, game.current_player) for game in discarded]
+
+    def run():
+        for game, tile, discarder in items:
+            call_opportunities(game, tile, discarder)
+    return run, len(items)
+
+
+def _shanten(drawn, discarded):
+    items = [(game.hands[game.current_player].counts, game.called_meld_count(game.current_player)) for game in drawn]
+
+    def run():
+        for counts, melds in items:
+            shanten.shanten(counts, melds)
+    return run, len(items)
+
+
+def _score_hand(drawn, discarded):
+    wins = [game for game in drawn if game.is_complete_hand(game.current_player)]
+
+    def run():
+        for game in wins:
+            game.score_win(game.current_player, game.drawn_tile)
+    return run, len(wins)
+
+
+def _hand_danger(drawn, discarded):
+    items = [(game, game.current_player) for game in drawn]
+
+    def run():
+        for game, player in items:
+            safety.hand_danger(game, player)
+    return run, len(items)
+
+
+def _deal(drawn, discarded):
+    rng = random.Random(CORPUS_SEED)
+    game = MahjongGame(agents=[], rng=rng)
+    rolls = [rng.randint(1, 6) + rng.randint(1, 6) for _ in range(200)]
+
+    def run():
+        for roll in rolls:
+            walls = game.build_walls(create_tileset())
+            dead_wall, walls = game.determine_dead_wall(walls, roll)
+            game.deal_hands(walls, dead_wall)
+    return run, len(rolls)
+
+
+def _deal_batch(drawn, discarded):
+    rng = np.random.default_rng(CORPUS_SEED)
+    batch = 1024
+
+    def run():
+        dealing.deal_batch(dealing.shuffled_walls(batch, rng), dealing.roll_dice(batch, rng))
+    return run, batch
+
+
+def _snapshot_restore(drawn, discarded):
+    games = discarded[:1000]
+
+    def run():
+        for game in games:
+            game.restore(game.snapshot())
+    return run, len(games)
+
+
+def _clone(drawn, discarded):
+    games = discarded[:1000]
+
+    def run():
+        for game in games:
+            game.clone()
+    return run, len(games)
+
+
+def _encode(drawn, discarded):
+    games = discarded[:256]
+    out = encoder.new_buffer(len(games))
+
+    def run():
+        encoder.encode(games, out)
+    return run, 4 * len(games)
+
+
+def _headless_round(drawn, discarded):
+    rounds = range(20)
+
+    def run():
+        for round_index in rounds:
+            play_round(CORPUS_SEED, round_index)
+    return run, len(rounds)
+
+
+# Name -> setup(drawn, discarded) returning (run, operations per run)
+BENCHMARKS = {
+    "is_complete_hand_temp": _is_complete_hand_temp,
+    "check_riichi_ready": _check_riichi_ready,
+    "ron_check": _ron_check,
+    "call_detection": _call_detection,
+    "shanten": _shanten,
+    "score_hand": _score_hand,
+    "hand_danger": _hand_danger,
+    "deal": _deal,
+    "deal_batch": _deal_batch,
+    "snapshot_restore": _snapshot_restore,
+    "clone": _clone,
+    "encode": _encode,
+    "headless_round": _headless_round,
+}
+
+
+def time_benchmark(run, operations, repeat):
+    """Fastest of repeat passes, as seconds per operation."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best / max(operations, 1)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, repeat=5, corpus=None):
+    """Runs the named benchmarks (all by default) and returns the JSON-friendly report."""
+    if corpus is None:
+        corpus = build_corpus()
+    drawn, discarded = corpus
+    results = {}
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}")
+        run, operations = BENCHMARKS[name](drawn, discarded)
+        seconds = time_benchmark(run, operations, repeat)
+        results[name] = {"operations": operations, "us_per_op": seconds * 1e6,
+                         "ops_per_sec": 1 / seconds if seconds else None}
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "corpus": {"seed": CORPUS_SEED, "rounds": CORPUS_ROUNDS, "drawn": len(drawn), "discarded": len(discarded)},
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(before, after):
+    """Per benchmark, how many times faster after is than before (above 1 is an improvement)."""
+    return {name: before["results"][name]["us_per_op"] / result["us_per_op"]
+            for name, result in after["results"].items()
+            if name in before["results"] and result["us_per_op"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the engine's hot paths on a fixed-seed corpus.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes per benchmark; the fastest is kept")
+    parser.add_argument("--out", default=None, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", default=None, help="A previous report to print speedups against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.names, args.repeat)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            report["speedup"] = compare(json.load(file), report)
+    if args.out is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, "w") as file:
+            json.dump(report, file, indent=2)
+        for name, result in report["results"].items():
+            speedup = report.get("speedup", {}).get(name)
+            print(f"{name:24}{result['us_per_op']:12.2f} us" + (f"   x{speedup:.2f}" if speedup else ""))
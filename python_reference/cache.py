@@ -0,0 +1,229 @@
+"""
+A process-wide cache of hand evaluations, keyed by canonical hand shape.
+
+The three suits are interchangeable for shanten, waits and decompositions, and
+so are the seven honors. A hand is therefore keyed by its suits' count patterns
+in sorted order and its honor counts sorted, so every relabelling of one hand
+(up to 6 suit orders times 5040 honor orders) shares an entry. Results are
+stored in canonical kinds and mapped back to the hand's own kinds on the way out.
+
+Entries live in one bounded LRU, CACHE, shared by every game in the process.
+save() and load() move it to and from disk, so worker processes can start warm,
+and stats() reports hits and misses per evaluation to size it by.
+
+    python -m python_reference.cache --rounds 2000 --out evaluations.pickle
+    python -m python_reference.simulator --cache evaluations.pickle
+"""
+
+import argparse
+import json
+import pickle
+from collections import Counter, OrderedDict
+from itertools import permutations
+
+from . import shanten as _shanten
+from .agari import Decomposition, decompositions as _decompositions
+from .tiles import HONOR_START, NUM_KINDS
+
+CAPACITY = 1 << 18
+
+# Suit order (canonical suit -> the hand's suit) -> the hand's kind at each canonical number kind
+_SUIT_KINDS = {order: tuple(suit * 9 + rank for suit in order for rank in range(9)) for order in permutations(range(3))}
+_HONORS = range(HONOR_START, NUM_KINDS)
+_MISSING = object()
+
+
+def canonical(counts):
+    """
+    Returns (key, kinds). key is the same for every hand that differs from counts only
+    by relabelling suits or honors; kinds[i] is the kind of counts at canonical kind i.
+    """
+    suits = (tuple(counts[0:9]), tuple(counts[9:18]), tuple(counts[18:27]))
+    order = sorted(range(3), key=suits.__getitem__, reverse=True)
+    honors = sorted(_HONORS, key=counts.__getitem__, reverse=True)
+    key = (suits[order[0]], suits[order[1]], suits[order[2]], tuple([counts[kind] for kind in honors]))
+    return key, _SUIT_KINDS[tuple(order)] + tuple(honors)
+
+
+def canonical_counts(key):
+    """The count vector of the canonical hand a key stands for."""
+    return list(key[0] + key[1] + key[2] + key[3])
+
+
+class EvaluationCache:
+    """A bounded LRU of evaluations keyed by (evaluation, canonical key, called melds)."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = Counter()  # Evaluation name -> lookups found
+        self.misses = Counter()
+
+    def get(self, key):
+        """The cached value for key, or _MISSING; counts the lookup and refreshes the entry."""
+        value = self.entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses[key[0]] += 1
+        else:
+            self.entries.move_to_end(key)
+            self.hits[key[0]] += 1
+        return value
+
+    def put(self, key, value):
+        entries = self.entries
+        entries[key] = value
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)  # Least recently used first
+
+    def evaluate(self, name, counts, called_melds, compute):
+        """
+        compute(canonical counts, called_melds) for counts' canonical hand, from the cache
+        when it is there. Returns (result in canonical kinds, kinds to map it back with).
+        """
+        key, kinds = canonical(counts)
+        entry_key = (name, key, called_melds)
+        value = self.get(entry_key)
+        if value is _MISSING:
+            value = compute(canonical_counts(key), called_melds)
+            self.put(entry_key, value)
+        return value, kinds
+
+    def clear(self):
+        self.entries.clear()
+        self.hits.clear()
+        self.misses.clear()
+
+    def stats(self):
+        """Hits, misses and hit rate per evaluation, with the cache's size, as a JSON-friendly dict."""
+        names = sorted(set(self.hits) | set(self.misses))
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "evaluations": {name: {"hits": self.hits[name], "misses": self.misses[name],
+                                   "hit_rate": self.hits[name] / (self.hits[name] + self.misses[name])}
+                            for name in names},
+        }
+
+    def save(self, path):
+        """Writes the entries to path, least recently used first."""
+        with open(path, "wb") as f:
+            pickle.dump(list(self.entries.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path):
+        """Merges entries written by save(); those already held count as more recently used."""
+        with open(path, "rb") as f:
+            items = pickle.load(f)
+        entries = self.entries
+        held = list(entries.items())
+        entries.clear()
+        for key, value in items + held:
+            entries[key] = value
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+
+CACHE = EvaluationCache()
+
+
+def _shanten_of(counts, called_melds):
+    return _shanten.shanten(counts, called_melds)
+
+
+def _improving(counts, called_melds):
+    current, improving = _shanten.ukeire(counts, called_melds)
+    return current, tuple(improving)
+
+
+def _waits(counts, called_melds):
+    if _shanten.shanten(counts, called_melds) != 0:
+        return ()  # Only a tenpai hand has winning tiles
+    return tuple(_shanten.ukeire(counts, called_melds)[1])
+
+
+def _riichi_discards(counts, called_melds):
+    if _shanten.shanten(counts, called_melds) > 0:
+        return ()  # No single discard can reach tenpai
+    discards = []
+    for kind in range(NUM_KINDS):
+        if counts[kind]:
+            counts[kind] -= 1
+            if _shanten.shanten(counts, called_melds) == 0:
+                discards.append(kind)
+            counts[kind] += 1
+    return tuple(discards)
+
+
+def _decompositions_of(counts, called_melds):
+    return tuple(_decompositions(counts))
+
+
+def shanten(counts, called_melds=0):
+    """shanten.shanten() through the cache."""
+    return CACHE.evaluate("shanten", counts, called_melds, _shanten_of)[0]
+
+
+def ukeire(counts, called_melds=0, visible=None):
+    """shanten.ukeire() through the cache: only the unseen copies are counted per call."""
+    (current, improving), kinds = CACHE.evaluate("ukeire", counts, called_melds, _improving)
+    result = {}
+    for kind in sorted(kinds[canonical_kind] for canonical_kind in improving):
+        unseen = 4 - counts[kind] - (visible[kind] if visible is not None else 0)
+        result[kind] = max(unseen, 0)
+    return current, result
+
+
+def discard_options(counts, called_melds=0, visible=None):
+    """shanten.discard_options() through the cache."""
+    options = {}
+    counts = list(counts)
+    for kind in range(NUM_KINDS):
+        if counts[kind]:
+            counts[kind] -= 1
+            options[kind] = ukeire(counts, called_melds, visible)
+            counts[kind] += 1
+    return options
+
+
+def tenpai_waits(counts, called_melds=0):
+    """The kinds that complete a tenpai hand waiting to draw, in kind order; [] for any other hand."""
+    if sum(counts) % 3 != 1:
+        return []
+    waits, kinds = CACHE.evaluate("waits", counts, called_melds, _waits)
+    return sorted(kinds[canonical_kind] for canonical_kind in waits)
+
+
+def riichi_discards(counts, called_melds=0):
+    """The kinds a hand that has just drawn can discard to be tenpai, in kind order."""
+    discards, kinds = CACHE.evaluate("riichi", counts, called_melds, _riichi_discards)
+    return sorted(kinds[canonical_kind] for canonical_kind in discards)
+
+
+def decompositions(counts):
+    """agari.decompositions() through the cache."""
+    results, kinds = CACHE.evaluate("decompositions", counts, 0, _decompositions_of)
+    return [Decomposition(form, None if pair is None else kinds[pair],
+                          tuple(sorted(kinds[kind] for kind in triplets)),
+                          tuple(sorted(kinds[kind] for kind in sequences)))
+            for form, pair, triplets, sequences in results]
+
+
+def warm(rounds, seed=0):
+    """Fills CACHE by playing seeded headless rounds in this process."""
+    from .simulator import play_round
+    for round_index in range(rounds):
+        play_round(seed, round_index)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the evaluation cache with headless rounds and save it.")
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--capacity", type=int, default=CAPACITY)
+    parser.add_argument("--out", required=True, help="Where to save the cache")
+    args = parser.parse_args()
+
+    from . import cache  # The module the engine uses, not this __main__ copy of it
+    cache.CACHE.capacity = args.capacity
+    cache.warm(args.rounds, args.seed)
+    cache.CACHE.save(args.out)
+    print(json.dumps(cache.CACHE.stats(), indent=2))
@@ -0,0 +1,92 @@
+"""
+Per-player index of the discards they could call.
+
+A player can Pon or Kan a kind only when they hold two or three of it, and
+Chii only with tiles at most two ranks away in the same suit. So a change to
+one kind's count only touches that kind's Pon/Kan entries and the Chii
+options of its neighbours, and the index is kept current with O(1) updates
+instead of being recomputed for every discard.
+"""
+
+from .tiles import HONOR_START, NUM_KINDS
+
+# Kinds whose Chii options depend on the count of each kind
+NEIGHBOURS = tuple(
+    () if kind >= HONOR_START else
+    tuple(k for k in range(kind - 2, kind + 3) if 0 <= k < HONOR_START and k // 9 == kind // 9)
+    for kind in range(NUM_KINDS)
+)
+
+
+def _chii_shapes(kind):
+    """The other two kinds of every sequence containing kind."""
+    if kind >= HONOR_START:
+        return ()
+    shapes = []
+    for start in (kind - 2, kind - 1, kind):
+        if start < 0 or start // 9 != kind // 9 or start % 9 > 6:
+            continue
+        shapes.append(tuple(k for k in (start, start + 1, start + 2) if k != kind))
+    return tuple(shapes)
+
+
+CHII_SHAPES = tuple(_chii_shapes(kind) for kind in range(NUM_KINDS))
+
+
+def chii_options(counts, kind):
+    """Lists the other two kinds of each sequence the counts can form with a tile of kind."""
+    return tuple(shape for shape in CHII_SHAPES[kind] if counts[shape[0]] and counts[shape[1]])
+
+
+class CallIndex:
+    """
+    The kinds one player can Pon, Kan or Chii on, kept in step with their hand's counts.
+    pon and kan are bitmasks over kinds, so copying an index for a snapshot is cheap.
+    """
+
+    __slots__ = ("pon", "kan", "chii")
+
+    def __init__(self, counts=None):
+        self.pon = 0
+        self.kan = 0
+        self.chii = [()] * NUM_KINDS  # Chii options per discarded kind, as chii_options returns them
+        if counts is not None:
+            self.rebuild(counts)
+
+    def rebuild(self, counts):
+        """Recomputes every entry, after a whole new hand."""
+        self.pon = 0
+        self.kan = 0
+        for kind in range(NUM_KINDS):
+            self._set_count(kind, counts[kind])
+            self.chii[kind] = chii_options(counts, kind)
+
+    def copy(self):
+        other = CallIndex.__new__(CallIndex)
+        other.pon = self.pon
+        other.kan = self.kan
+        other.chii = self.chii[:]
+        return other
+
+    def can_pon(self, kind):
+        return bool(self.pon >> kind & 1)
+
+    def can_kan(self, kind):
+        return bool(self.kan >> kind & 1)
+
+    def update(self, counts, kind):
+        """Refreshes the entries a change to the count of kind can affect."""
+        self._set_count(kind, counts[kind])
+        for neighbour in NEIGHBOURS[kind]:
+            self.chii[neighbour] = chii_options(counts, neighbour)
+
+    def _set_count(self, kind, count):
+        bit = 1 << kind
+        if count >= 2:
+            self.pon |= bit
+        else:
+            self.pon &= ~bit
+        if count >= 3:
+            self.kan |= bit
+        else:
+            self.kan &= ~bit
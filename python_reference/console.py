@@ -0,0 +1,111 @@
+"""
+Interactive play on stdin/stdout: an Agent that prompts with input() and an
+event sink that prints the game the way the original console loop did.
+"""
+
+from .agents import Agent
+from .tiles import KIND_MASK, tile_from_str, tile_to_str, tiles_to_str
+
+PLAYER_NAMES = ["East", "South", "West", "North"]  # Player names
+
+
+def ask(player_index, question):
+    return input(f"Player {player_index + 1} (of {PLAYER_NAMES[player_index]}), {question}? (y/n): ").lower() == 'y'
+
+
+class ConsoleAgent(Agent):
+    """Asks a human at the keyboard for every decision."""
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        hand = game.hands[player_index]
+        while True:
+            discard_prompt = f" (or 'd' to discard the drawn tile '{tile_to_str(drawn_tile)}')" if drawn_tile is not None else ""
+            discard_tile_str = input("Enter the tile to discard" + discard_prompt + ": ")
+            if drawn_tile is not None and discard_tile_str.lower() == 'd':
+                discard_tile = drawn_tile
+            else:
+                try:
+                    discard_tile = tile_from_str(discard_tile_str)
+                except ValueError:
+                    discard_tile = None
+            if discard_tile is not None and discard_tile in hand and \
+                    (allowed is None or discard_tile & KIND_MASK in allowed):
+                return discard_tile
+            print("Invalid tile. Please try again.")
+
+    def wants_riichi(self, game, player_index, riichi_discards):
+        return ask(player_index, "declare Riichi")
+
+    def wants_tsumo(self, game, player_index, tile):
+        return ask(player_index, "call Tsumo" + ("" if tile is None else " on " + tile_to_str(tile)))
+
+    def wants_ron(self, game, player_index, tile, discarding_player_index):
+        return ask(player_index, f"call Ron on {tile_to_str(tile)}")
+
+    def wants_kan(self, game, player_index, tile, discarding_player_index):
+        return ask(player_index, f"call Kan on {tile_to_str(tile)}")
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return ask(player_index, f"call Pon on {tile_to_str(tile)}")
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return ask(player_index, f"call Chii on {tile_to_str(tile)}")
+
+    def choose_chii(self, game, player_index, tile, sequences):
+        print("Possible sequences:")
+        for idx, seq in enumerate(sequences):
+            print(f"{idx + 1}: {tiles_to_str(seq)}")
+        return int(input("Choose a sequence (enter number): ")) - 1
+
+    def wants_concealed_kan(self, game, player_index, tile):
+        return ask(player_index, f"call Concealed Kan on {tile_to_str(tile)}")
+
+
+def print_score(score):
+    if score is None:
+        print("No yaku.")
+        return
+    print(", ".join(f"{name} {han}" for name, han in score.yaku))
+    limit = f"{score.yakuman}x yakuman" if score.yakuman else f"{score.han} han {score.fu} fu"
+    print(f"{limit}: {max(score.payments)} points")
+
+
+def console_events(game, event, data):
+    """Event sink that prints each game event for a human audience."""
+    player = data.get("player")
+    if event == "deal":
+        print(f"Initial Dora indicator: {tile_to_str(game.dora_indicators[-1])}")
+        for i, hand in enumerate(game.hands):
+            print(f"Player {i + 1} Hand: {hand}")
+    elif event == "turn":
+        print(f"\nCurrent Dora indicators: {tiles_to_str(game.dora_indicators)}")
+        print(f"\n{PLAYER_NAMES[player]}'s Turn:")
+        print(f"Hand: {game.hands[player]}")
+    elif event == "draw":
+        print(f"Drew tile: {tile_to_str(data['tile'])}")
+    elif event == "discard":
+        game.print_discard_piles()
+    elif event == "riichi":
+        print(f"Player {player + 1} declares Riichi!")
+    elif event == "pon":
+        print(f"Player {player + 1} called Pon on {tile_to_str(data['tile'])}!")
+    elif event == "kan":
+        print(f"Player {player + 1} called Kan on {tile_to_str(data['tile'])}!")
+    elif event == "chii":
+        print(f"Player {player + 1} called Chii with {tiles_to_str(data['tiles'])}!")
+    elif event == "concealed_kan":
+        print(f"Player {player + 1} called Concealed Kan on {tile_to_str(data['tile'])}!")
+    elif event == "dora":
+        print(f"New Dora indicator revealed: {tile_to_str(data['tile'])}")
+    elif event == "dora_exhausted":
+        print("All Dora indicators revealed from dead wall.")
+    elif event == "complete_hand":
+        print(f"Player {player + 1} has a complete hand!")
+    elif event == "tsumo":
+        print(f"Player {player + 1} wins by Tsumo!")
+        print_score(data["score"])
+    elif event == "ron":
+        print(f"Player {player + 1} wins by Ron!")
+        print_score(data["score"])
+    elif event == "exhausted":
+        print("No more tiles to draw!")
@@ -0,0 +1,88 @@
+"""
+Wall building and dealing by index arithmetic, for one table or a whole batch.
+
+The wall geometry is worked out once per dice roll by wall.layout() as tables
+of positions into the shuffled 136-tile sequence; here they become arrays, so
+dealing a batch of shuffled walls is a single fancy-indexing operation.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .tiles import KIND_MASK, NUM_KINDS, create_tileset
+from .wall import DEAD_ROW, DEAD_SLOTS, DEALT_TILES, DICE_ROLLS, DRAW_ORDERS, HAND_SLOTS, WALL_TILES
+
+TILESET = np.array(create_tileset(), dtype=np.int8)
+
+# Batched deal: hands (B, 4, 13) tile codes, hand_counts (B, 4, 34) kind counts,
+# dead_walls (B, 2, 7) and draw_orders (B, 70) tile codes left to draw.
+Deal = namedtuple("Deal", ["hands", "hand_counts", "dead_walls", "draw_orders"])
+
+
+def split_dead_wall(walls, dealer_roll):
+    """Cuts the dead wall out of the four 2x17 walls based on the dice roll."""
+    wall_index = (dealer_roll - 1) % 4
+    tile_index = 17 - (dealer_roll) # Count from right, both rows
+
+    if tile_index > 10:
+        A = walls[wall_index][:, tile_index:]
+        walls[wall_index] = walls[wall_index][:, :tile_index]
+
+        B = walls[(wall_index - 1) % 4][:, :(tile_index + 7) % 17]
+        walls[(wall_index - 1) % 4] = walls[(wall_index - 1) % 4][:, (tile_index + 7) % 17:]
+
+        dead_wall = np.array([np.concatenate((A[0], B[0])), np.concatenate((A[1], B[1]))])
+    else:
+
+        dead_wall = walls[wall_index][:, tile_index:tile_index + 7]
+        A = walls[wall_index][:, :tile_index]
+        B = walls[wall_index][:, tile_index + 7:]
+
+        walls[wall_index] = A
+        walls[(wall_index - 1) % 4] = np.array((np.concatenate((B[0], walls[(wall_index - 1) % 4][0])), np.concatenate((B[1], walls[(wall_index - 1) % 4][1]))))
+
+    return dead_wall, walls
+
+
+def drawing_order_from_walls(walls):
+    """Reads the live walls in the order tiles are drawn: wall by wall, each row right to left."""
+    return np.concatenate([wall[:, ::-1].ravel() for wall in walls])
+
+
+# Indexed by dice roll; rows for impossible rolls 0 and 1 are never used
+DRAW_POSITIONS = np.array(DRAW_ORDERS)  # (13, 122)
+DEAD_POSITIONS = np.array(DEAD_SLOTS).reshape(len(DEAD_SLOTS), 2, DEAD_ROW)  # (13, 2, 7)
+HAND_POSITIONS = DRAW_POSITIONS[:, np.array(HAND_SLOTS)]  # (13, 4, 13) into the shuffled sequence
+LIVE_POSITIONS = DRAW_POSITIONS[:, DEALT_TILES:]  # (13, 70)
+
+
+def shuffled_walls(batch, rng):
+    """Returns a (batch, 136) int8 array with one independently shuffled tileset per row."""
+    return rng.permuted(np.broadcast_to(TILESET, (batch, WALL_TILES)), axis=1)
+
+
+def roll_dice(batch, rng):
+    """Rolls the dealer's dice for each table: 2-12, uniform like MahjongGame.start_game."""
+    return rng.integers(DICE_ROLLS.start, DICE_ROLLS.stop, size=batch)
+
+
+def deal_batch(walls, dealer_rolls):
+    """Deals every table of a (B, 136) batch of shuffled walls with its dice roll."""
+    rows = np.arange(len(walls))[:, None]
+    hands = walls[rows[:, :, None], HAND_POSITIONS[dealer_rolls]]
+    dead_walls = walls[rows[:, :, None], DEAD_POSITIONS[dealer_rolls]]
+    draw_orders = walls[rows, LIVE_POSITIONS[dealer_rolls]]
+
+    # Count kinds per (table, player) with one bincount over flattened slot ids
+    seats = np.arange(len(walls) * 4).reshape(len(walls), 4, 1) * NUM_KINDS
+    slot_ids = (seats + (hands & KIND_MASK)).ravel()
+    hand_counts = np.bincount(slot_ids, minlength=len(walls) * 4 * NUM_KINDS)
+    hand_counts = hand_counts.reshape(len(walls), 4, NUM_KINDS).astype(np.int8)
+    return Deal(hands, hand_counts, dead_walls, draw_orders)
+
+
+def deal_wall(wall, dealer_roll):
+    """Deals a single shuffled 136-tile wall: returns (hands (4, 13), dead wall (2, 7), drawing order (70,))."""
+    wall = np.asarray(wall)
+    return wall[HAND_POSITIONS[dealer_roll]], wall[DEAD_POSITIONS[dealer_roll]], wall[LIVE_POSITIONS[dealer_roll]]
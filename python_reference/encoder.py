@@ -0,0 +1,179 @@
+"""
+Fixed-layout observation vectors for training, written straight into NumPy buffers.
+
+Every observation is OBS_SIZE numbers, laid out as FIELDS in order (LAYOUT maps
+each field name to its slice). Seats are relative to the observer: 0 is the
+observer, 1 the player to their right (next to act), 2 across and 3 to their
+left. Kinds are stored as kind + 1 so that 0 always means "empty".
+
+    hand               34  observer's concealed tiles per kind (0-4)
+    hand_red            3  observer holds the red five of suit s, p, m
+    visible            34  tiles of each kind every player can see
+    discard_kinds     128  per seat, MAX_DISCARDS discards in order (kind + 1)
+    discard_tsumogiri 128  discard was the tile just drawn
+    discard_red       128  discard was a red five
+    meld_types         16  per seat, MAX_MELDS melds: 1 chii, 2 pon, 3 kan, 4 concealed kan
+    meld_kinds         16  lowest kind of each meld + 1
+    dora                5  revealed dora indicators (kind + 1)
+    riichi              4  seat has declared Riichi
+    scalars             6  live tiles left, seat wind, round wind, dealer seat,
+                           current player seat, Kans made
+
+A whole batch is encoded with one scatter of its sparse entries and one block
+copy of the hand counts into the output buffer; nothing is allocated per sample
+besides the index lists the scatter reads.
+"""
+
+import numpy as np
+
+from .scoring import meld_shape
+from .tiles import FIVES, KIND_MASK, NUM_KINDS, RED
+
+MAX_DISCARDS = 32
+MAX_MELDS = 4
+MAX_DORA = 5
+MELD_TYPES = {"chii": 1, "pon": 2, "kan": 3}
+CONCEALED_KAN = 4
+
+FIELDS = (
+    ("hand", NUM_KINDS),
+    ("hand_red", len(FIVES)),
+    ("visible", NUM_KINDS),
+    ("discard_kinds", 4 * MAX_DISCARDS),
+    ("discard_tsumogiri", 4 * MAX_DISCARDS),
+    ("discard_red", 4 * MAX_DISCARDS),
+    ("meld_types", 4 * MAX_MELDS),
+    ("meld_kinds", 4 * MAX_MELDS),
+    ("dora", MAX_DORA),
+    ("riichi", 4),
+    ("scalars", 6),
+)
+
+
+def _layout():
+    layout, offset = {}, 0
+    for name, size in FIELDS:
+        layout[name] = slice(offset, offset + size)
+        offset += size
+    return layout, offset
+
+
+LAYOUT, OBS_SIZE = _layout()
+_HAND = LAYOUT["hand"].start
+_HAND_RED = LAYOUT["hand_red"].start
+_VISIBLE = LAYOUT["visible"].start
+_DISCARD_KINDS = LAYOUT["discard_kinds"].start
+_DISCARD_TSUMOGIRI = LAYOUT["discard_tsumogiri"].start
+_DISCARD_RED = LAYOUT["discard_red"].start
+_MELD_TYPES = LAYOUT["meld_types"].start
+_MELD_KINDS = LAYOUT["meld_kinds"].start
+_DORA = LAYOUT["dora"].start
+_RIICHI = LAYOUT["riichi"].start
+_SCALARS = LAYOUT["scalars"].start
+
+
+def new_buffer(batch, seats=4, dtype=np.float32):
+    """Allocates an output buffer for encode(): (batch, seats, OBS_SIZE), or (batch, OBS_SIZE) if seats is None."""
+    shape = (batch, OBS_SIZE) if seats is None else (batch, seats, OBS_SIZE)
+    return np.zeros(shape, dtype=dtype)
+
+
+def _public(game):
+    """
+    The entries every seat sees alike, as (positions, values) lists: per player, their
+    discards and melds with positions for relative seat 0, then the table-wide entries.
+    """
+    players = []
+    for player in range(4):
+        positions, values = [], []
+        tsumogiri = game.tsumogiri[player]
+        for i, tile in enumerate(game.discard_piles[player][:MAX_DISCARDS]):
+            positions.append(_DISCARD_KINDS + i)
+            values.append((tile & KIND_MASK) + 1)
+            if tsumogiri >> i & 1:
+                positions.append(_DISCARD_TSUMOGIRI + i)
+                values.append(1)
+            if tile & RED:
+                positions.append(_DISCARD_RED + i)
+                values.append(1)
+        meld_positions, meld_values = [], []
+        melds = [(MELD_TYPES[shape], kind) for shape, kind in map(meld_shape, game.open_melds[player])]
+        melds.extend((CONCEALED_KAN, tiles[0] & KIND_MASK) for tiles in game.concealed_kans[player])
+        for i, (meld_type, kind) in enumerate(melds[:MAX_MELDS]):
+            meld_positions += (_MELD_TYPES + i, _MELD_KINDS + i)
+            meld_values += (meld_type, kind + 1)
+        players.append((positions, values, meld_positions, meld_values))
+
+    positions, values = [], []
+    for kind, count in enumerate(game.visible_counts):
+        if count:
+            positions.append(_VISIBLE + kind)
+            values.append(count)
+    for i, tile in enumerate(game.dora_indicators[:MAX_DORA]):
+        positions.append(_DORA + i)
+        values.append((tile & KIND_MASK) + 1)
+    return players, positions, values
+
+
+def _gather(game, seat, base, public, index, value):
+    """Appends the (position, value) pairs of one seat's non-zero entries, hand counts aside."""
+    players, positions, values = public
+    index += [base + position for position in positions]
+    value += values
+
+    hand = game.hands[seat]
+    for suit in range(len(FIVES)):
+        if hand.red >> suit & 1:
+            index.append(base + _HAND_RED + suit)
+            value.append(1)
+
+    for player, (discard_positions, discard_values, meld_positions, meld_values) in enumerate(players):
+        relative = (player - seat) % 4
+        offset = base + relative * MAX_DISCARDS
+        index += [offset + position for position in discard_positions]
+        value += discard_values
+        offset = base + relative * MAX_MELDS
+        index += [offset + position for position in meld_positions]
+        value += meld_values
+        if game.riichi_players[player]:
+            index.append(base + _RIICHI + relative)
+            value.append(1)
+
+    scalars = (game.wall.remaining, game.seat_wind(seat), game.round_wind,
+               (game.dealer - seat) % 4, (game.current_player - seat) % 4, game.kan_count)
+    for i, scalar in enumerate(scalars):
+        index.append(base + _SCALARS + i)
+        value.append(scalar)
+
+
+def encode_seats(games, seats, out=None):
+    """
+    Encodes seats[i]'s view of games[i] into row i of out, shape (len(games), OBS_SIZE).
+    out must be C-contiguous; a float32 buffer is allocated if it is not given.
+    """
+    if out is None:
+        out = new_buffer(len(games), None)
+    if not out.flags.c_contiguous:
+        raise ValueError("The output buffer must be C-contiguous")
+    flat = out.reshape(-1)  # A view, as out is contiguous
+    index, value = [], []
+    public = None
+    for row, (game, seat) in enumerate(zip(games, seats)):
+        if public is None or game is not public_game:
+            public, public_game = _public(game), game  # Shared by consecutive rows of one game
+        _gather(game, seat, row * OBS_SIZE, public, index, value)
+    out.fill(0)
+    flat[index] = value
+    out[:, LAYOUT["hand"]] = [game.hands[seat].counts for game, seat in zip(games, seats)]
+    return out
+
+
+def encode(games, out=None):
+    """Encodes all four seats of every game into out, shape (len(games), 4, OBS_SIZE)."""
+    if out is None:
+        out = new_buffer(len(games))
+    if not out.flags.c_contiguous:
+        raise ValueError("The output buffer must be C-contiguous")
+    rows = [game for game in games for _ in range(4)]
+    encode_seats(rows, [seat for _ in games for seat in range(4)], out.reshape(len(games) * 4, OBS_SIZE))
+    return out
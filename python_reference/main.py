@@ -1,21 +1,53 @@
-import warnings
+"""
+The round engine: MahjongGame deals a round and plays it through agents.
 
-warnings.filterwarnings("ignore", category=DeprecationWarning)
+Importing this module has no side effects and does not load NumPy; only the
+original wall-building helpers (build_walls, determine_dead_wall, deal_hands)
+import it when they are called. Run the package with
+`python -m python_reference` for an interactive game.
+"""
 
 import random
-import numpy as np
 
-SUITS = ["s", "p", "m"]
-HONORS = ["Ea", "No", "So", "We", "Gr", "Re", "Wh"]
-PLAYER_NAMES = ["East", "South", "West", "North"]  # Player names
+from .agari import is_agari
+from . import cache
+from .calls import CallIndex
+from .console import PLAYER_NAMES, ConsoleAgent, console_events
+from . import scoring
+from .tiles import (
+    NUM_KINDS, KIND_MASK, Hand, create_tileset, tile_to_str, tiles_from_str, tiles_to_str, tile_sort_key,
+)
+from .wall import DEAD_ROW, MAX_KANS, RINSHAN_SLOTS, Wall
+
+# Round phases, run in order by MahjongGame.step()
+DRAW = "draw"  # The current player draws (or the round ends on an empty wall)
+SELF_ACTIONS = "self_actions"  # Tsumo, concealed Kan and Riichi on the drawn tile
+DISCARD = "discard"  # The current player discards
+CALLS = "calls"  # Other players may Ron or call the discard
+NEXT_PLAYER = "next_player"  # Play passes to the right
+ROUND_OVER = "round_over"
+
+RIICHI_MIN_TILES = 4  # Live tiles that must be left to declare Riichi, so the player draws again
 
 class MahjongGame:
-    def __init__(self):
-        self.drawing_order = None
+    def __init__(self, agents=None, events=None, rng=None, profiler=None):
+        """
+        agents holds one Agent per seat and defaults to ConsoleAgents prompting on stdin.
+        events is an optional callable(game, event, data) that receives every game event;
+        without one the game runs silently.
+        rng shuffles the wall and rolls the dice; each game gets its own random.Random by default.
+        profiler, a profiling.Profiler, times this game's phases and hot calls if given.
+        """
+        self.agents = agents if agents is not None else [ConsoleAgent() for _ in range(4)]
+        self.events = events
+        self.rng = rng if rng is not None else random.Random()
+        self.wall = None
         self.hands = None
         self.current_player = 0
-        self.dead_wall = None
         self.discard_piles = [[] for _ in range(4)] # Initialize discard piles for each player
+        self.tsumogiri = [0] * 4  # Bit i is set when discard i of the player's pile was the tile just drawn
+        self.genbutsu = [0] * 4  # Kinds that cannot win off each player: their discards, and any since their Riichi
+        self.temporary_furiten = [False] * 4  # The player passed a winning discard since their own last discard
         self.open_melds = [[] for _ in range(4)]  # Open melds for each player
         self.dora_indicators = []  # List of Dora indicator tiles
         self.kan_count = 0
@@ -23,410 +55,555 @@ class MahjongGame:
         self.concealed_kans = [[] for _ in range(4)] # List of concealed Kans for each player
         self.riichi_players = [False] * 4  # Track Riichi status for each player
         self.riichi_wait = [None] * 4  # Tiles each player is waiting on for Ron
+        self.can_riichi = [True] * 4  # Seats that may declare Riichi; a match clears those who cannot pay the stick
+        self.waits = [frozenset()] * 4  # Tile kinds that would complete each player's hand, kept up to date
+        self.call_index = [CallIndex() for _ in range(4)]  # Kinds each player can Pon, Kan or Chii on
+        self.visible_counts = [0] * NUM_KINDS  # Tiles every player can see: discards, melds, dora indicators
+        self.dealer = 0  # Seat 0 is East unless a match driver rotates the dealer
+        self.round_wind = 0  # 0-3 for East-North
+        self.honba = 0  # Repeat counters, paid on top of every win
+        self.riichi_sticks = 0  # Riichi deposits on the table, this round's included
+
+        # Round driver state
+        self.phase = None
+        self.drawn_tile = None  # Tile drawn this turn, None after a call
+        self.last_discard = None
+        self.declaring_riichi = False
+        self.riichi_discards = []
+        self.result = None  # Outcome of the round once phase is ROUND_OVER
+        self.rinshan_pending = False  # The current player draws a replacement tile after a Kan
+        self.drawn_rinshan = False  # drawn_tile is a replacement tile, for Rinshan Kaihou
+
+        if profiler is not None:
+            profiler.attach(self)
+
+    def snapshot(self):
+        """
+        Captures the round state as a flat tuple of copies so restore() can return to it
+        later, any number of times. Only the wall's cursors are saved: its tiles are shared.
+        """
+        return (
+            self.wall.snapshot(),
+            [(hand.counts[:], hand.red, hand.size, pile[:], melds[:], kans[:], index.pon, index.kan, index.chii[:])
+             for hand, pile, melds, kans, index in
+             zip(self.hands, self.discard_piles, self.open_melds, self.concealed_kans, self.call_index)],
+            self.dora_indicators[:], self.riichi_players[:], self.riichi_wait[:], self.waits[:],
+            self.visible_counts[:], self.riichi_discards[:], self.tsumogiri[:], self.genbutsu[:],
+            self.temporary_furiten[:],
+            (self.current_player, self.kan_count, self.kan_player, self.dealer, self.round_wind,
+             self.honba, self.riichi_sticks, self.phase, self.drawn_tile, self.last_discard,
+             self.declaring_riichi, self.result, self.rinshan_pending, self.drawn_rinshan),
+        )
+
+    def restore(self, snapshot):
+        """
+        Returns the round to a snapshot taken from this game or one dealt the same way.
+        State is copied back into the game's existing containers, so nothing is reallocated.
+        """
+        wall, players, dora_indicators, riichi_players, riichi_wait, waits, visible_counts, riichi_discards, \
+            tsumogiri, genbutsu, temporary_furiten, scalars = snapshot
+        self.wall = Wall.restore(wall)
+        for player, (counts, red, size, pile, melds, kans, pon, kan, chii) in enumerate(players):
+            hand = self.hands[player]
+            hand.counts[:] = counts
+            hand.red = red
+            hand.size = size
+            self.discard_piles[player][:] = pile
+            self.open_melds[player][:] = melds  # Melds themselves never change once called
+            self.concealed_kans[player][:] = kans
+            index = self.call_index[player]
+            index.pon = pon
+            index.kan = kan
+            index.chii[:] = chii
+        self.dora_indicators[:] = dora_indicators
+        self.riichi_players[:] = riichi_players
+        self.riichi_wait[:] = riichi_wait
+        self.waits[:] = waits
+        self.visible_counts[:] = visible_counts
+        self.riichi_discards[:] = riichi_discards
+        self.tsumogiri[:] = tsumogiri
+        self.genbutsu[:] = genbutsu
+        self.temporary_furiten[:] = temporary_furiten
+        (self.current_player, self.kan_count, self.kan_player, self.dealer, self.round_wind,
+         self.honba, self.riichi_sticks, self.phase, self.drawn_tile, self.last_discard,
+         self.declaring_riichi, self.result, self.rinshan_pending, self.drawn_rinshan) = scalars
+
+    def clone(self):
+        """
+        An independent copy of the round for search. Agents, the event sink and rng are
+        shared with this game; set clone.events = None to branch silently.
+        """
+        other = type(self).__new__(type(self))  # A profiled game's clones are profiled too
+        other.__dict__.update(self.__dict__)
+        other.wall = Wall.restore(self.wall.snapshot())
+        other.hands = [hand.copy() for hand in self.hands]
+        other.discard_piles = [pile[:] for pile in self.discard_piles]
+        other.open_melds = [melds[:] for melds in self.open_melds]
+        other.concealed_kans = [kans[:] for kans in self.concealed_kans]
+        other.call_index = [index.copy() for index in self.call_index]
+        other.dora_indicators = self.dora_indicators[:]
+        other.riichi_players = self.riichi_players[:]
+        other.riichi_wait = self.riichi_wait[:]
+        other.can_riichi = self.can_riichi[:]
+        other.waits = self.waits[:]
+        other.visible_counts = self.visible_counts[:]
+        other.riichi_discards = self.riichi_discards[:]
+        other.tsumogiri = self.tsumogiri[:]
+        other.genbutsu = self.genbutsu[:]
+        other.temporary_furiten = self.temporary_furiten[:]
+        return other
+
+    def determinize(self, player_index, rng=None):
+        """
+        Resamples everything player_index cannot see: the opponents' concealed tiles, the
+        live wall and the unrevealed dead wall, ura-dora included. Discards, melds, dora
+        indicators and the player's own hand are untouched, and each opponent keeps their
+        hand size. Opponents' hands are not conditioned on their Riichi or calls.
+        Usually applied to a clone(); returns the game.
+        """
+        rng = rng if rng is not None else self.rng
+        wall = self.wall
+        tiles = wall.tiles[:]  # Snapshots share the old list
+        revealed = {wall.dead_start + column for column in range(1, 1 + wall.dora_revealed)}
+        drawn = {wall.dead_start + row * DEAD_ROW + column for row, column in RINSHAN_SLOTS[:wall.rinshan_drawn]}
+        # Live tiles, the ones a replacement draw cut off from the live wall, and the dead wall
+        positions = list(range(wall.draw_index, wall.dead_start)) + [
+            position for position in range(wall.dead_start, len(tiles))
+            if position not in revealed and position not in drawn
+        ]
+        opponents = [p for p in range(4) if p != player_index]
+
+        hidden = [tiles[position] for position in positions]
+        for p in opponents:
+            hidden.extend(self.hands[p].tiles())
+        rng.shuffle(hidden)
+
+        for position, tile in zip(positions, hidden):
+            tiles[position] = tile
+        dealt = len(positions)
+        for p in opponents:
+            size = len(self.hands[p])
+            self.hands[p] = Hand(hidden[dealt:dealt + size])
+            dealt += size
+            self.refresh_player(p)
+            if self.riichi_players[p]:
+                self.riichi_wait[p] = self.waits[p]
+        wall.tiles = tiles
+        return self
+
+    def emit(self, event, **data):
+        """Passes an event to the event sink, if there is one."""
+        if self.events is not None:
+            self.events(self, event, data)
 
     def create_tileset(self):
         """Creates a standard Riichi Mahjong tileset."""
-        tiles = []
-        # Basic tiles
-        for suit in SUITS:
-            for value in range(1, 10):
-                for _ in range(4):
-                    tile = f"{value}{suit}"
-                    tiles.append(tile)
-                if value == 5:  # Add the red 5
-                    tiles.remove("5" + suit)  # Remove a regular 5
-                    tiles.append(f"5{suit}*") # Add the red 5
-
-        # Honor tiles
-        for honor in HONORS:
-            for _ in range(4):
-                tiles.append(honor)
-
-        return tiles
+        return create_tileset()
 
     def organize_hand(self, hand):
-        """Organizes the hand for readability: suits, numbers, honors."""
-
-        def tile_sort_key(tile):
-            if tile[1] == 's':
-                suit_order = 0
-                value = int(tile[:-1]) if '*' not in tile else int(tile[:-2])
-            elif tile[1] == 'p':
-                suit_order = 1
-                value = int(tile[:-1]) if '*' not in tile else int(tile[:-2])
-            elif tile[1] == 'm':
-                suit_order = 2
-                value = int(tile[:-1]) if '*' not in tile else int(tile[:-2])
-            else:  # Honor tiles
-                suit_order = 3
-                if tile in ["Ea", "No", "So", "We"]:
-                    value = HONORS.index(tile)
-                else:
-                    value = HONORS.index(tile) + 10  # Place dragons after winds
-
-            return (suit_order, value, tile)  # Include tile itself for tie-breaker (red 5s)
-
+        """Organizes a list of tiles for readability: suits, numbers, honors."""
         return sorted(hand, key=tile_sort_key)
 
     def build_walls(self, tiles):
         """Shuffles and builds walls from the tileset."""
-        random.shuffle(tiles)
+        import numpy as np
+
+        self.rng.shuffle(tiles)
         walls = [tiles[i:i+34] for i in range(0, len(tiles), 34)]
         walls = [np.reshape(wall, (2, 17)) for wall in walls]
 
         return walls
 
+    @property
+    def drawing_order(self):
+        """Live tiles still to be drawn, in order."""
+        return self.wall.live_tiles()
+
+    @property
+    def dead_wall(self):
+        return self.wall.dead_wall()
+
     def get_next_dora(self):
-        if len(self.dead_wall[0]) > len(self.dora_indicators) + 1:
-            next_dora = self.dead_wall[0][len(self.dora_indicators) + 1]
+        next_dora = self.wall.reveal_dora()
+        if next_dora is not None:
             self.dora_indicators.append(next_dora)
-            print(f"New Dora indicator revealed: {next_dora}")
+            self.reveal_tiles([next_dora])
+            self.emit("dora", tile=next_dora)
         else:
-            print("All Dora indicators revealed from dead wall.")
-            if self.kan_player != -1:  # Check for four quads draw condition
-                # Implement four quads draw logic here
-                pass
+            self.emit("dora_exhausted")
 
-    def determine_dead_wall(self, walls, dealer_roll):
-        """Determines the dead wall based on the dice roll."""
-        wall_index = (dealer_roll - 1) % 4
-        tile_index = 17 - (dealer_roll) # Count from right, both rows
-
-        dead_wall = []
-
-        if tile_index > 10:
-            A = walls[wall_index][:, tile_index:]
-            walls[wall_index] = walls[wall_index][:, :tile_index]
-
-            B = walls[(wall_index - 1) % 4][:, :(tile_index + 7) % 17]
-            walls[(wall_index - 1) % 4] = walls[(wall_index - 1) % 4][:, (tile_index + 7) % 17:]
-
-            dead_wall = np.array([np.concatenate((A[0], B[0])), np.concatenate((A[1], B[1]))])
-        else:
+    def record_kan(self, player_index):
+        """Counts a Kan for the four-Kan rules and queues the replacement draw."""
+        self.kan_count += 1
+        if self.kan_player is None:
+            self.kan_player = player_index
+        elif self.kan_player != player_index:
+            self.kan_player = -1  # More than one player called Kan
+        self.rinshan_pending = True
 
-            dead_wall = walls[wall_index][:, tile_index:tile_index + 7]
-            A = walls[wall_index][:, :tile_index]
-            B = walls[wall_index][:, tile_index + 7:]
+    def four_kan_abort(self):
+        """True once four Kans have been made by more than one player, which aborts the round."""
+        return self.kan_count >= MAX_KANS and self.kan_player == -1
 
-            walls[wall_index] = A
-            walls[(wall_index - 1) % 4] = np.array((np.concatenate((B[0], walls[(wall_index - 1) % 4][0])), np.concatenate((B[1], walls[(wall_index - 1) % 4][1]))))
+    def determine_dead_wall(self, walls, dealer_roll):
+        """Determines the dead wall based on the dice roll."""
+        from .dealing import split_dead_wall
 
-        return dead_wall, walls
+        return split_dead_wall(walls, dealer_roll)
 
-    def deal_hands(self, walls):
-        """Deals hands to the four players."""
-        hands = [[], [], [], []]
-        wall_index = 0
-        tile_index = 0
+    def deal_hands(self, walls, dead_wall):
+        """Lays out the round's Wall from the cut walls and deals hands to the four players."""
+        from .dealing import drawing_order_from_walls
 
-        wall_index = np.argmin([len(wall[0]) for wall in walls])
-        player = 0
+        self.wall = Wall(drawing_order_from_walls(walls), dead_wall)
+        return [Hand(tiles) for tiles in self.wall.deal()]
 
-        drawing_order = []
-        for wall in walls:
-            drawing_order = np.concatenate((drawing_order, np.array([row[::-1] for row in wall]).flatten()))
+    def draw_next_tile(self):
+        return self.wall.draw()  # None once there are no more tiles to draw
 
-        for _ in range(16):
-            hands[player] = np.concatenate((hands[player], drawing_order[:3]))
-            player = (player + 1) % 4
-            drawing_order = drawing_order[3:]
+    def discard_tile(self, player_index, tile):
+        """Discards the given tile from the player's hand."""
+        hand = self.hands[player_index]
+        hand.remove(tile)
+        self.call_index[player_index].update(hand.counts, tile & KIND_MASK)
+        self.update_waits(player_index)
+        pile = self.discard_piles[player_index]
+        if tile == self.drawn_tile:
+            self.tsumogiri[player_index] |= 1 << len(pile)
+        pile.append(tile)
+        self.temporary_furiten[player_index] = False
+        self.reveal_tiles([tile])
+        self.emit("discard", player=player_index, tile=tile)
+
+    def mark_safe(self, player_index, kind):
+        """
+        Records a discard of kind that nobody Ronned: it is genbutsu against the
+        discarder, and against every Riichi player, who can no longer win on it.
+        """
+        bit = 1 << kind
+        self.genbutsu[player_index] |= bit
+        for player, riichi in enumerate(self.riichi_players):
+            if riichi:
+                self.genbutsu[player] |= bit
 
-        for _ in range(4):
-            hands[player] = np.concatenate((hands[player], [drawing_order[0]]))
-            player = (player + 1) % 4
-            drawing_order = drawing_order[1:]
+    def pass_discard(self, discarding_player_index, tile):
+        """
+        Settles a discard once no one has Ronned it: the kind is marked safe, and every
+        player it would have completed is furiten until their next discard.
+        """
+        kind = tile & KIND_MASK
+        self.mark_safe(discarding_player_index, kind)
+        for player in range(4):
+            if player != discarding_player_index and kind in self.waits[player]:
+                self.temporary_furiten[player] = True
 
-        # ... Inside the deal_hands function, after populating drawing_order:
-        self.drawing_order = drawing_order
-        return hands
+    def is_furiten(self, player_index):
+        """
+        True when the player cannot Ron: they wait on a kind they discarded, passed
+        since their Riichi, or they passed a winning discard since their last discard.
+        """
+        if self.temporary_furiten[player_index]:
+            return True
+        genbutsu = self.genbutsu[player_index]
+        return any(genbutsu >> kind & 1 for kind in self.waits[player_index])
+
+    def take_discard(self, player_index):
+        """Removes the last discard from the player's pile for a call."""
+        pile = self.discard_piles[player_index]
+        pile.pop()
+        self.tsumogiri[player_index] &= ~(1 << len(pile))
+
+    def update_waits(self, player_index):
+        """
+        Recomputes the player's wait set. Only the player's own draws, discards and
+        calls change it, so it is refreshed on their discard (and cleared by their calls)
+        rather than on every opponent discard. Call it after replacing a hand directly.
+        """
+        self.waits[player_index] = frozenset(self.tenpai_waits(player_index))
 
-    def draw_next_tile(self):
-        if len(self.drawing_order) == 0:
-            return None  # No more tiles to draw
-        tile = self.drawing_order[0]
-        self.drawing_order = self.drawing_order[1:]
-        return tile
-
-    def discard_tile(self, player_index, tile_index):
-        """Discards the tile at the given index from the player's hand."""
-        discarded_tile = self.hands[player_index][tile_index]
-        self.hands[player_index] = np.delete(self.hands[player_index], tile_index)
-        self.discard_piles[player_index].append(discarded_tile)
+    def refresh_player(self, player_index):
+        """Rebuilds the player's call index and waits after their hand was replaced wholesale."""
+        self.call_index[player_index].rebuild(self.hands[player_index].counts)
+        self.update_waits(player_index)
 
-    def print_discard_piles(self):
-        """Prints the current state of all players' discard piles."""
-        print("\nDiscard Piles:")
-        for i, pile in enumerate(self.discard_piles):
-            row_count = len(pile) // 6 + (1 if len(pile) % 6 else 0)
-            print(f"Player {i + 1}:")
-            for r in range(row_count):
-                row_start = r * 6
-                row_end = min(row_start + 6, len(pile))
-                print(" ".join(pile[row_start:row_end]))
+    def reveal_tiles(self, tiles):
+        """Counts tiles that have become visible to every player."""
+        for tile in tiles:
+            self.visible_counts[tile & KIND_MASK] += 1
 
     def can_pon(self, player_index, discarded_tile):
         """Checks if the player can call Pon on the discarded tile."""
-        hand = list(self.hands[player_index])
-        count = hand.count(discarded_tile)
-        return count >= 2
+        return self.call_index[player_index].can_pon(discarded_tile & KIND_MASK)
 
     def can_kan(self, player_index, discarded_tile):
         """Checks if the player can call Kan on the discarded tile."""
-        hand = list(self.hands[player_index])
-        count = hand.count(discarded_tile)
-        return count >= 3
+        return self.call_index[player_index].can_kan(discarded_tile & KIND_MASK) and self.kan_count < MAX_KANS
 
     def perform_kan(self, player_index, discarded_tile, discarding_player_index):
         """Executes the Kan call."""
         hand = self.hands[player_index]
-        indices_to_remove = []
-        count = 0
-        for i, tile in enumerate(hand):
-            if tile == discarded_tile and count < 3:
-                indices_to_remove.append(i)
-                count += 1
-
-        for index in sorted(indices_to_remove, reverse=True):
-            hand = np.delete(hand, index)
-
-        self.hands[player_index] = hand
-        self.discard_piles[discarding_player_index].pop()
+        taken = hand.take(discarded_tile & KIND_MASK, 3)
+        self.call_index[player_index].update(hand.counts, discarded_tile & KIND_MASK)
+        self.waits[player_index] = frozenset()  # Refreshed on the discard after the replacement draw
+        self.reveal_tiles(taken)
+        self.take_discard(discarding_player_index)
 
         # Add to open melds
-        self.open_melds[player_index].append([discarded_tile] * 4)
+        self.open_melds[player_index].append(taken + [discarded_tile])
 
         # Reveal next Dora indicator
         self.get_next_dora()
+        self.record_kan(player_index)
 
-        # Update Kan count and player
-        self.kan_count += 1
-        if self.kan_player is None:
-            self.kan_player = player_index
-        elif self.kan_player != player_index:
-            self.kan_player = -1  # More than one player called Kan
-
-
-        print(f"Player {player_index + 1} called Kan on {discarded_tile}!")
+        self.emit("kan", player=player_index, tile=discarded_tile, discarding_player=discarding_player_index)
 
     def can_chii(self, player_index, discarded_tile):
         """Checks if the player can call Chii on the discarded tile."""
-        if discarded_tile in HONORS:
-            return False
-
         if (player_index - self.current_player) % 4 != 1:
             return False # Only the next player in turn order can call Chii
 
-        hand = self.hands[player_index]
-        tile_value = int(discarded_tile[0]) if '*' not in discarded_tile else int(discarded_tile[0])
-        suit = discarded_tile[1]
-
-        for i in range(1, 10):
-            if (f"{i}{suit}" in hand and f"{i+1}{suit}" in hand and tile_value == i+2) or \
-               (f"{i}{suit}" in hand and f"{i+2}{suit}" in hand and tile_value == i+1) or \
-               (f"{i+1}{suit}" in hand and f"{i+2}{suit}" in hand and tile_value == i):
-                return True
-        return False
+        return len(self.call_index[player_index].chii[discarded_tile & KIND_MASK]) > 0
+
+    def chii_options(self, player_index, discarded_tile):
+        """Lists the (lowest, other) kinds of each hand pair that forms a sequence with the discard."""
+        return self.call_index[player_index].chii[discarded_tile & KIND_MASK]
 
-    def perform_chii(self, player_index, discarded_tile, discarding_player_index):
-        """Executes the Chii call, prompting for the specific sequence if needed."""
+    def perform_chii(self, player_index, discarded_tile, discarding_player_index, sequence=None):
+        """
+        Executes the Chii call, asking the player's agent for the specific sequence if needed.
+        sequence, if given, is the tile codes to call with, as a replayed Chii event holds them.
+        """
         hand = self.hands[player_index]
-        tile_value = int(discarded_tile[0]) if '*' not in discarded_tile else int(discarded_tile[0])
-        suit = discarded_tile[1]
-
-        possible_sequences = []
-        for i in range(1, 10):
-            if f"{i}{suit}" in hand and f"{i+1}{suit}" in hand and tile_value == i+2:
-                possible_sequences.append((f"{i}{suit}", f"{i+1}{suit}", discarded_tile))
-            if f"{i}{suit}" in hand and f"{i+2}{suit}" in hand and tile_value == i+1:
-                possible_sequences.append((f"{i}{suit}", discarded_tile, f"{i+2}{suit}"))
-            if f"{i+1}{suit}" in hand and f"{i+2}{suit}" in hand and tile_value == i:
-                possible_sequences.append((discarded_tile, f"{i+1}{suit}", f"{i+2}{suit}"))
-
-        if len(possible_sequences) > 1:
-            print("Possible sequences:")
-            for idx, seq in enumerate(possible_sequences):
-                print(f"{idx + 1}: {' '.join(seq)}")
-            choice = int(input("Choose a sequence (enter number): ")) - 1
-            chosen_sequence = possible_sequences[choice]
+        options = self.chii_options(player_index, discarded_tile)
+        possible_sequences = [sorted(others + (discarded_tile,), key=tile_sort_key) for others in options]
+
+        if sequence is not None:
+            possible_sequences = [sorted(sequence, key=tile_sort_key)]
+            choice = 0
+        elif len(possible_sequences) > 1:
+            choice = self.agents[player_index].choose_chii(self, player_index, discarded_tile, possible_sequences)
         else:
-            chosen_sequence = possible_sequences[0]
+            choice = 0
 
-        for tile in chosen_sequence:
-            index = np.where(hand == tile)[0]
-            hand = np.delete(hand, index)
+        chosen_sequence = []
+        for tile in possible_sequences[choice]:
+            if tile == discarded_tile:
+                chosen_sequence.append(tile)
+            else:
+                chosen_sequence.extend(hand.take(tile & KIND_MASK))
+                self.call_index[player_index].update(hand.counts, tile & KIND_MASK)
 
-        self.hands[player_index] = hand
-        self.discard_piles[discarding_player_index].pop()
+        self.waits[player_index] = frozenset()  # Refreshed on the discard that follows
+        self.reveal_tiles(tile for tile in chosen_sequence if tile != discarded_tile)
+        self.take_discard(discarding_player_index)
         self.open_melds[player_index].append(chosen_sequence)
         # Add the Chii set to an open meld area
-        print(f"Player {player_index + 1} called Chii with {' '.join(chosen_sequence)}!")
+        self.emit("chii", player=player_index, tiles=chosen_sequence, tile=discarded_tile, discarding_player=discarding_player_index)
 
     def perform_pon(self, player_index, discarded_tile, discarding_player_index):
         """Executes the Pon call: removes tiles from hand, updates discard pile."""
         hand = self.hands[player_index]
-        count = 0
-        indices_to_remove = []
-        for i, tile in enumerate(hand):
-            if tile == discarded_tile and count < 2:
-                indices_to_remove.append(i)
-                count += 1
-
-        # Remove the two tiles from the hand in reverse order to avoid index issues
-        for index in sorted(indices_to_remove, reverse=True):
-            hand = np.delete(hand, index)
-
-        self.hands[player_index] = hand
+        taken = hand.take(discarded_tile & KIND_MASK, 2)
+        self.call_index[player_index].update(hand.counts, discarded_tile & KIND_MASK)
+        self.waits[player_index] = frozenset()  # Refreshed on the discard that follows
+        self.reveal_tiles(taken)
 
         # Remove the tile from the discarding player's discard pile
-        self.discard_piles[discarding_player_index].pop()
+        self.take_discard(discarding_player_index)
 
-        self.open_melds[player_index].append([discarded_tile] * 3)
-        print(f"Player {player_index + 1} called Pon on {discarded_tile}!")
+        self.open_melds[player_index].append(taken + [discarded_tile])
+        self.emit("pon", player=player_index, tile=discarded_tile, discarding_player=discarding_player_index)
 
     def perform_concealed_kan(self, tile):
         """Performs a concealed Kan, updating hand, melds, and Dora indicators."""
 
+        # Remove all four tiles from hand and add them to concealed Kans
         hand = self.hands[self.current_player]
-        for _ in range(4):  # Remove all four tiles from hand
-            index = np.where(hand == tile)[0][0]  # Find the first index of the tile
-            hand = np.delete(hand, index)
-        self.hands[self.current_player] = hand
-
-        # Add to concealed Kans
-        self.concealed_kans[self.current_player].append([tile] * 4)
+        taken = hand.take(tile & KIND_MASK, 4)
+        self.call_index[self.current_player].update(hand.counts, tile & KIND_MASK)
+        self.concealed_kans[self.current_player].append(taken)
+        self.waits[self.current_player] = frozenset()  # Refreshed on the discard after the replacement draw
+        self.reveal_tiles(taken)
 
         # Reveal next Dora indicator
+        self.get_next_dora()
+        self.record_kan(self.current_player)
 
-
-        print(f"Player {self.current_player + 1} called Concealed Kan on {tile}!")
+        self.emit("concealed_kan", player=self.current_player, tile=tile)
 
     def handle_call(self, discarded_tile, discarding_player_index):
-        """Handles all call opportunities (Pon, Kan, Chii) after a discard."""
-        for player_index in range(4):
-            if player_index != discarding_player_index:
-                if self.can_kan(player_index, discarded_tile):
-                    if input(f"Player {player_index + 1} (of {PLAYER_NAMES[player_index]}), call Kan on {discarded_tile}? (y/n): ").lower() == 'y':
-                        self.perform_kan(player_index, discarded_tile, discarding_player_index)
-                        self.current_player = player_index
-                        if game.is_complete_hand(game.current_player):
-                            print(f"Player {game.current_player + 1} has a complete hand!")
-
-                        return True
-
-                if self.can_pon(player_index, discarded_tile):
-                    if input(f"Player {player_index + 1} (of {PLAYER_NAMES[player_index]}), call Pon on {discarded_tile}? (y/n): ").lower() == 'y':
-                        self.perform_pon(player_index, discarded_tile, discarding_player_index)
-                        self.current_player = player_index
-                        if game.is_complete_hand(game.current_player):
-                            print(f"Player {game.current_player + 1} has a complete hand!")
-
-                        return True
-
-                if self.can_chii(player_index, discarded_tile):
-                    if input(f"Player {player_index + 1} (of {PLAYER_NAMES[player_index]}), call Chii on {discarded_tile}? (y/n): ").lower() == 'y':
-                        self.perform_chii(player_index, discarded_tile, discarding_player_index)
-                        self.current_player = player_index
-                        if game.is_complete_hand(game.current_player):
-                            print(f"Player {game.current_player + 1} has a complete hand!")
-
-                        return True
+        """
+        Handles all call opportunities after a discard: Kan or Pon from any player, asked
+        in turn order from the discarder, then Chii, which only the next player can call.
+        """
+        for offset in range(1, 4):
+            player_index = (discarding_player_index + offset) % 4
+            # Players in Riichi have locked their hands and cannot call
+            if self.riichi_players[player_index]:
+                continue
+            agent = self.agents[player_index]
+            if self.can_kan(player_index, discarded_tile) and \
+                    agent.wants_kan(self, player_index, discarded_tile, discarding_player_index):
+                self.perform_kan(player_index, discarded_tile, discarding_player_index)
+                return self.take_turn(player_index)
+            if self.can_pon(player_index, discarded_tile) and \
+                    agent.wants_pon(self, player_index, discarded_tile, discarding_player_index):
+                self.perform_pon(player_index, discarded_tile, discarding_player_index)
+                return self.take_turn(player_index)
+
+        player_index = (discarding_player_index + 1) % 4
+        if not self.riichi_players[player_index] and self.can_chii(player_index, discarded_tile) and \
+                self.agents[player_index].wants_chii(self, player_index, discarded_tile, discarding_player_index):
+            self.perform_chii(player_index, discarded_tile, discarding_player_index)
+            return self.take_turn(player_index)
         return False
 
-    def turn_prompt(self, called=False):
-        player_name = PLAYER_NAMES[self.current_player]  # Get player name
-        print(f"\nCurrent Dora indicators: {' '.join(self.dora_indicators)}")
-        print(f"\n{player_name}'s Turn:")
-        print(f"Hand: {' '.join(self.hands[self.current_player])}")
-
-
-        if self.riichi_players[self.current_player]:
-            # Riichi turn: draw and check for Tsumo or Ron only
+    def take_turn(self, player_index):
+        """Gives the turn to a player who has just called; returns True."""
+        self.current_player = player_index
+        if self.is_complete_hand(player_index):
+            self.emit("complete_hand", player=player_index)
+        return True
+
+    def step(self):
+        """Runs the current phase of the round; returns False once the round is over."""
+        phase = self.phase
+        if phase == DRAW:
+            self.draw_phase()
+        elif phase == SELF_ACTIONS:
+            self.self_actions_phase()
+        elif phase == DISCARD:
+            self.discard_phase()
+        elif phase == CALLS:
+            self.calls_phase()
+        elif phase == NEXT_PLAYER:
+            self.current_player = (self.current_player + 1) % 4
+            self.phase = DRAW
+        return self.phase != ROUND_OVER
+
+    def run_round(self):
+        """Plays the dealt round to the end and returns its result."""
+        while self.step():
+            pass
+        return self.result
+
+    def turn_prompt(self):
+        """Plays phases until the turn passes to the next player; returns 0 once the round is over."""
+        while True:
+            phase = self.phase
+            if not self.step():
+                return 0
+            if phase == NEXT_PLAYER:
+                return 1
+
+    def end_round(self, outcome, **data):
+        if outcome in ("tsumo", "ron"):
+            if data.get("score") is None:
+                data["score"] = self.score_win(data["player"], data["tile"], data.get("discarding_player"))
+            if data["score"] is None:
+                raise ValueError(f"Player {data['player'] + 1} cannot win on {tile_to_str(data['tile'])} without yaku")
+        self.result = dict(outcome=outcome, **data)
+        self.phase = ROUND_OVER
+        self.emit(outcome, **data)
+
+    def draw_phase(self):
+        player = self.current_player
+        self.emit("turn", player=player)
+        rinshan = self.rinshan_pending
+        if rinshan:
+            self.rinshan_pending = False
+            drawn_tile = self.wall.draw_rinshan()
+        else:
             drawn_tile = self.draw_next_tile()
-            if drawn_tile:
-                print(f"Drew tile: {drawn_tile}")
-                self.hands[self.current_player] = np.concatenate(
-                    (self.hands[self.current_player], [drawn_tile])
-                )
-
-                if self.is_complete_hand(self.current_player):
-                    print(f"Player {self.current_player + 1} wins by Tsumo!")
-                    return 0
-
-                discard_index = np.where(self.hands[self.current_player] == drawn_tile)[0][0]
-                self.discard_tile(self.current_player, discard_index)
-                self.print_discard_piles()
-                discard_tile = drawn_tile
-
+        if drawn_tile is None:
+            self.end_round("exhausted")
+            return
+
+        self.emit("draw", player=player, tile=drawn_tile, rinshan=rinshan)
+        self.drawn_rinshan = rinshan
+        self.hands[player].add(drawn_tile)
+        self.call_index[player].update(self.hands[player].counts, drawn_tile & KIND_MASK)
+        self.drawn_tile = drawn_tile
+        self.phase = SELF_ACTIONS
+
+    def self_actions_phase(self):
+        player = self.current_player
+        agent = self.agents[player]
+        drawn_tile = self.drawn_tile
+        self.declaring_riichi = False
+        self.riichi_discards = []
+
+        # Tsumo (self-draw win) needs a complete hand with a yaku
+        score = self.score_win(player, drawn_tile) if self.is_complete_hand(player) else None
+
+        if self.riichi_players[player]:
+            # Riichi turn: win on the drawn tile or discard it
+            if score is not None:
+                self.end_round("tsumo", player=player, tile=drawn_tile, score=score)
+            else:
+                self.phase = DISCARD
+            return
+
+        if score is not None and agent.wants_tsumo(self, player, drawn_tile):
+            self.end_round("tsumo", player=player, tile=drawn_tile, score=score)
+            return
+
+        if self.hands[player].count(drawn_tile) == 4 and self.kan_count < MAX_KANS and \
+                agent.wants_concealed_kan(self, player, drawn_tile):
+            self.perform_concealed_kan(drawn_tile)
+            self.phase = DRAW  # Replacement draw
+            return
+
+        riichi_discards = self.check_riichi_ready(player)
+        if len(riichi_discards) > 0 and agent.wants_riichi(self, player, riichi_discards):
+            self.declaring_riichi = True
+            self.riichi_discards = riichi_discards
+        self.phase = DISCARD
+
+    def discard_phase(self):
+        player = self.current_player
+        if self.riichi_players[player]:
+            discard_tile = self.drawn_tile  # Riichi players don't choose discard
         else:
-            drawn_tile = self.draw_next_tile() if not called else 'null_tile'
-
-
-            if drawn_tile:
-                if not called:
-                    print(f"Drew tile: {drawn_tile}")
-                    self.hands[self.current_player] = np.concatenate(
-                        (self.hands[self.current_player], [drawn_tile])
-                    )
-                    if not self.riichi_players[self.current_player]:  # Riichi players don't choose discard
-                        wait_tiles = self.check_riichi_ready(self.current_player)
-                        if len(wait_tiles) > 0 and input(f"Player {self.current_player + 1} (of {PLAYER_NAMES[self.current_player]}), declare Riichi? (y/n): ").lower() == 'y':
-                            self.declare_riichi(self.current_player, wait_tiles)
-
-
-
-                    if list(self.hands[self.current_player]).count(drawn_tile) == 4:
-                        if input(f"Player {self.current_player + 1} (of {PLAYER_NAMES[self.current_player]}), call Concealed Kan on {drawn_tile}? (y/n): ").lower() == 'y':
-                            self.perform_concealed_kan(drawn_tile)
-                            self.turn_prompt(called=False) # Turn resets
-                            self.get_next_dora()
-                            return 1
-
-                # Check for Tsumo (self-draw win)
-                if self.is_complete_hand(self.current_player):
-                    if input(f"Player {self.current_player + 1} (of {PLAYER_NAMES[self.current_player]}), call Tsumo on {drawn_tile}? (y/n): ").lower() == 'y':
-                        print(f"Player {self.current_player + 1} wins by Tsumo!")
-                        # Handle points calculation and end of round here (not implemented)
-                        return 0
-
-                while True:
-                    discard_prompt = f" (or 'd' to discard the drawn tile '{drawn_tile}')" if not called else ""
-                    discard_tile_str = input("Enter the tile to discard" + discard_prompt + ": ")
-                    if (not called) and (discard_tile_str.lower() == 'd'):
-                        discard_tile = drawn_tile
-                        discard_index = np.where(self.hands[self.current_player] == drawn_tile)[0][0]
-                        break
-                    elif discard_tile_str in self.hands[self.current_player]:
-                        discard_tile = discard_tile_str
-                        discard_index = np.where(self.hands[self.current_player] == discard_tile)[0][0]
-                        break
-                    else:
-                        print("Invalid tile. Please try again.")
-
-                self.discard_tile(self.current_player, discard_index)
-                self.print_discard_piles()
-
+            allowed = self.riichi_discards if self.declaring_riichi else None
+            discard_tile = self.agents[player].choose_discard(self, player, self.drawn_tile, allowed)
+            if discard_tile not in self.hands[player] or (allowed is not None and discard_tile & KIND_MASK not in allowed):
+                raise ValueError(f"Player {player + 1} cannot discard {tile_to_str(discard_tile)}")
+
+        self.discard_tile(player, discard_tile)
+        self.last_discard = discard_tile
+        self.phase = CALLS
+
+    def calls_phase(self):
+        discarding_player = self.current_player
+        if self.handle_ron(self.last_discard, discarding_player):
+            return  # handle_ron ended the round
+        self.pass_discard(discarding_player, self.last_discard)
+
+        if self.declaring_riichi:
+            # Riichi only stands once the declaration tile has passed without a Ron
+            self.declare_riichi(discarding_player, self.waits[discarding_player])
+            self.declaring_riichi = False
+
+        if self.four_kan_abort():
+            self.end_round("abortive_draw", reason="four_kans")
+            return
+
+        if self.handle_call(self.last_discard, discarding_player):
+            if self.rinshan_pending:
+                self.phase = DRAW  # Kan: the caller draws a replacement tile
             else:
-                print("No more tiles to draw!")
-                return 0
-
-
-        if self.handle_ron(discard_tile, self.current_player):
-            # If there was a Ron, end the round
-            return 0
-
-        if self.handle_call(discard_tile, self.current_player): # Handle calls after discarding
-            # If there was a call, skip the normal turn progression
-            self.turn_prompt(called=True)
-            return 1
-
-        self.hands[self.current_player] = self.organize_hand(self.hands[self.current_player])
-        self.current_player = (self.current_player + 1) % 4
-        return 1
+                # The caller discards next without drawing
+                self.drawn_tile = None
+                self.emit("turn", player=self.current_player)
+                self.phase = DISCARD
+        else:
+            self.phase = NEXT_PLAYER
 
     def print_discard_piles(self):
         """Prints the current state of all players' discard piles."""
 
-        print(f"\nCurrent Dora indicators: {' '.join(self.dora_indicators)}")
+        print(f"\nCurrent Dora indicators: {tiles_to_str(self.dora_indicators)}")
 
         #print("\nDiscard Piles and Open Melds:")
         for i, pile in enumerate(self.discard_piles):
@@ -439,8 +616,8 @@ class MahjongGame:
 
             if len(self.open_melds[i]) > 0 or len(self.concealed_kans[i]) > 0:
                 print("  Melds (Open & Concealed):",
-                      [" ".join(meld) for meld in self.open_melds[i]],
-                      ["(Concealed) " + " ".join(meld) for meld in self.concealed_kans[i]])
+                      [tiles_to_str(meld) for meld in self.open_melds[i]],
+                      ["(Concealed) " + tiles_to_str(meld) for meld in self.concealed_kans[i]])
         print("\nDiscard Piles:")
         for i, pile in enumerate(self.discard_piles):
             player_name = PLAYER_NAMES[i]  # Get player name
@@ -449,176 +626,193 @@ class MahjongGame:
             for r in range(row_count):
                 row_start = r * 6
                 row_end = min(row_start + 6, len(pile))
-                print(" ".join(pile[row_start:row_end]))
-
-    def start_game(self):
-        tiles = self.create_tileset()
-        walls = self.build_walls(tiles)
-        dealer_roll = random.randint(2, 12)
-        dead_wall, walls = self.determine_dead_wall(walls, dealer_roll)
-        self.dead_wall = dead_wall
+                print(tiles_to_str(pile[row_start:row_end]))
 
-        self.hands = self.deal_hands(walls)
+    def start_game(self, wall=None, dealer_roll=None):
+        """
+        Deals a new round. wall is an already shuffled sequence of the 136 tiles,
+        such as a row of dealing.shuffled_walls(); without one the tileset is shuffled here.
+        """
+        if wall is None:
+            wall = self.create_tileset()
+            self.rng.shuffle(wall)
+        if dealer_roll is None:
+            dealer_roll = self.rng.randint(2, 12)
+        self.begin_round(Wall.from_shuffled(wall, dealer_roll), dealer_roll)
+
+    def begin_round(self, wall, dealer_roll=None):
+        """
+        Deals a new round from a laid out Wall, such as one rebuilt from a game record.
+        Hands are dealt and play starts from the dealer.
+        """
+        self.reset_round()
+        self.wall = wall
+        for offset, tiles in enumerate(self.wall.deal()):
+            self.hands[(self.dealer + offset) % 4].reset(tiles)
+        for player in range(4):
+            self.refresh_player(player)
 
-        # Organize hands after dealing
-        for i in range(len(self.hands)):
-            self.hands[i] = self.organize_hand(self.hands[i])
+        self.dora_indicators.append(self.wall.dora_indicators()[0])  # First Dora indicator
+        self.reveal_tiles(self.dora_indicators)
 
-        self.dora_indicators.append(self.dead_wall[0][1])  # First Dora indicator
+        self.emit("deal", dealer_roll=dealer_roll, dealer=self.dealer, round_wind=self.round_wind,
+                  honba=self.honba, riichi_sticks=self.riichi_sticks)
+        self.phase = DRAW
 
-        print(f"Initial Dora indicator: {self.dora_indicators[-1]}")
-        for i, hand in enumerate(self.hands):
-            print(f"Player {i + 1} Hand: {' '.join(hand)}")
+    def reset_round(self):
+        """
+        Clears the last round's state in place, so one game object can deal round after
+        round. The dealer, round wind, honba and Riichi sticks are kept for the next deal.
+        """
+        if self.hands is None:
+            self.hands = [Hand() for _ in range(4)]
+        for player in range(4):
+            self.hands[player].reset()
+            self.discard_piles[player].clear()
+            self.open_melds[player].clear()
+            self.concealed_kans[player].clear()
+            self.riichi_players[player] = False
+            self.riichi_wait[player] = None
+            self.waits[player] = frozenset()
+            self.tsumogiri[player] = 0
+            self.genbutsu[player] = 0
+            self.temporary_furiten[player] = False
+        self.dora_indicators.clear()
+        visible = self.visible_counts
+        for kind in range(NUM_KINDS):
+            visible[kind] = 0
+        self.current_player = self.dealer
+        self.kan_count = 0
+        self.kan_player = None
+        self.phase = None
+        self.drawn_tile = None
+        self.last_discard = None
+        self.declaring_riichi = False
+        self.riichi_discards = []
+        self.result = None
+        self.rinshan_pending = False
+        self.drawn_rinshan = False
 
     def handle_ron(self, discarded_tile, discarding_player_index):
-        """Handles Ron opportunities for all players after a discard."""
-        for player_index in range(4):
-            if player_index != discarding_player_index:
-
-                if self.riichi_players[player_index] and discarded_tile in self.riichi_wait[player_index]:
-                    # Riichi player can only Ron on their wait tile
-                    print(f"Player {player_index + 1} wins by Ron!")
-                    return True
-                elif not self.riichi_players[player_index]:
-                    temp_hand = np.concatenate((self.hands[player_index], [discarded_tile]))
-                    if self.is_complete_hand_temp(temp_hand):  # Check if hand is complete with discarded tile
-                        if input(f"Player {player_index + 1} (of {PLAYER_NAMES[player_index]}), call Ron on {discarded_tile}? (y/n): ").lower() == 'y':
-                            print(f"Player {player_index + 1} wins by Ron!")
-                            # Handle points calculation and end of round here (not implemented)
-                            return True  # End the round
+        """
+        Handles Ron opportunities for all players after a discard. Players are asked in turn
+        order from the discarder, so of several who can Ron the first one wins (head bump).
+        """
+        for offset in range(1, 4):
+            player_index = (discarding_player_index + offset) % 4
+            if discarded_tile & KIND_MASK not in self.waits[player_index]:
+                continue  # The discard does not complete this hand
+            if self.is_furiten(player_index):
+                continue
+            score = self.score_win(player_index, discarded_tile, discarding_player_index)
+            if score is None:
+                continue  # Complete, but without a yaku
+
+            if self.riichi_players[player_index] or \
+                    self.agents[player_index].wants_ron(self, player_index, discarded_tile, discarding_player_index):
+                # Riichi players always Ron on their wait
+                self.end_round("ron", player=player_index, tile=discarded_tile,
+                               discarding_player=discarding_player_index, score=score)
+                return True  # End the round
         return False
 
     def is_complete_hand(self, player_index):
         """
         Checks if the player's hand (including open melds) forms a complete hand.
-        A complete hand consists of 4 sets (triplets or sequences) and a pair, all in the same suit.
-        """
-
-        tiles = list(self.hands[player_index])
-        melds = self.open_melds[player_index] + self.concealed_kans[player_index]
-
-        blocks = []
-        unmatched = list(tiles)  # Start with all tiles as unmatched
-
-        # Helper to remove tiles from unmatched list once in a block
-        def mark_as_matched(tile_list):
-            for tile in tile_list:
-                if tile in unmatched:
-                    unmatched.remove(tile)
-
-        # Identify triplets
-        for tile in set(tiles):  # Check unique tiles
-            count = tiles.count(tile)
-            if count >= 3:
-                blocks.append((tile, tile, tile))
-                mark_as_matched([tile] * 3)
-
-        # Identify sequences (numerical tiles only)
-        suits = ['s', 'p', 'm']
-        for suit in suits:
-            suit_tiles = sorted([int(tile[:-1]) for tile in tiles if tile.endswith(suit)])
-            i = 0
-            while i < len(suit_tiles) - 2:
-                if suit_tiles[i+1] == suit_tiles[i] + 1 and suit_tiles[i+2] == suit_tiles[i] + 2:
-                    block = [f"{num}{suit}" for num in suit_tiles[i:i+3]]
-                    blocks.append(tuple(block))
-                    mark_as_matched(block)
-                    i += 3  # Skip ahead as we found a sequence
-                else:
-                    i += 1
-
-        # Identify pairs
-        for tile in set(unmatched):  # Check remaining unmatched tiles
-            count = tiles.count(tile)
-            if count >= 2:
-                blocks.append((tile, tile))
-                mark_as_matched([tile] * 2)
-
-        return (len(blocks) + len(melds) == 5) and (len(unmatched) == 0)
+        A complete hand consists of 4 sets (triplets or sequences) and a pair, seven pairs or kokushi.
+        """
+        return is_agari(self.hands[player_index].counts)
 
     def is_complete_hand_temp(self, hand):
         """
-        Checks if the provided temporary hand (including open melds) forms a complete hand.
+        Checks if the provided temporary hand forms a complete hand together with its melds.
         This is used to check Ron possibilities without modifying the actual hand.
+        Called melds are already complete, so only the concealed counts need matching.
         """
-        tiles = list(hand)
-        melds = []
-        for i in range(4):
-            if i == self.current_player:  # Use melds from current player only for win check
-                melds.extend(self.open_melds[i] + self.concealed_kans[i])
-
-        blocks = []
-        unmatched = list(tiles)  # Start with all tiles as unmatched
-
-        # (rest of the is_complete_hand logic adapted for a temporary hand - as previously provided)
-        # Helper to remove tiles from unmatched list once in a block
-        def mark_as_matched(tile_list):
-            for tile in tile_list:
-                if tile in unmatched:
-                    unmatched.remove(tile)
-
-        # Identify triplets
-        for tile in set(tiles):  # Check unique tiles
-            count = tiles.count(tile)
-            if count >= 3:
-                blocks.append((tile, tile, tile))
-                mark_as_matched([tile] * 3)
-
-        # Identify sequences (numerical tiles only)
-        suits = ['s', 'p', 'm']
-        for suit in suits:
-            suit_tiles = sorted([int(tile[:-1]) if '*' not in tile else int(tile[:-2]) for tile in tiles if tile.endswith(suit)])
-            i = 0
-            while i < len(suit_tiles) - 2:
-                if suit_tiles[i+1] == suit_tiles[i] + 1 and suit_tiles[i+2] == suit_tiles[i] + 2:
-                    block = [f"{num}{suit}" for num in suit_tiles[i:i+3]]
-                    blocks.append(tuple(block))
-                    mark_as_matched(block)
-                    i += 3  # Skip ahead as we found a sequence
-                else:
-                    i += 1
-
-        # Identify pairs
-        for tile in set(unmatched):  # Check remaining unmatched tiles
-            count = tiles.count(tile)
-            if count >= 2:
-                blocks.append((tile, tile))
-                mark_as_matched([tile] * 2)
-
-        return (len(blocks) + len(melds) == 5) and (len(unmatched) == 0)
+        return is_agari(hand.counts)
+
+    def hand_decompositions(self, player_index):
+        """Returns every way the player's concealed tiles can be read as a winning hand."""
+        return cache.decompositions(self.hands[player_index].counts)
+
+    def called_meld_count(self, player_index):
+        """Number of sets the player has already fixed by calls or concealed Kans."""
+        return len(self.open_melds[player_index]) + len(self.concealed_kans[player_index])
+
+    def shanten(self, player_index):
+        """Returns the player's shanten number: -1 for a complete hand, 0 for tenpai."""
+        return cache.shanten(self.hands[player_index].counts, self.called_meld_count(player_index))
+
+    def ukeire(self, player_index):
+        """Returns (shanten, {tile kind: unseen copies}) for the tiles that would improve the player's hand."""
+        return cache.ukeire(self.hands[player_index].counts, self.called_meld_count(player_index), self.visible_counts)
+
+    def tenpai_waits(self, player_index):
+        """Returns the tile kinds that would complete the player's hand."""
+        return cache.tenpai_waits(self.hands[player_index].counts, self.called_meld_count(player_index))
 
     def check_riichi_ready(self, player_index):
-        """Checks if a player is one tile away from a winning hand."""
+        """
+        Returns the tile kinds the player could discard to declare Riichi while tenpai.
+        Riichi also needs a closed hand, RIICHI_MIN_TILES live tiles left and a seat
+        allowed to declare it (see can_riichi).
+        """
+        if self.open_melds[player_index]:
+            return []  # Riichi needs a closed hand
+        if self.wall.remaining < RIICHI_MIN_TILES or not self.can_riichi[player_index]:
+            return []
+
+        return cache.riichi_discards(self.hands[player_index].counts, self.called_meld_count(player_index))
+
+    def seat_wind(self, player_index):
+        """The player's seat wind, 0-3 for East-North, counted from the dealer."""
+        return (player_index - self.dealer) % 4
+
+    def score_win(self, player_index, tile, discarding_player_index=None):
+        """Scores the player's win on tile (by Ron when discarding_player_index is given); None without yaku."""
         hand = self.hands[player_index]
-        unique_tiles = set(hand)
-        wait_tiles = []
-        for tile in unique_tiles:
-            temp_hand = list(hand)  # Create a copy to test
-            temp_hand.remove(tile)
-            if self.is_complete_hand_temp(temp_hand):
-                wait_tiles.append(tile)  # Return the tile that would complete the hand
-        return wait_tiles
+        if discarding_player_index is not None:
+            hand = hand.copy()
+            hand.add(tile)
+        riichi = self.riichi_players[player_index]
+        return scoring.score_hand(
+            hand, tile, self.seat_wind(player_index), self.round_wind,
+            open_melds=self.open_melds[player_index],
+            concealed_kans=self.concealed_kans[player_index],
+            dora_indicators=self.dora_indicators,
+            ura_dora_indicators=self.wall.ura_dora_indicators()[:len(self.dora_indicators)] if riichi else (),
+            discarder_seat=None if discarding_player_index is None else self.seat_wind(discarding_player_index),
+            riichi=riichi,
+            rinshan=discarding_player_index is None and self.drawn_rinshan,
+            # A replacement tile is a rinshan win, never haitei, even when the wall is empty
+            last_tile=self.wall.remaining == 0 and not (discarding_player_index is None and self.drawn_rinshan),
+            honba=self.honba,
+        )
 
     def declare_riichi(self, player_index, wait_tiles):
-        """Declares Riichi for the given player."""
+        """Declares Riichi for the given player, who puts a stick on the table."""
         self.riichi_players[player_index] = True
         self.riichi_wait[player_index] = wait_tiles
-        print(f"Player {player_index + 1} declares Riichi!")
-
-random.seed(29)
-
-# 23 good concealed kan test
-
-# Example usage
-game = MahjongGame()
-game.start_game()
-game.hands[3] = ['1s', '2s', '3s', '5s', '5s', '5s', '6p', '6p', 'Re', 'Re', 'Re', 'So', 'So']
-for player in range(4):
-    for tile in game.drawing_order:
-        if game.can_kan(player, tile):
-            print(f"{player}: kan wait with {tile}")
-
-# Simulate turns
-while game.turn_prompt():
-    if game.is_complete_hand(game.current_player):
-        print(f"Player {game.current_player + 1} has a complete hand!")
+        self.riichi_sticks += 1
+        self.emit("riichi", player=player_index)
+
+def play(seed=None, kan_demo=False):
+    """
+    Plays an interactive round on the console. kan_demo gives the fourth player a
+    hand with Kan chances and lists them before play starts.
+    """
+    game = MahjongGame(events=console_events, rng=random.Random(seed))
+    game.start_game()
+    if kan_demo:
+        game.hands[3] = Hand(tiles_from_str(['1s', '2s', '3s', '5s', '5s', '5s', '6p', '6p', 'Re', 'Re', 'Re', 'So', 'So']))
+        game.refresh_player(3)
+        for player in range(4):
+            for tile in game.drawing_order:
+                if game.can_kan(player, tile):
+                    print(f"{player}: kan wait with {tile_to_str(tile)}")
+
+    # Simulate turns
+    while game.turn_prompt():
+        if game.is_complete_hand(game.current_player):
+            print(f"Player {game.current_player + 1} has a complete hand!")
+    return game.result
@@ -0,0 +1,170 @@
+"""
+Matches: rounds played back to back with persistent scores, from East 1 through
+South 4 for a hanchan (winds=2) or East 4 for an east-only game (winds=1).
+
+One MahjongGame is dealt round after round, and Match.reset() starts the next
+match on the same objects, so a league of matches allocates its game once.
+The table rules are kept simple:
+
+    the dealer keeps the seat (renchan) on a win or on being tenpai at an
+    exhaustive draw, and after an abortive draw
+    honba go up by one on every renchan or draw, and back to zero when a
+    non-dealer wins; each is worth 300 points on the win
+    a Riichi costs a 1000 point stick once its declaration tile passes
+    without a Ron, so only players with 1000 points can declare it; the
+    next winner takes every stick on the table, and any left at the end go
+    to the top player
+    at an exhaustive draw the noten players pay 3000 to the tenpai players
+    the match ends after the last round passes from its dealer, or as soon
+    as a score drops below zero; ties rank by seat from the first dealer
+"""
+
+import argparse
+import json
+import random
+
+from .main import MahjongGame
+from .simulator import default_agents, round_seed
+
+STARTING_POINTS = 25000
+RIICHI_STICK = 1000
+NOTEN_PAYMENT = 3000  # Shared between the players who are not tenpai at an exhaustive draw
+
+
+class Match:
+    def __init__(self, agents, events=None, rng=None, winds=2, starting_points=STARTING_POINTS):
+        """
+        agents, events and rng are those of the MahjongGame the match deals every round on.
+        winds is how many prevailing winds are played: 1 for East only, 2 for a hanchan.
+        """
+        if not 1 <= winds <= 4:
+            raise ValueError(f"A match plays 1 to 4 winds, not {winds}")
+        self.game = MahjongGame(agents, events, rng)
+        self.winds = winds
+        self.starting_points = starting_points
+        self.scores = [starting_points] * 4
+        self.reset()
+
+    def reset(self):
+        """Starts a new match with the same game, agents and settings."""
+        game = self.game
+        game.dealer = 0
+        game.round_wind = 0
+        game.honba = 0
+        game.riichi_sticks = 0
+        self.scores[:] = [self.starting_points] * 4
+        self.rounds = 0  # Rounds dealt so far
+        self.finished = False
+
+    def play_round(self, wall=None, dealer_roll=None):
+        """
+        Deals and plays the next round, settles its points and moves the match on.
+        wall and dealer_roll are passed to start_game. Returns (result, score changes by seat).
+        """
+        if self.finished:
+            raise ValueError("The match is over")
+        game = self.game
+        game.can_riichi[:] = [score >= RIICHI_STICK for score in self.scores]  # Only those who can pay the stick
+        game.start_game(wall, dealer_roll)
+        result = game.run_round()
+        self.rounds += 1
+        changes, renchan = self.settle(result)
+        self.advance(renchan, result["outcome"] in ("tsumo", "ron"))
+        return result, changes
+
+    def settle(self, result):
+        """
+        Pays out a finished round into the scores: Riichi sticks, the win or the
+        noten payments. Returns (score changes by seat, whether the dealer stays).
+        """
+        game = self.game
+        changes = [0] * 4
+        for player in range(4):
+            if game.riichi_players[player]:
+                changes[player] -= RIICHI_STICK  # The game put the stick on the table when the Riichi stood
+
+        outcome = result["outcome"]
+        if outcome in ("tsumo", "ron"):
+            score = result["score"]  # The engine only ends a round on a win with a yaku
+            winner = result["player"]
+            for player in range(4):
+                changes[player] += score.payments[game.seat_wind(player)]  # Payments are by seat wind
+            changes[winner] += game.riichi_sticks * RIICHI_STICK
+            game.riichi_sticks = 0
+            renchan = winner == game.dealer
+        elif outcome == "exhausted":
+            tenpai = [bool(game.waits[player]) for player in range(4)]
+            ready = sum(tenpai)
+            if 0 < ready < 4:
+                for player in range(4):
+                    changes[player] += NOTEN_PAYMENT // ready if tenpai[player] else -NOTEN_PAYMENT // (4 - ready)
+            renchan = tenpai[game.dealer]
+        else:
+            renchan = True  # Abortive draws are replayed
+
+        for player in range(4):
+            self.scores[player] += changes[player]
+        return changes, renchan
+
+    def advance(self, renchan, won):
+        """Moves the honba, dealer and round wind on, and ends the match when it is over."""
+        game = self.game
+        if won and not renchan:
+            game.honba = 0
+        else:
+            game.honba += 1
+        if not renchan:
+            game.dealer = (game.dealer + 1) % 4
+            if game.dealer == 0:
+                game.round_wind += 1
+        if game.round_wind >= self.winds or min(self.scores) < 0:
+            self.finished = True
+            if game.riichi_sticks:
+                self.scores[self.ranking()[0]] += game.riichi_sticks * RIICHI_STICK
+                game.riichi_sticks = 0
+
+    def play(self):
+        """Plays the match to its end and returns the final scores."""
+        while not self.finished:
+            self.play_round()
+        return self.scores[:]
+
+    def ranking(self):
+        """Seats from first place to last."""
+        return sorted(range(4), key=lambda player: (-self.scores[player], player))
+
+
+def play_matches(matches, seed=0, agent_factory=default_agents, winds=2):
+    """
+    Plays matches headless on one reused Match and returns, per seat, the mean
+    final score and mean placement (1-4) along with the mean rounds per match.
+    Match i is always seeded from (seed, i).
+    """
+    rng = random.Random()
+    match = Match(agent_factory(rng), rng=rng, winds=winds)
+    points, places, rounds = [0] * 4, [0] * 4, 0
+    for match_index in range(matches):
+        rng.seed(round_seed(seed, match_index))
+        match.reset()
+        match.play()
+        rounds += match.rounds
+        for place, player in enumerate(match.ranking()):
+            points[player] += match.scores[player]
+            places[player] += place + 1
+    played = max(matches, 1)
+    return {
+        "matches": matches,
+        "average_rounds": rounds / played,
+        "average_score": [total / played for total in points],
+        "average_place": [total / played for total in places],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play headless matches and print per-seat results.")
+    parser.add_argument("--matches", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--winds", type=int, default=2, help="1 for East only, 2 for a hanchan")
+    args = parser.parse_args()
+
+    print(json.dumps(play_matches(args.matches, args.seed, winds=args.winds), indent=2))
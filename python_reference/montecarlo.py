@@ -0,0 +1,294 @@
+"""
+Monte Carlo evaluation of discard choices: win probability and expected score.
+
+Each sample determinizes a clone of the game from the deciding player's point
+of view (the live wall, dead wall and opponents' hands are reshuffled from the
+tiles they cannot see), then plays the round out once per candidate discard
+with RolloutAgents at every seat. All candidates share the sample's
+determinization and rollout seed, so their differences are not drowned in
+sampling noise, and sample i is always seeded from (seed, i): results do not
+depend on batch sizes or the number of workers.
+
+Candidates that cannot keep the hand at its best shanten are skipped unless
+asked for, since they are almost never right and each costs a full rollout.
+A horizon cuts rollouts off after that many more draws from the wall, for
+quicker, shorter-sighted estimates.
+
+    for estimates in evaluate_stream(game, player):
+        ...  # Updated after every batch; stop whenever the time is up
+    estimates = evaluate(game, player, time_budget=0.1)
+"""
+
+import pickle
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import shanten
+from .agents import Agent
+from .main import DISCARD
+from .tiles import HONOR_START, KIND_MASK, NUM_KINDS
+
+# Per candidate kind: samples played, wins, win rate, mean points won or lost, and its standard error
+Estimate = namedtuple("Estimate", ["samples", "wins", "win_rate", "mean_points", "stderr"])
+
+_EXPIRED = object()  # A rollout cut off by the deadline
+
+
+def _sample_seed(seed, sample):
+    return (seed << 32) | sample
+
+
+class RolloutAgent(Agent):
+    """
+    A cheap default policy for rollouts: keeps tiles with neighbours and pairs, throws
+    isolated honors and terminals first, never calls, and wins and declares Riichi when it can.
+    """
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        hand = game.hands[player_index]
+        counts = hand.counts
+        best, best_value = None, None
+        for kind in (allowed if allowed is not None else range(NUM_KINDS)):
+            count = counts[kind]
+            if not count:
+                continue
+            if kind >= HONOR_START:
+                value = 4 * (count - 1)
+            else:
+                rank = kind % 9
+                value = 4 * (count - 1) + (rank != 0 and rank != 8)
+                for offset, weight in ((-2, 1), (-1, 2), (1, 2), (2, 1)):
+                    if 0 <= rank + offset < 9 and counts[kind + offset]:
+                        value += weight
+            if best_value is None or value < best_value:
+                best, best_value = kind, value
+        if drawn_tile is not None and drawn_tile & KIND_MASK == best:
+            return drawn_tile
+        return hand.find(best)
+
+
+class _FirstDiscard(RolloutAgent):
+    """A RolloutAgent whose first discard is the candidate being evaluated."""
+
+    def __init__(self, tile):
+        self.tile = tile
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        tile, self.tile = self.tile, None
+        if tile is not None:
+            return tile
+        return super().choose_discard(game, player_index, drawn_tile, allowed)
+
+
+def candidates(game, player_index, prune=True):
+    """
+    The discards to evaluate, as tiles from the player's hand (one per kind). With prune,
+    only those that keep the hand at its best shanten.
+    """
+    hand = game.hands[player_index]
+    if game.riichi_players[player_index]:
+        return [game.drawn_tile]  # The hand is locked
+    allowed = game.riichi_discards if game.declaring_riichi else None
+    kinds = [kind for kind in (allowed if allowed is not None else range(NUM_KINDS)) if hand.counts[kind]]
+    if prune and len(kinds) > 1:
+        counts = list(hand.counts)
+        melds = game.called_meld_count(player_index)
+        after = {}
+        for kind in kinds:
+            counts[kind] -= 1
+            after[kind] = shanten.shanten(counts, melds)
+            counts[kind] += 1
+        best = min(after.values())
+        kinds = [kind for kind in kinds if after[kind] == best]
+    # Prefer the drawn tile itself, so a tsumogiri keeps its own bookkeeping
+    drawn = game.drawn_tile
+    return [drawn if drawn is not None and drawn & KIND_MASK == kind else hand.find(kind) for kind in kinds]
+
+
+def _root(game, player_index):
+    """A silent copy of the decision point with RolloutAgents at every seat."""
+    if game.phase != DISCARD or game.current_player != player_index:
+        raise ValueError(f"Player {player_index + 1} is not about to discard")
+    root = game.clone()
+    if getattr(root, "profiler", None) is not None:
+        root.profiler.detach(root)  # Rollouts are not part of the profiled game
+    root.events = None
+    root.agents = [RolloutAgent() for _ in range(4)]
+    return root
+
+
+def _points(game, result, player_index):
+    score = None if result is None else result.get("score")
+    if score is None:
+        return 0  # Cut off, exhausted or aborted rounds move no points here
+    return score.payments[game.seat_wind(player_index)]
+
+
+def _won(result, player_index):
+    """True when the round ended in a scored win for the player."""
+    return result is not None and result["outcome"] in ("tsumo", "ron") and result["player"] == player_index \
+        and result.get("score") is not None
+
+
+def _roll_out(game, draw_limit, deadline=None):
+    """
+    Plays on until the round ends, or the wall's draw_limit-th tile is drawn; returns the
+    result or None. Returns _EXPIRED instead once time.monotonic() passes deadline.
+    """
+    while game.step():
+        if draw_limit is not None and game.wall.draw_index >= draw_limit:
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            return _EXPIRED
+    return game.result
+
+
+def play_samples(root, player_index, tiles, seed, start, stop, horizon=None, deadline=None):
+    """
+    Plays samples [start, stop) of every candidate tile from the root state. Returns per
+    candidate [samples, wins, points, squared points] totals. Once time.monotonic() passes
+    deadline, stops within a step and drops the sample in progress for every candidate,
+    so all candidates are still compared on the same samples.
+    """
+    totals = [[0, 0, 0, 0] for _ in tiles]
+    draw_limit = None if horizon is None else root.wall.draw_index + horizon
+    for sample in range(start, stop):
+        world = root.clone().determinize(player_index, random.Random(_sample_seed(seed, sample)))
+        outcomes = []
+        for tile in tiles:
+            if deadline is not None and time.monotonic() >= deadline:
+                return totals
+            game = world.clone()
+            game.agents = root.agents[:]
+            game.agents[player_index] = _FirstDiscard(tile)
+            result = _roll_out(game, draw_limit, deadline)
+            if result is _EXPIRED:
+                return totals
+            outcomes.append((_won(result, player_index), _points(game, result, player_index)))
+        for total, (won, points) in zip(totals, outcomes):
+            total[0] += 1
+            total[1] += won
+            total[2] += points
+            total[3] += points * points
+    return totals
+
+
+def _play_pickled(state, player_index, tiles, seed, start, stop, horizon, deadline):
+    """Worker entry point: the root state travels pickled once per batch."""
+    return play_samples(pickle.loads(state), player_index, tiles, seed, start, stop, horizon, deadline)
+
+
+def estimates(tiles, totals):
+    """Turns per-candidate totals into Estimates keyed by kind."""
+    result = {}
+    for tile, (samples, wins, points, squares) in zip(tiles, totals):
+        if samples:
+            mean = points / samples
+            variance = max(squares / samples - mean * mean, 0.0)
+            stderr = (variance / samples) ** 0.5
+            result[tile & KIND_MASK] = Estimate(samples, wins, wins / samples, mean, stderr)
+        else:
+            result[tile & KIND_MASK] = Estimate(0, 0, None, None, None)
+    return result
+
+
+def evaluate_stream(game, player_index, batch_size=4, seed=0, max_samples=None, prune=True, horizon=None,
+                    workers=None, pool=None, max_in_flight=None, deadline=None):
+    """
+    Yields {kind: Estimate} for the player's candidate discards after every batch of
+    batch_size samples, until max_samples (forever if None), deadline (a time.monotonic()
+    value) or the caller stops iterating. With workers above 1, or a ProcessPoolExecutor
+    as pool, batches are played in parallel; passing a long-lived pool saves starting
+    processes per decision. max_in_flight caps the batches submitted at once, by default
+    two per worker; with a pool of its own, pass max_in_flight or the pool's workers.
+    """
+    root = _root(game, player_index)
+    tiles = candidates(game, player_index, prune)
+    totals = [[0, 0, 0, 0] for _ in tiles]
+    if len(tiles) == 1:
+        max_samples = 0  # Nothing to choose between
+    batches = _batches(batch_size, max_samples)
+
+    def add(batch):
+        for total, more in zip(totals, batch):
+            for i, value in enumerate(more):
+                total[i] += value
+
+    def expired():
+        return deadline is not None and time.monotonic() >= deadline
+
+    if pool is None and (workers is None or workers <= 1):
+        yield estimates(tiles, totals)
+        for start, stop in batches:
+            if expired():
+                return
+            add(play_samples(root, player_index, tiles, seed, start, stop, horizon, deadline))
+            yield estimates(tiles, totals)
+        return
+
+    if max_in_flight is None:
+        if workers is None:
+            raise ValueError("Pass max_in_flight, or workers for the pool's size, along with a pool")
+        max_in_flight = 2 * workers  # Keep every worker busy with one batch queued behind it
+    elif max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    owned = pool is None
+    if owned:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    state = pickle.dumps(root, protocol=pickle.HIGHEST_PROTOCOL)
+    pending = set()
+    try:
+        yield estimates(tiles, totals)
+        for start, stop in batches:
+            if expired():
+                break
+            pending.add(pool.submit(_play_pickled, state, player_index, tiles, seed, start, stop, horizon, deadline))
+            if len(pending) < max_in_flight:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                add(future.result())
+            yield estimates(tiles, totals)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                add(future.result())
+            yield estimates(tiles, totals)
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _batches(batch_size, max_samples):
+    start = 0
+    while max_samples is None or start < max_samples:
+        stop = start + batch_size if max_samples is None else min(start + batch_size, max_samples)
+        yield start, stop
+        start = stop
+
+
+def evaluate(game, player_index, time_budget=0.1, max_samples=None, **options):
+    """
+    Streams estimates until time_budget seconds have passed (or max_samples are played)
+    and returns the last {kind: Estimate}. Rollouts stop at the deadline too, so the
+    budget is overrun by about one step of the game. Takes evaluate_stream's options.
+    """
+    deadline = time.monotonic() + time_budget
+    result = {}
+    stream = evaluate_stream(game, player_index, max_samples=max_samples, deadline=deadline, **options)
+    try:
+        for result in stream:
+            if time.monotonic() >= deadline:
+                break
+    finally:
+        stream.close()
+    return result
+
+
+def best_discard(estimates):
+    """The candidate kind with the highest expected points, win rate breaking ties."""
+    return max(estimates, key=lambda kind: (estimates[kind].mean_points or 0, estimates[kind].win_rate or 0))
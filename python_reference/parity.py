@@ -0,0 +1,232 @@
+"""
+Differential testing of the Python engine against the JS port (gameLogicHandlers.js).
+
+Round cases give both engines the same 32-bit wall seed. Each side shuffles its
+own tileset and rolls the dice with mulberry32(seed) (implemented identically
+here and in gameLogicHandlers.js), then lays out its own walls and dead wall,
+so a difference in either engine's tileset or table geometry shows up in the
+deal. The round is played here with agents that never call, and the JS engine
+replays its actions. Both sides trace the deal (hands, live wall, dead wall)
+and the state after every draw and discard (the hand, Tsumo on the drawn tile,
+Ron on the discard for every other player), and the traces are compared step
+by step. Hand cases check win detection alone on random complete and nearly
+complete hands.
+
+Cases travel in batches: each batch is one JSON document piped through one
+Node process running parity_worker.js, never one process per case.
+
+    python -m python_reference.parity --rounds 2000 --hands 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+from collections import Counter
+from itertools import zip_longest
+
+from .agari import TERMINALS_AND_HONORS, is_agari
+from .agents import RandomAgent
+from .main import DISCARD, DRAW, SELF_ACTIONS, MahjongGame
+from .simulator import round_seed
+from .tiles import FIVES, NUM_KINDS, RED, create_tileset, tile_to_str
+
+WORKER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "parity_worker.js")
+MAX_EXAMPLES = 10  # Mismatches reported in full; the rest are only counted
+
+
+def _strs(tiles):
+    return [tile_to_str(tile) for tile in tiles]
+
+
+def mulberry32(seed):
+    """Yields the 32-bit outputs of mulberry32, the PRNG both engines shuffle their walls with."""
+    state = seed & 0xFFFFFFFF
+    while True:
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = state
+        t = ((t ^ (t >> 15)) * (t | 1)) & 0xFFFFFFFF
+        t ^= (t + ((t ^ (t >> 7)) * (t | 61))) & 0xFFFFFFFF
+        yield (t ^ (t >> 14)) & 0xFFFFFFFF
+
+
+def shared_shuffle(tiles, seed):
+    """
+    Returns (tiles shuffled, dice roll) as tileSetHandler does for the same seed:
+    a Fisher-Yates shuffle from the end, then two dice, each draw taken from one output.
+    """
+    outputs = mulberry32(seed)
+    tiles = list(tiles)
+    for i in range(len(tiles) - 1, 0, -1):
+        j = next(outputs) * (i + 1) >> 32
+        tiles[i], tiles[j] = tiles[j], tiles[i]
+    dealer_roll = 2 + (next(outputs) * 6 >> 32) + (next(outputs) * 6 >> 32)
+    return tiles, dealer_roll
+
+
+def round_case(seed, case_index):
+    """
+    Plays seeded round case_index without calls. Returns (case, trace): the wall seed and
+    actions the JS engine replays, and the Python engine's trace to compare against.
+    """
+    rng = random.Random(round_seed(seed, case_index))
+    wall_seed = rng.getrandbits(32)
+    game = MahjongGame(agents=[RandomAgent(rng, call_rate=0) for _ in range(4)], rng=rng)
+    game.start_game(*shared_shuffle(create_tileset(), wall_seed))
+    wall = game.wall
+    tiles = _strs(wall.tiles)
+    case = {"type": "round", "seed": wall_seed, "actions": []}
+    trace = [{"hands": [_strs(hand.tiles()) for hand in game.hands],
+              "live": tiles[wall.draw_index:wall.live_end], "dead": tiles[wall.dead_start:]}]
+
+    running = True
+    while running:
+        phase, player = game.phase, game.current_player
+        running = game.step()
+        hand = game.hands[player]
+        if phase == DRAW and game.phase == SELF_ACTIONS:
+            case["actions"].append(["draw", player])
+            trace.append({"tile": tile_to_str(game.drawn_tile), "hand": _strs(hand.tiles()),
+                          "complete": game.is_complete_hand(player)})
+        elif phase == DISCARD:
+            tile = game.last_discard
+            case["actions"].append(["discard", player, tile_to_str(tile)])
+            ron = []
+            for other in range(4):
+                with_tile = game.hands[other].copy()
+                with_tile.add(tile)
+                ron.append(other != player and game.is_complete_hand_temp(with_tile))
+            trace.append({"hand": _strs(hand.tiles()), "ron": ron})
+    return case, trace
+
+
+def _complete_kinds(rng):
+    """Kinds of a random complete 14-tile hand: mostly sets and a pair, sometimes seven pairs or kokushi."""
+    form = rng.random()
+    if form < 0.1:
+        return [kind for kind in rng.sample(range(NUM_KINDS), 7) for _ in range(2)]
+    if form < 0.15:
+        return list(TERMINALS_AND_HONORS) + [rng.choice(TERMINALS_AND_HONORS)]
+    while True:
+        counts = [0] * NUM_KINDS
+        pair = rng.randrange(NUM_KINDS)
+        counts[pair] += 2
+        for _ in range(4):
+            if rng.random() < 0.6:
+                start = rng.randrange(3) * 9 + rng.randrange(7)
+                for kind in range(start, start + 3):
+                    counts[kind] += 1
+            else:
+                counts[rng.randrange(NUM_KINDS)] += 3
+        if max(counts) <= 4:
+            return [kind for kind, count in enumerate(counts) for _ in range(count)]
+
+
+def hand_case(seed, case_index):
+    """A random complete hand, or one with a tile swapped out half the time; returns (case, is_agari)."""
+    rng = random.Random(round_seed(seed, case_index))
+    kinds = _complete_kinds(rng)
+    if rng.random() < 0.5:
+        while True:
+            replacement = rng.randrange(NUM_KINDS)
+            if kinds.count(replacement) < 4:
+                kinds[rng.randrange(len(kinds))] = replacement
+                break
+    tiles, red = [], set()
+    for kind in kinds:
+        if kind in FIVES and kind not in red and rng.random() < 0.3:
+            red.add(kind)
+            kind |= RED
+        tiles.append(kind)
+    rng.shuffle(tiles)
+    counts = [0] * NUM_KINDS
+    for kind in kinds:
+        counts[kind] += 1
+    return {"type": "hand", "hand": _strs(tiles)}, {"complete": is_agari(counts)}
+
+
+def compare(expected, actual):
+    """The first difference between the Python and JS results of one case as (step, field, python, js), or None."""
+    if isinstance(expected, dict):
+        expected, actual = [expected], [actual]
+    for step, (mine, theirs) in enumerate(zip_longest(expected, actual)):
+        if mine is None or theirs is None or "error" in theirs:
+            return step, "trace", mine, theirs
+        for field, value in mine.items():
+            other = theirs.get(field)
+            # The engines keep hands in different orders
+            if field == "hands":
+                value = [sorted(hand) for hand in value]
+                other = [sorted(hand) for hand in other or []]
+            elif field == "hand":
+                value, other = sorted(value), sorted(other or [])
+            if value != other:
+                return step, field, value, other
+    return None
+
+
+def run_batch(cases, node="node"):
+    """Runs cases through one Node process; returns (the JS tileset, results in case order)."""
+    done = subprocess.run([node, WORKER], input=json.dumps({"cases": cases}), capture_output=True, text=True)
+    if done.returncode:
+        raise RuntimeError(f"parity_worker.js failed: {done.stderr.strip()}")
+    output = json.loads(done.stdout)
+    return output["tileset"], output["results"]
+
+
+def _cases(rounds, hands, seed):
+    """Yields (case, expected) for every round case, then every hand case."""
+    for case_index in range(rounds):
+        yield round_case(seed, case_index)
+    for case_index in range(hands):
+        yield hand_case(seed, case_index)
+
+
+def check(rounds=1000, hands=10000, seed=0, batch_size=500, node="node"):
+    """Compares both engines on every case and returns a JSON-friendly report."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    report = {"rounds": rounds, "hands": hands, "seed": seed, "batches": 0, "steps": 0,
+              "tileset_matches": None, "mismatches": 0, "examples": []}
+    python_tileset = Counter(_strs(create_tileset()))
+    cases = _cases(rounds, hands, seed)
+    case_index = 0
+    while True:
+        batch = [item for _, item in zip(range(batch_size), cases)]
+        if not batch:
+            break
+        tileset, results = run_batch([case for case, _ in batch], node)
+        report["batches"] += 1
+        if report["tileset_matches"] is None:
+            js_tileset = Counter(tileset)
+            report["tileset_matches"] = js_tileset == python_tileset
+            if js_tileset != python_tileset:
+                report["tileset_difference"] = {"js_only": sorted((js_tileset - python_tileset).elements()),
+                                                "python_only": sorted((python_tileset - js_tileset).elements())}
+        for (case, expected), actual in zip(batch, results):
+            report["steps"] += len(expected) if isinstance(expected, list) else 1
+            difference = compare(expected, actual)
+            if difference is not None:
+                report["mismatches"] += 1
+                if len(report["examples"]) < MAX_EXAMPLES:
+                    step, field, mine, theirs = difference
+                    report["examples"].append({"case": case_index, "type": case["type"], "step": step,
+                                               "field": field, "python": mine, "js": theirs})
+            case_index += 1
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Python engine and the JS port on seeded cases.")
+    parser.add_argument("--rounds", type=int, default=1000, help="Seeded rounds to replay on both engines")
+    parser.add_argument("--hands", type=int, default=10000, help="Random hands to check for a win on both engines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=500, help="Cases per Node process")
+    parser.add_argument("--node", default="node", help="Node executable")
+    args = parser.parse_args()
+
+    report = check(args.rounds, args.hands, args.seed, args.batch_size, args.node)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["mismatches"] or not report["tileset_matches"] else 0)
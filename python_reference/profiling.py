@@ -0,0 +1,255 @@
+"""
+Opt-in profiling of rounds: per-phase timers, call counters and cache hit rates.
+
+Profiler.attach(game) switches one game to ProfiledGame, a subclass whose
+phases and hot methods are timed, and wraps its agents so their decisions are
+timed too. Games that are not attached run the plain MahjongGame code and pay
+nothing. Running inside `with profiler:` also counts hits and misses of the
+process-wide win, shanten, scoring and evaluation caches.
+
+Timers are inclusive (a phase's time includes the win checks and agent
+decisions made during it). folded() gives self times per call stack in the
+folded format flame graph tools read; with trace=True every span is also kept
+as a Chrome trace event.
+
+    profiler = Profiler()
+    game = profiler.attach(MahjongGame(agents, rng=rng))
+    with profiler:
+        game.start_game()
+        game.run_round()
+    print(profiler.summary())
+"""
+
+import json
+import os
+import time
+from collections import Counter, defaultdict
+
+from . import agari, cache, scoring, shanten
+from .main import MahjongGame
+
+CACHES = ("agari", "shanten", "scoring", "evaluation")
+TRACE_LIMIT = 1000000  # Spans kept with trace=True; later spans are only summed
+
+_counting = None  # The profiler counting cache lookups, with the functions it replaced and the evaluation counts
+
+
+class Profiler:
+    def __init__(self, trace=False, trace_limit=TRACE_LIMIT):
+        self.timers = {}  # Span name -> [calls, inclusive seconds]
+        self.stacks = defaultdict(float)  # "outer;inner" span path -> self seconds
+        self.counters = Counter()
+        self.caches = {name: [0, 0] for name in CACHES}  # Cache -> [hits, misses]
+        self.trace = [] if trace else None
+        self.trace_limit = trace_limit
+        self.stack = []  # Open spans: [path, start, seconds spent in child spans]
+
+    def enter(self, name):
+        path = self.stack[-1][0] + ";" + name if self.stack else name
+        self.stack.append([path, time.perf_counter(), 0.0])
+
+    def leave(self):
+        path, start, children = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        name = path[path.rfind(";") + 1:]
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += elapsed
+        self.stacks[path] += elapsed - children
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        if self.trace is not None and len(self.trace) < self.trace_limit:
+            self.trace.append({"name": name, "ph": "X", "ts": start * 1e6, "dur": elapsed * 1e6,
+                               "pid": os.getpid(), "tid": 0})
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def attach(self, game):
+        """Profiles game from now on; returns it."""
+        if not isinstance(game, ProfiledGame):
+            game.__class__ = ProfiledGame
+        game.profiler = self
+        game.agents = [agent if isinstance(agent, TimedAgent) else TimedAgent(agent, self) for agent in game.agents]
+        return game
+
+    def detach(self, game):
+        """Returns game to the plain, unprofiled MahjongGame."""
+        game.__class__ = MahjongGame
+        del game.profiler
+        game.agents = [agent.agent if isinstance(agent, TimedAgent) else agent for agent in game.agents]
+        return game
+
+    def __enter__(self):
+        _count_caches(self)
+        return self
+
+    def __exit__(self, *exc):
+        _stop_counting(self)
+
+    def merge(self, other):
+        """Adds another profiler's results, such as one from a worker process."""
+        for name, (calls, seconds) in other.timers.items():
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+        for path, seconds in other.stacks.items():
+            self.stacks[path] += seconds
+        self.counters.update(other.counters)
+        for name, (hits, misses) in other.caches.items():
+            self.caches[name][0] += hits
+            self.caches[name][1] += misses
+        if self.trace is not None and other.trace:
+            self.trace.extend(other.trace[:self.trace_limit - len(self.trace)])
+        return self
+
+    def summary(self):
+        """Timers, counters and cache hit rates as a JSON-friendly dict."""
+        return {
+            "timers": {name: {"calls": calls, "total_ms": seconds * 1e3, "mean_us": seconds / calls * 1e6}
+                       for name, (calls, seconds) in sorted(self.timers.items(), key=lambda item: -item[1][1])},
+            "counters": dict(self.counters),
+            "caches": {name: {"hits": hits, "misses": misses,
+                              "hit_rate": hits / (hits + misses) if hits + misses else None}
+                       for name, (hits, misses) in self.caches.items()},
+        }
+
+    def folded(self):
+        """Yields "outer;inner microseconds" lines of self time per span stack."""
+        for path, seconds in sorted(self.stacks.items()):
+            yield f"{path} {round(seconds * 1e6)}"
+
+    def write_folded(self, path):
+        with open(path, "w") as file:
+            for line in self.folded():
+                file.write(line + "\n")
+
+    def write_trace(self, path):
+        """Writes the kept spans as a Chrome trace, for chrome://tracing or Perfetto."""
+        if self.trace is None:
+            raise ValueError("This profiler was not created with trace=True")
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace}, file)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["stack"] = []  # Open spans mean nothing in another process
+        return state
+
+
+class TimedAgent:
+    """Wraps an agent so every decision it makes is timed as "agent.<method>"."""
+
+    def __init__(self, agent, profiler):
+        self.agent = agent
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        attribute = getattr(self.agent, name)
+        if not callable(attribute):
+            return attribute
+        profiler, span = self.profiler, "agent." + name
+
+        def timed(*args, **kwargs):
+            profiler.enter(span)
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                profiler.leave()
+
+        setattr(self, name, timed)  # Found directly from now on
+        return timed
+
+
+def _timed(name, counter=None):
+    """Wraps the MahjongGame method name in a span, counting its calls under counter."""
+    method = getattr(MahjongGame, name)
+
+    def timed(self, *args, **kwargs):
+        profiler = self.profiler
+        if counter is not None:
+            profiler.counters[counter] += 1
+        profiler.enter(name)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profiler.leave()
+
+    timed.__name__ = name
+    timed.__doc__ = method.__doc__
+    return timed
+
+
+class ProfiledGame(MahjongGame):
+    """A MahjongGame whose phases and hot methods report to self.profiler."""
+
+    def step(self):
+        profiler = self.profiler
+        profiler.enter(self.phase)
+        try:
+            return MahjongGame.step(self)
+        finally:
+            profiler.leave()
+
+    def draw_phase(self):
+        self.profiler.counters["draws"] += 1
+        MahjongGame.draw_phase(self)
+
+    def discard_tile(self, player_index, tile):
+        self.profiler.counters["discards"] += 1
+        MahjongGame.discard_tile(self, player_index, tile)
+
+    start_game = _timed("start_game", "rounds")
+    begin_round = _timed("begin_round")
+    is_complete_hand = _timed("is_complete_hand", "win_checks")
+    check_riichi_ready = _timed("check_riichi_ready", "riichi_checks")
+    handle_ron = _timed("handle_ron", "ron_checks")
+    handle_call = _timed("handle_call", "call_checks")
+    update_waits = _timed("update_waits", "tenpai_recomputations")
+    score_win = _timed("score_win", "score_checks")
+
+
+def _count_caches(profiler):
+    """
+    Routes lookups of the win, shanten and scoring caches through counters for profiler;
+    the evaluation cache counts its own, and profiler gets the difference when counting stops.
+    """
+    global _counting
+    if _counting is not None:
+        raise ValueError("Another profiler is already counting cache lookups")
+    caches = profiler.caches
+    decompose_group, group_vector, hand_shape = agari._decompose_group, shanten.group_vector, scoring._hand_shape
+
+    def counted_decompose_group(pattern, honors):
+        caches["agari"][(pattern, honors) not in agari._group_cache] += 1
+        return decompose_group(pattern, honors)
+
+    def counted_group_vector(pattern, honors):
+        caches["shanten"][pattern not in shanten._tables[honors]] += 1
+        return group_vector(pattern, honors)
+
+    def counted_hand_shape(*args):
+        size = len(scoring._cache)
+        result = hand_shape(*args)
+        caches["scoring"][len(scoring._cache) != size] += 1  # A miss stores a new entry
+        return result
+
+    agari._decompose_group = counted_decompose_group
+    shanten.group_vector = counted_group_vector
+    scoring._hand_shape = counted_hand_shape
+    evaluations = cache.CACHE
+    _counting = (profiler, decompose_group, group_vector, hand_shape,
+                 sum(evaluations.hits.values()), sum(evaluations.misses.values()))
+
+
+def _stop_counting(profiler):
+    global _counting
+    if _counting is None or _counting[0] is not profiler:
+        return
+    _, agari._decompose_group, shanten.group_vector, scoring._hand_shape, hits, misses = _counting
+    _counting = None
+    evaluations = cache.CACHE
+    profiler.caches["evaluation"][0] += sum(evaluations.hits.values()) - hits
+    profiler.caches["evaluation"][1] += sum(evaluations.misses.values()) - misses
@@ -0,0 +1,230 @@
+"""
+Compact binary game records.
+
+A record file is HEADER followed by games back to back. Every action is one
+op byte, (action << 2) | player, followed by its operands: tiles are single
+bytes holding the tile code. A game opens with DEAL, which stores the seed,
+dice roll, dealer, round wind and all 136 wall tiles in drawing order (dead
+wall last), followed by TABLE in rounds with honba or Riichi sticks carried
+over, and closes with its result, so a full round is a few hundred bytes.
+
+Calls need no tile operands: the called tile is always the last discard.
+RecordWriter is an event sink that streams a game to disk as it is played;
+read_events() and RecordReader decode records lazily from any buffer,
+including a memory-mapped file.
+"""
+
+import mmap
+import struct
+
+from .tiles import tile_sort_key
+
+HEADER = b"MJR\x01"
+NO_SEED = (1 << 64) - 1  # Stored when the deal's seed is not known
+
+# Action codes, stored in the high six bits of an op byte
+DEAL = 0  # seed (u64), dice roll, dealer, round wind, 136 wall tiles
+DRAW = 1  # tile
+RINSHAN = 2  # tile drawn from the dead wall after a Kan
+DISCARD = 3  # tile
+PON = 4
+KAN = 5
+CHII = 6  # the two tiles taken from hand
+CONCEALED_KAN = 7  # tile
+RIICHI = 8
+DORA = 9  # indicator tile
+TSUMO = 10
+RON = 11  # discarding player
+EXHAUSTED = 12
+ABORTIVE_DRAW = 13
+TABLE = 14  # honba, Riichi sticks; follows DEAL only when either is non-zero
+
+WALL_TILES = 136
+DEAD_START = WALL_TILES - 14
+_DEAL = struct.Struct("<QBBB")
+ABORT_REASONS = ("four_kans",)
+RESULTS = ("tsumo", "ron", "exhausted", "abortive_draw")
+
+
+def op(action, player=0):
+    return (action << 2) | player
+
+
+class RecordWriter:
+    """
+    Event sink that appends each game it sees to a binary record file.
+    Set seed before start_game to store the seed the round's rng was built from.
+    """
+
+    def __init__(self, file):
+        """file is a path (appended to) or a binary file object."""
+        self.owns_file = isinstance(file, (str, bytes)) or hasattr(file, "__fspath__")
+        self.file = open(file, "ab") if self.owns_file else file
+        if self.file.tell() == 0:
+            self.file.write(HEADER)
+        self.buffer = bytearray()
+        self.seed = None
+        self.games = 0
+
+    def __call__(self, game, event, data):
+        buffer = self.buffer
+        player = data.get("player", 0)
+        if event == "deal":
+            if self.seed is not None and not 0 <= self.seed < NO_SEED:
+                raise ValueError(f"A recorded seed must be below 2**64 - 1, not {self.seed}")
+            seed = NO_SEED if self.seed is None else self.seed
+            buffer.append(op(DEAL))
+            buffer += _DEAL.pack(seed, data.get("dealer_roll", 0), game.dealer, game.round_wind)
+            buffer += bytes(game.wall.tiles)
+            if game.honba or game.riichi_sticks:
+                buffer += bytes((op(TABLE), min(game.honba, 255), min(game.riichi_sticks, 255)))
+            self.seed = None
+        elif event == "draw":
+            buffer += bytes((op(RINSHAN if data["rinshan"] else DRAW, player), data["tile"]))
+        elif event == "discard":
+            buffer += bytes((op(DISCARD, player), data["tile"]))
+        elif event == "pon":
+            buffer.append(op(PON, player))
+        elif event == "kan":
+            buffer.append(op(KAN, player))
+        elif event == "chii":
+            taken = list(data["tiles"])
+            taken.remove(data["tile"])
+            buffer += bytes([op(CHII, player)] + taken)
+        elif event == "concealed_kan":
+            buffer += bytes((op(CONCEALED_KAN, player), data["tile"]))
+        elif event == "riichi":
+            buffer.append(op(RIICHI, player))
+        elif event == "dora":
+            buffer += bytes((op(DORA), data["tile"]))
+        elif event == "tsumo":
+            buffer.append(op(TSUMO, player))
+            self.end_game()
+        elif event == "ron":
+            buffer += bytes((op(RON, player), data["discarding_player"]))
+            self.end_game()
+        elif event == "exhausted":
+            buffer.append(op(EXHAUSTED))
+            self.end_game()
+        elif event == "abortive_draw":
+            buffer += bytes((op(ABORTIVE_DRAW), ABORT_REASONS.index(data["reason"])))
+            self.end_game()
+
+    def end_game(self):
+        """Writes the finished game out in one piece."""
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.games += 1
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_events(data, offset=None):
+    """
+    Yields (event, data) pairs from a record buffer (bytes, memoryview or mmap),
+    in the same shape MahjongGame passes to event sinks. Starts after the header
+    unless offset is given.
+    """
+    if offset is None:
+        if not len(data):
+            return  # An empty file holds no games
+        if bytes(data[:len(HEADER)]) != HEADER:
+            raise ValueError("Not a game record")
+        offset = len(HEADER)
+
+    end = len(data)
+    last_draw = last_discard = last_discarder = None
+    while offset < end:
+        code = data[offset]
+        action, player = code >> 2, code & 3
+        offset += 1
+        if action == DEAL:
+            seed, dealer_roll, dealer, round_wind = _DEAL.unpack_from(data, offset)
+            offset += _DEAL.size
+            wall = bytes(data[offset:offset + WALL_TILES])
+            offset += WALL_TILES
+            honba = riichi_sticks = 0
+            if offset < end and data[offset] >> 2 == TABLE:
+                honba, riichi_sticks = data[offset + 1], data[offset + 2]
+                offset += 3
+            yield "deal", dict(seed=None if seed == NO_SEED else seed, dealer_roll=dealer_roll,
+                               dealer=dealer, round_wind=round_wind, honba=honba, riichi_sticks=riichi_sticks,
+                               wall=wall)
+        elif action in (DRAW, RINSHAN):
+            last_draw = data[offset]
+            yield "draw", dict(player=player, tile=last_draw, rinshan=action == RINSHAN)
+            offset += 1
+        elif action == DISCARD:
+            last_discard, last_discarder = data[offset], player
+            yield "discard", dict(player=player, tile=last_discard)
+            offset += 1
+        elif action in (PON, KAN):
+            yield ("pon" if action == PON else "kan"), dict(player=player, tile=last_discard, discarding_player=last_discarder)
+        elif action == CHII:
+            tiles = sorted((data[offset], data[offset + 1], last_discard), key=tile_sort_key)
+            offset += 2
+            yield "chii", dict(player=player, tiles=tiles, tile=last_discard, discarding_player=last_discarder)
+        elif action == CONCEALED_KAN:
+            yield "concealed_kan", dict(player=player, tile=data[offset])
+            offset += 1
+        elif action == RIICHI:
+            yield "riichi", dict(player=player)
+        elif action == DORA:
+            yield "dora", dict(tile=data[offset])
+            offset += 1
+        elif action == TSUMO:
+            yield "tsumo", dict(player=player, tile=last_draw)
+        elif action == RON:
+            yield "ron", dict(player=player, tile=last_discard, discarding_player=data[offset])
+            offset += 1
+        elif action == EXHAUSTED:
+            yield "exhausted", {}
+        elif action == ABORTIVE_DRAW:
+            yield "abortive_draw", dict(reason=ABORT_REASONS[data[offset]])
+            offset += 1
+        else:
+            raise ValueError(f"Unknown action {action} at byte {offset - 1}")
+
+
+class RecordReader:
+    """Reads a record file through a read-only memory map, one event or game at a time."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self.data = b""
+
+    def events(self):
+        return read_events(self.data)
+
+    def games(self):
+        """Yields each game as its list of (event, data) pairs."""
+        game = []
+        for event, data in self.events():
+            game.append((event, data))
+            if event in RESULTS:
+                yield game
+                game = []
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
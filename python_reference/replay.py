@@ -0,0 +1,145 @@
+"""
+Deterministic replay: rebuilds a MahjongGame at any point of a recorded round.
+
+A round is fully determined by its wall (or the seed that shuffled it) and
+the actions taken, so replaying applies each recorded action through the
+game's own methods instead of asking agents. Snapshots are taken every
+snapshot_interval actions, so seeking to action k replays at most that many
+actions from the nearest snapshot before k.
+"""
+
+import random
+
+from .agents import Agent
+from .main import MahjongGame, CALLS, DISCARD, DRAW, NEXT_PLAYER
+from .record import DEAD_START, RecordReader
+from .wall import DEAD_ROW, Wall
+
+# Events that change the game state; the rest ("turn", "dora", ...) follow from these
+ACTIONS = ("draw", "discard", "riichi", "pon", "kan", "chii", "concealed_kan",
+           "tsumo", "ron", "exhausted", "abortive_draw")
+
+
+def wall_from_tiles(tiles):
+    """Rebuilds a Wall from the 136 tiles a record stores: drawing order, then the dead wall."""
+    tiles = list(tiles)
+    return Wall(tiles[:DEAD_START], (tiles[DEAD_START:DEAD_START + DEAD_ROW], tiles[DEAD_START + DEAD_ROW:]))
+
+
+def apply_action(game, event, data):
+    """Applies one recorded action to the game, checking it against the wall where it can."""
+    player = data.get("player")
+    if game.phase == CALLS and event != "ron":
+        # Any action after a discard but a Ron means the discard passed
+        game.pass_discard(game.current_player, game.last_discard)
+        game.phase = NEXT_PLAYER
+    if event == "draw":
+        game.current_player = player
+        game.rinshan_pending = data["rinshan"]
+        game.draw_phase()
+        if game.drawn_tile != data["tile"]:
+            raise ValueError(f"Replay diverged: drew {game.drawn_tile}, record has {data['tile']}")
+    elif event == "discard":
+        game.current_player = player
+        game.discard_tile(player, data["tile"])
+        game.last_discard = data["tile"]
+        game.phase = CALLS
+    elif event == "riichi":
+        game.declare_riichi(player, game.waits[player])
+    elif event in ("pon", "kan", "chii"):
+        tile, discarder = data["tile"], data["discarding_player"]
+        if event == "pon":
+            game.perform_pon(player, tile, discarder)
+        elif event == "kan":
+            game.perform_kan(player, tile, discarder)
+        else:
+            game.perform_chii(player, tile, discarder, sequence=data["tiles"])
+        game.current_player = player
+        game.drawn_tile = None
+        game.phase = DRAW if game.rinshan_pending else DISCARD
+    elif event == "concealed_kan":
+        game.current_player = player
+        game.perform_concealed_kan(data["tile"])
+        game.phase = DRAW
+    elif event == "tsumo":
+        game.end_round("tsumo", player=player, tile=game.drawn_tile)
+    elif event == "ron":
+        game.end_round("ron", player=player, tile=game.last_discard, discarding_player=data["discarding_player"])
+    elif event == "exhausted":
+        game.end_round("exhausted")
+    elif event == "abortive_draw":
+        game.end_round("abortive_draw", reason=data["reason"])
+
+
+class Replay:
+    """
+    One recorded round that can be rebuilt at any action.
+
+    events are the round's (event, data) pairs, as read_events() yields them or a
+    game's event sink received them. The deal comes from wall (136 shuffled tiles),
+    else the record's own deal, else seed, which shuffles exactly as start_game
+    does with random.Random(seed).
+    """
+
+    def __init__(self, events, seed=None, wall=None, dealer_roll=None, snapshot_interval=16):
+        self.actions = [(event, data) for event, data in events if event in ACTIONS]
+        self.snapshot_interval = snapshot_interval
+        self.game = MahjongGame(agents=[Agent() for _ in range(4)])
+        deal = next((data for event, data in events if event == "deal"), {})
+        self.game.dealer = deal.get("dealer", 0)
+        self.game.round_wind = deal.get("round_wind", 0)
+        self.game.honba = deal.get("honba", 0)
+        self.game.riichi_sticks = deal.get("riichi_sticks", 0)
+
+        if wall is not None:
+            dealer_roll = dealer_roll or deal.get("dealer_roll")
+            if dealer_roll is None:
+                raise ValueError("Replaying from a shuffled wall needs its dice roll")
+            self.game.start_game(list(wall), dealer_roll)
+        elif "wall" in deal:
+            self.game.begin_round(wall_from_tiles(deal["wall"]), deal.get("dealer_roll"))
+        else:
+            if seed is None:
+                seed = deal.get("seed")
+            if seed is None:
+                raise ValueError("A replay needs a wall, a seed or a recorded deal")
+            self.game.rng = random.Random(seed)
+            self.game.start_game()
+
+        self.position = 0
+        self.snapshots = {0: self.game.snapshot()}
+
+    def __len__(self):
+        return len(self.actions)
+
+    def seek(self, step):
+        """Returns the game after the first step actions; the game is reused between calls."""
+        if not 0 <= step <= len(self.actions):
+            raise IndexError(f"Step {step} is outside 0-{len(self.actions)}")
+        nearest = step - step % self.snapshot_interval
+        while nearest not in self.snapshots:
+            nearest -= self.snapshot_interval
+        if step < self.position or nearest > self.position:
+            self.game.restore(self.snapshots[nearest])
+            self.position = nearest
+
+        while self.position < step:
+            event, data = self.actions[self.position]
+            apply_action(self.game, event, data)
+            self.position += 1
+            if self.position % self.snapshot_interval == 0 and self.position not in self.snapshots:
+                self.snapshots[self.position] = self.game.snapshot()
+        return self.game
+
+    def states(self):
+        """Yields the game after each action in turn, starting from the deal."""
+        yield self.seek(0)
+        for step in range(1, len(self.actions) + 1):
+            yield self.seek(step)
+
+
+def replays(path, snapshot_interval=16):
+    """Yields a Replay for every game in a record file."""
+    with RecordReader(path) as reader:
+        for events in reader.games():
+            yield Replay(events, snapshot_interval=snapshot_interval)
@@ -0,0 +1,131 @@
+"""
+Defensive reads: how dangerous each tile is to discard against each opponent.
+
+The game keeps the state these reads need up to date as it is played:
+game.genbutsu holds, per player, a bitmask of the kinds that cannot win off
+them (their own discards, and every discard passed since their Riichi; the
+engine's furiten rule refuses a Ron on any of them), and
+game.visible_counts counts the tiles every player can see. Every read below is
+then a few lookups and bit tests per tile, with nothing rescanned.
+
+    genbutsu   the opponent has discarded the kind (or passed it in Riichi)
+    suji       every two-sided wait on the tile is ruled out by genbutsu
+               three ranks away (1-4-7, 2-5-8, 3-6-9 within a suit)
+    kabe       all four of a neighbouring kind are seen, so waits using it are blocked
+    no-chance  every sequence wait on the tile is blocked by kabe
+"""
+
+from .tiles import HONOR_START, KIND_MASK, NUM_KINDS
+
+# Danger tiers, safest first
+GENBUTSU = 0
+NO_CHANCE = 1
+SUJI = 2
+KABE = 3
+UNSAFE = 4
+
+TIER_NAMES = ("genbutsu", "no_chance", "suji", "kabe", "unsafe")
+
+
+def _suji_partners(kind):
+    """Bitmask of the kinds three ranks away that must be genbutsu for kind to be suji."""
+    if kind >= HONOR_START:
+        return 0
+    rank = kind % 9
+    partners = 0
+    if rank >= 3:
+        partners |= 1 << (kind - 3)
+    if rank <= 5:
+        partners |= 1 << (kind + 3)
+    return partners
+
+
+def _sequence_shapes(kind):
+    """The pairs of kinds that wait on kind as part of a sequence: both sides, and the middle."""
+    if kind >= HONOR_START:
+        return ()
+    rank = kind % 9
+    shapes = []
+    if rank >= 2:
+        shapes.append((kind - 2, kind - 1))
+    if rank <= 6:
+        shapes.append((kind + 1, kind + 2))
+    if 1 <= rank <= 7:
+        shapes.append((kind - 1, kind + 1))
+    return tuple(shapes)
+
+
+SUJI_PARTNERS = tuple(_suji_partners(kind) for kind in range(NUM_KINDS))
+SEQUENCE_SHAPES = tuple(_sequence_shapes(kind) for kind in range(NUM_KINDS))
+# Same-suit neighbours of each number kind, for kabe
+NEIGHBOURS = tuple(
+    () if kind >= HONOR_START else tuple(k for k in (kind - 1, kind + 1) if k // 9 == kind // 9 and 0 <= k)
+    for kind in range(NUM_KINDS)
+)
+
+
+def seen(game, player_index, kind):
+    """Copies of kind player_index can account for: visible to all, or in their own hand."""
+    return game.visible_counts[kind] + game.hands[player_index].counts[kind]
+
+
+def is_genbutsu(game, opponent, kind):
+    return bool(game.genbutsu[opponent] >> kind & 1)
+
+
+def is_suji(game, opponent, kind):
+    """True for a number tile none of whose two-sided waits the opponent can still hold."""
+    partners = SUJI_PARTNERS[kind]
+    return partners != 0 and game.genbutsu[opponent] & partners == partners
+
+
+def is_kabe(game, player_index, kind):
+    """True when player_index can see all four of a kind next to this number tile."""
+    return any(seen(game, player_index, neighbour) == 4 for neighbour in NEIGHBOURS[kind])
+
+
+def is_no_chance(game, player_index, kind):
+    """True when no sequence can wait on this number tile, as player_index sees the tiles."""
+    if kind >= HONOR_START:
+        return False
+    counts, visible = game.hands[player_index].counts, game.visible_counts
+    return all(counts[a] + visible[a] == 4 or counts[b] + visible[b] == 4 for a, b in SEQUENCE_SHAPES[kind])
+
+
+def danger(game, player_index, opponent, tile):
+    """The danger tier of player_index discarding tile against opponent."""
+    kind = tile & KIND_MASK
+    if game.genbutsu[opponent] >> kind & 1:
+        return GENBUTSU
+    if kind >= HONOR_START:
+        # Only pairs wait on an honor: none left means no wait, one left only a single wait
+        copies = seen(game, player_index, kind)
+        return NO_CHANCE if copies == 4 else SUJI if copies == 3 else UNSAFE
+    if is_no_chance(game, player_index, kind):
+        return NO_CHANCE
+    if is_suji(game, opponent, kind):
+        return SUJI
+    if is_kabe(game, player_index, kind):
+        return KABE
+    return UNSAFE
+
+
+def threats(game, player_index):
+    """The opponents to defend against: those in Riichi, or every other player if none is."""
+    riichi = [p for p in range(4) if p != player_index and game.riichi_players[p]]
+    return riichi or [p for p in range(4) if p != player_index]
+
+
+def hand_danger(game, player_index, opponents=None):
+    """Maps each kind in player_index's hand to its worst danger tier against opponents (threats() by default)."""
+    if opponents is None:
+        opponents = threats(game, player_index)
+    counts = game.hands[player_index].counts
+    return {kind: max(danger(game, player_index, opponent, kind) for opponent in opponents)
+            for kind in range(NUM_KINDS) if counts[kind]}
+
+
+def safest_discards(game, player_index, opponents=None):
+    """player_index's kinds in hand, safest first."""
+    tiers = hand_danger(game, player_index, opponents)
+    return sorted(tiers, key=tiers.get)
@@ -0,0 +1,346 @@
+"""
+Yaku, fu and han scoring of winning hands.
+
+A win is scored by trying every decomposition of the concealed tiles and every
+way the winning tile can complete it, and keeping the highest paying reading.
+The yaku, han and fu of a hand shape do not depend on dora, so they are cached
+by (concealed counts, called melds, win tile, winds and win conditions); dora,
+red fives and ura-dora are counted on top of the cached result.
+"""
+
+from collections import Counter, namedtuple
+
+from .agari import decompositions
+from .tiles import HONOR_START, HONORS, KIND_MASK, NUM_KINDS, RED, is_terminal_or_honor
+
+# Wind kinds in seat order: East, South, West, North
+WINDS = tuple(HONOR_START + HONORS.index(name) for name in ("Ea", "So", "We", "No"))
+DRAGONS = tuple(HONOR_START + HONORS.index(name) for name in ("Gr", "Re", "Wh"))
+GREEN = frozenset([1, 2, 3, 5, 7, HONOR_START + HONORS.index("Gr")])  # 2s 3s 4s 6s 8s and Gr
+YAKUMAN_HAN = 13
+CACHE_LIMIT = 1 << 18
+
+# yaku holds (name, han) pairs, dora included. payments holds the points each seat
+# (indexed by seat wind, 0 = East) gains or loses, honba included.
+Score = namedtuple("Score", ["yaku", "han", "fu", "yakuman", "base", "payments"])
+
+_cache = {}  # Hand shape key -> (yaku, han, fu, yakuman) before dora, or None without yaku
+
+
+def dora_kind(indicator):
+    """The kind an indicator makes dora: the next number, wind or dragon in its cycle."""
+    kind = indicator & KIND_MASK
+    if kind < HONOR_START:
+        return kind - kind % 9 + (kind % 9 + 1) % 9
+    if kind in WINDS:
+        return WINDS[(WINDS.index(kind) + 1) % 4]
+    return DRAGONS[(DRAGONS.index(kind) + 1) % 3]
+
+
+def meld_shape(tiles):
+    """Returns ("chii" lowest kind | "pon" | "kan", kind) for a called meld's tile codes."""
+    kinds = sorted(tile & KIND_MASK for tile in tiles)
+    if len(kinds) == 4:
+        return "kan", kinds[0]
+    if kinds[0] == kinds[1]:
+        return "pon", kinds[0]
+    return "chii", kinds[0]
+
+
+def _wait(sequence, kind):
+    """Classifies how the winning kind completes a sequence starting at sequence."""
+    if kind == sequence + 1:
+        return "kanchan"
+    if (kind == sequence and sequence % 9 == 6) or (kind == sequence + 2 and sequence % 9 == 0):
+        return "penchan"
+    return "ryanmen"
+
+
+def _readings(counts, win_kind, tsumo):
+    """
+    Yields (form, pair, sets, wait) for every way to read the concealed tiles with the
+    winning tile in place. sets holds (kind, is_sequence, concealed) per concealed set;
+    a triplet completed by Ron counts as open for fu and concealed triplets.
+    """
+    for decomposition in decompositions(counts):
+        if decomposition.form != "standard":
+            yield decomposition.form, decomposition.pair, (), "tanki"
+            continue
+        pair, triplets, sequences = decomposition.pair, decomposition.triplets, decomposition.sequences
+        base = [(t, False, True) for t in triplets] + [(s, True, True) for s in sequences]
+        seen = set()
+        if pair == win_kind:
+            seen.add("tanki")
+            yield "standard", pair, base, "tanki"
+        for index, (kind, is_sequence, _) in enumerate(base):
+            if is_sequence:
+                if not kind <= win_kind <= kind + 2:
+                    continue
+                wait = _wait(kind, win_kind)
+                sets = base
+            else:
+                if kind != win_kind:
+                    continue
+                wait = "shanpon"
+                sets = base[:index] + [(kind, False, tsumo)] + base[index + 1:]
+            if (kind, wait) not in seen:
+                seen.add((kind, wait))
+                yield "standard", pair, sets, wait
+
+
+def _yakuman(form, pair, sets, melds, counts, all_kinds, closed):
+    """Returns the yakuman names this reading scores."""
+    names = []
+    if form == "kokushi":
+        names.append("kokushi musou")
+    triplets = [kind for kind, is_sequence, _ in sets if not is_sequence] + \
+        [kind for shape, kind, _ in melds if shape != "chii"]
+    concealed_triplets = sum(1 for _, is_sequence, concealed in sets if not is_sequence and concealed) + \
+        sum(1 for shape, _, concealed in melds if concealed)
+    if concealed_triplets == 4:
+        names.append("suuankou")
+    if all(dragon in triplets for dragon in DRAGONS):
+        names.append("daisangen")
+    wind_triplets = sum(1 for kind in triplets if kind in WINDS)
+    if wind_triplets == 4:
+        names.append("daisuushii")
+    elif wind_triplets == 3 and pair in WINDS:
+        names.append("shousuushii")
+    if all(kind >= HONOR_START for kind in all_kinds):
+        names.append("tsuuiisou")
+    if all(kind < HONOR_START and kind % 9 in (0, 8) for kind in all_kinds):
+        names.append("chinroutou")
+    if all(kind in GREEN for kind in all_kinds):
+        names.append("ryuuiisou")
+    if sum(1 for shape, _, _ in melds if shape == "kan") == 4:
+        names.append("suukantsu")
+    if closed and form == "standard" and not melds:
+        suit = all_kinds[0] // 9
+        if all_kinds[0] < HONOR_START and all(kind // 9 == suit for kind in all_kinds):
+            start = suit * 9
+            if all(counts[start + i] >= need for i, need in enumerate((3, 1, 1, 1, 1, 1, 1, 1, 3))):
+                names.append("chuuren poutou")
+    return names
+
+
+def _evaluate(form, pair, sets, wait, melds, counts, tsumo, seat_wind, round_wind, riichi, rinshan, last_tile):
+    """Scores one reading: returns (yaku, han, fu, yakuman) before dora, or None without yaku."""
+    closed = all(shape == "kan" and concealed for shape, _, concealed in melds)
+    # Every set as (kind, is_sequence, concealed, is_kan)
+    all_sets = [(kind, is_sequence, concealed, False) for kind, is_sequence, concealed in sets] + \
+        [(kind, shape == "chii", concealed, shape == "kan") for shape, kind, concealed in melds]
+    all_kinds = [kind for kind in range(NUM_KINDS) if counts[kind]] + [kind for _, kind, _ in melds] + \
+        [kind + offset for shape, kind, _ in melds if shape == "chii" for offset in (1, 2)]
+
+    yakuman = _yakuman(form, pair, sets, melds, counts, all_kinds, closed)
+    if yakuman:
+        yaku = tuple((name, YAKUMAN_HAN) for name in yakuman)
+        return yaku, YAKUMAN_HAN * len(yakuman), 0, len(yakuman)
+
+    yaku = []
+    seat_kind = WINDS[seat_wind]
+    round_kind = WINDS[round_wind]
+    value_kinds = set(DRAGONS) | {seat_kind, round_kind}
+    sequences = [kind for kind, is_sequence, _, _ in all_sets if is_sequence]
+    triplets = [kind for kind, is_sequence, _, _ in all_sets if not is_sequence]
+
+    def add(name, han_closed, han_open=None):
+        han = han_closed if closed else han_open
+        if han:
+            yaku.append((name, han))
+
+    if riichi:
+        add("riichi", 1)
+    if closed and tsumo:
+        add("menzen tsumo", 1)
+    pinfu = closed and form == "standard" and len(sequences) == 4 and pair not in value_kinds and wait == "ryanmen"
+    if pinfu:
+        add("pinfu", 1)
+    if not any(is_terminal_or_honor(kind) for kind in all_kinds):
+        add("tanyao", 1, 1)
+    for kind in triplets:
+        if kind in DRAGONS:
+            add("yakuhai " + HONORS[kind - HONOR_START], 1, 1)
+    if seat_kind in triplets:
+        add("seat wind", 1, 1)
+    if round_kind in triplets:
+        add("round wind", 1, 1)
+    if rinshan and tsumo:
+        add("rinshan kaihou", 1, 1)
+    if last_tile:
+        add("haitei" if tsumo else "houtei", 1, 1)
+
+    if form == "chiitoitsu":
+        add("chiitoitsu", 2)
+    peikou = sum(count // 2 for count in Counter(sequences).values())
+    if peikou == 2:
+        add("ryanpeikou", 3)
+    elif peikou == 1:
+        add("iipeikou", 1)
+    if any(n in sequences and n + 9 in sequences and n + 18 in sequences for n in range(7)):
+        add("sanshoku doujun", 2, 1)
+    if any(all(start + offset in sequences for offset in (0, 3, 6)) for start in (0, 9, 18)):
+        add("ittsu", 2, 1)
+    if form == "standard" and sequences:
+        groups_outside = all(is_terminal_or_honor(kind) or (is_sequence and kind % 9 in (0, 6))
+                             for kind, is_sequence, _, _ in all_sets) and is_terminal_or_honor(pair)
+        if groups_outside:
+            if any(kind >= HONOR_START for kind in all_kinds):
+                add("chanta", 2, 1)
+            else:
+                add("junchan", 3, 2)
+    if form == "standard" and not sequences:
+        add("toitoi", 2, 2)
+    concealed_triplets = sum(1 for _, is_sequence, concealed, _ in all_sets if not is_sequence and concealed)
+    if concealed_triplets == 3:
+        add("sanankou", 2, 2)
+    if any(n in triplets and n + 9 in triplets and n + 18 in triplets for n in range(9)):
+        add("sanshoku doukou", 2, 2)
+    if sum(1 for _, _, _, is_kan in all_sets if is_kan) == 3:
+        add("sankantsu", 2, 2)
+    if sum(1 for kind in triplets if kind in DRAGONS) == 2 and pair in DRAGONS:
+        add("shousangen", 2, 2)
+    if all(is_terminal_or_honor(kind) for kind in all_kinds):
+        add("honroutou", 2, 2)
+    suits = {kind // 9 for kind in all_kinds if kind < HONOR_START}
+    if len(suits) == 1:
+        if any(kind >= HONOR_START for kind in all_kinds):
+            add("honitsu", 3, 2)
+        else:
+            add("chinitsu", 6, 5)
+
+    if not yaku:
+        return None
+    han = sum(value for _, value in yaku)
+    return tuple(yaku), han, _fu(form, pair, all_sets, wait, closed, tsumo, pinfu, seat_kind, round_kind), 0
+
+
+def _fu(form, pair, all_sets, wait, closed, tsumo, pinfu, seat_kind, round_kind):
+    if form == "chiitoitsu":
+        return 25
+    if pinfu:
+        return 20 if tsumo else 30
+    fu = 20
+    if closed and not tsumo:
+        fu += 10
+    if tsumo:
+        fu += 2
+    for kind, is_sequence, concealed, is_kan in all_sets:
+        if is_sequence:
+            continue
+        value = 4 if is_terminal_or_honor(kind) else 2
+        if concealed:
+            value *= 2
+        if is_kan:
+            value *= 4
+        fu += value
+    if pair in DRAGONS:
+        fu += 2
+    fu += 2 * ((pair == seat_kind) + (pair == round_kind))
+    if wait in ("kanchan", "penchan", "tanki"):
+        fu += 2
+    if fu == 20:
+        fu = 30  # An open hand with no fu still scores 30
+    return -(-fu // 10) * 10
+
+
+def base_points(han, fu, yakuman=0):
+    """The base points of a hand, with mangan and higher limits applied."""
+    if yakuman:
+        return 8000 * yakuman
+    if han >= 13:
+        return 8000
+    if han >= 11:
+        return 6000
+    if han >= 8:
+        return 4000
+    if han >= 6:
+        return 3000
+    return min(fu * 2 ** (han + 2), 2000)
+
+
+def _round_up(points):
+    return -(-points // 100) * 100
+
+
+def payments(base, winner_seat, discarder_seat=None, honba=0):
+    """Returns each seat's point change for a win; discarder_seat is None for Tsumo."""
+    changes = [0] * 4
+    if discarder_seat is not None:
+        paid = _round_up(base * (6 if winner_seat == 0 else 4)) + 300 * honba
+        changes[discarder_seat] -= paid
+        changes[winner_seat] += paid
+        return tuple(changes)
+    for seat in range(4):
+        if seat != winner_seat:
+            paid = _round_up(base * (2 if winner_seat == 0 or seat == 0 else 1)) + 100 * honba
+            changes[seat] -= paid
+            changes[winner_seat] += paid
+    return tuple(changes)
+
+
+def _hand_shape(counts, melds, win_kind, tsumo, seat_wind, round_wind, riichi, rinshan, last_tile):
+    """Best (yaku, han, fu, yakuman) over every reading of the hand, cached by its key."""
+    key = (tuple(counts), melds, win_kind, tsumo, seat_wind, round_wind, riichi, rinshan, last_tile)
+    if key in _cache:
+        return _cache[key]
+
+    best = None
+    best_value = None
+    for form, pair, sets, wait in _readings(counts, win_kind, tsumo):
+        result = _evaluate(form, pair, sets, wait, melds, counts, tsumo,
+                           seat_wind, round_wind, riichi, rinshan, last_tile)
+        if result is None:
+            continue
+        _, han, fu, yakuman = result
+        value = (base_points(han, fu, yakuman), han, fu)
+        if best_value is None or value > best_value:
+            best, best_value = result, value
+
+    if len(_cache) >= CACHE_LIMIT:
+        _cache.clear()
+    _cache[key] = best
+    return best
+
+
+def score_hand(hand, win_tile, seat_wind, round_wind=0, open_melds=(), concealed_kans=(),
+               dora_indicators=(), ura_dora_indicators=(), discarder_seat=None,
+               riichi=False, rinshan=False, last_tile=False, honba=0):
+    """
+    Scores a winning hand. hand is the concealed Hand including the winning tile;
+    open_melds and concealed_kans are lists of tile codes as MahjongGame keeps them.
+    Winds are 0-3 for East-North; discarder_seat is the Ron victim's seat wind, None
+    for Tsumo. last_tile marks a win on the last drawable tile or its discard.
+    Returns a Score, or None if the hand is not complete or has no yaku.
+    """
+    tsumo = discarder_seat is None
+    melds = tuple(meld_shape(tiles) + (False,) for tiles in open_melds) + \
+        tuple(meld_shape(tiles) + (True,) for tiles in concealed_kans)
+    shape = _hand_shape(hand.counts, melds, win_tile & KIND_MASK, tsumo,
+                        seat_wind, round_wind, riichi, rinshan, last_tile)
+    if shape is None:
+        return None
+    yaku, han, fu, yakuman = shape
+
+    if not yakuman:
+        # Kind counts of every tile in the hand, called melds included
+        counts = list(hand.counts)
+        red = bin(hand.red).count("1")
+        for tiles in list(open_melds) + list(concealed_kans):
+            for tile in tiles:
+                counts[tile & KIND_MASK] += 1
+                red += bool(tile & RED)
+        extra = [("dora", sum(counts[dora_kind(tile)] for tile in dora_indicators)), ("aka dora", red)]
+        if riichi:
+            extra.append(("ura dora", sum(counts[dora_kind(tile)] for tile in ura_dora_indicators)))
+        extra = [(name, value) for name, value in extra if value]
+        yaku += tuple(extra)
+        han += sum(value for _, value in extra)
+
+    base = base_points(han, fu, yakuman)
+    return Score(yaku, han, fu, yakuman, base, payments(base, seat_wind, discarder_seat, honba))
+
+
+def cache_size():
+    """Number of cached hand shapes."""
+    return len(_cache)
@@ -0,0 +1,453 @@
+"""
+Asyncio multi-table server and a bundled bot client for load testing.
+
+Clients talk JSON lines over TCP or a Unix socket. Tiles are strings such as
+"5m*" or "Re".
+
+    client -> {"type": "join"}                       seat me at the next table
+    server -> {"type": "seat", "table": 3, "seat": 1}
+    server -> {"type": "event", "event": "discard", "data": {"player": 0, "tile": "3p"}}
+    server -> {"type": "decide", "id": 17, "decision": "discard", "options": {...}}
+    client -> {"type": "answer", "id": 17, "value": "3p"}
+    server -> {"type": "result", "round": 0, "data": {"outcome": "ron", ...}}
+    server -> {"type": "closed"}                     the table has played all its rounds
+    client -> {"type": "stats"}                      server replies with latency stats
+
+Decisions and their answers:
+
+    discard        {"hand", "drawn", "allowed"}   a tile from hand (in allowed, if given)
+    riichi         {"discards"}                   true / false
+    tsumo          {"tile"}                       true / false
+    ron, kan, pon, chii  {"tile", "from"}         true / false
+    chii_choice    {"tile", "sequences"}          index into sequences
+    concealed_kan  {"tile"}                       true / false
+
+Every four joining clients form a table. A missing, late (after timeout seconds)
+or invalid answer is replaced by the base Agent's choice, so a slow client never
+stalls its table. Tables wait for their clients to read what was sent, and a
+client that falls behind for timeout seconds is dropped the same way.
+
+The engine is synchronous: agents are called from inside MahjongGame.step().
+A remote seat therefore raises NeedDecision when it has no answer yet; the table
+restores the snapshot taken before the step, awaits the answer and runs the step
+again, with the seat replaying the answers it already has. Events are only sent
+once a step completes, so a retried step never sends anything twice.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import deque
+
+from .agents import Agent
+from .main import MahjongGame
+from .tiles import KIND_MASK, tile_from_str, tile_to_str
+
+LATENCY_SAMPLES = 100000
+
+
+class NeedDecision(Exception):
+    """Raised by a RemoteAgent that must wait for its client."""
+
+    def __init__(self, agent, decision, options, fallback):
+        super().__init__(decision)
+        self.agent = agent
+        self.decision = decision
+        self.options = options
+        self.fallback = fallback
+
+
+def _parse_bool(value):
+    if not isinstance(value, bool):
+        raise ValueError(f"Expected true or false, got {value!r}")
+    return value
+
+
+def _parse_index(value):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Expected an index, got {value!r}")
+    return value
+
+
+PARSERS = {
+    "discard": tile_from_str,
+    "chii_choice": _parse_index,
+}
+
+
+def parse_answer(decision, value):
+    """Converts a client's answer to the engine's value, or None if it is malformed."""
+    try:
+        return PARSERS.get(decision, _parse_bool)(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class RemoteAgent(Agent):
+    """
+    A seat played by a client. Answers collected for the current step are replayed
+    in order; the first decision without one raises NeedDecision. Answers that are
+    missing or illegal fall back to the base Agent's choice.
+    """
+
+    def __init__(self, seat):
+        self.seat = seat
+        self.answers = []
+        self.used = 0
+
+    def _ask(self, decision, fallback, valid=None, **options):
+        if self.used < len(self.answers):
+            value = self.answers[self.used]
+            self.used += 1
+            if value is None or (valid is not None and not valid(value)):
+                return fallback
+            return value
+        raise NeedDecision(self, decision, options, fallback)
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        hand = game.hands[player_index]
+        return self._ask(
+            "discard", super().choose_discard(game, player_index, drawn_tile, allowed),
+            lambda tile: tile in hand and (allowed is None or tile & KIND_MASK in allowed),
+            hand=[tile_to_str(tile) for tile in hand.tiles()],
+            drawn=None if drawn_tile is None else tile_to_str(drawn_tile),
+            allowed=None if allowed is None else [tile_to_str(kind) for kind in allowed],
+        )
+
+    def wants_riichi(self, game, player_index, riichi_discards):
+        return self._ask("riichi", True, discards=[tile_to_str(kind) for kind in riichi_discards])
+
+    def wants_tsumo(self, game, player_index, tile):
+        return self._ask("tsumo", True, tile=tile_to_str(tile))
+
+    def wants_ron(self, game, player_index, tile, discarding_player_index):
+        return self._ask("ron", True, tile=tile_to_str(tile), **{"from": discarding_player_index})
+
+    def wants_kan(self, game, player_index, tile, discarding_player_index):
+        return self._ask("kan", False, tile=tile_to_str(tile), **{"from": discarding_player_index})
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return self._ask("pon", False, tile=tile_to_str(tile), **{"from": discarding_player_index})
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return self._ask("chii", False, tile=tile_to_str(tile), **{"from": discarding_player_index})
+
+    def choose_chii(self, game, player_index, tile, sequences):
+        return self._ask(
+            "chii_choice", 0, lambda index: 0 <= index < len(sequences),
+            tile=tile_to_str(tile), sequences=[[tile_to_str(t) for t in sequence] for sequence in sequences],
+        )
+
+    def wants_concealed_kan(self, game, player_index, tile):
+        return self._ask("concealed_kan", False, tile=tile_to_str(tile))
+
+
+def _jsonable(value):
+    """Tile codes in event data become strings; scores become plain dicts."""
+    if hasattr(value, "_asdict"):
+        return {key: _jsonable(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def event_message(game, event, data, seat):
+    """The message seat receives for an event, or None if it should not see it."""
+    if event in ("turn", "complete_hand", "dora_exhausted"):
+        return None
+    if event == "deal":
+        data = dict(hand=[tile_to_str(tile) for tile in game.hands[seat].tiles()],
+                    dora=[tile_to_str(tile) for tile in game.dora_indicators],
+                    dealer=game.dealer, round_wind=game.round_wind, honba=game.honba,
+                    riichi_sticks=game.riichi_sticks)
+    elif event == "draw" and data["player"] != seat:
+        data = dict(player=data["player"], rinshan=data["rinshan"])  # Hide other players' draws
+    else:
+        data = {key: (tile_to_str(value) if key == "tile" else
+                      [tile_to_str(tile) for tile in value] if key == "tiles" else _jsonable(value))
+                for key, value in data.items()}
+    return {"type": "event", "event": event, "data": data}
+
+
+class Connection:
+    """One client socket: writes JSON lines and tracks its unanswered decisions."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}  # Decision id -> future awaiting the answer
+        self.closed = False
+
+    def send(self, message):
+        if not self.closed:
+            self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    async def drain(self, timeout):
+        """
+        Waits until the client has read enough of what was sent. A client that stays
+        that far behind for timeout seconds is dropped, so it cannot stall its table.
+        """
+        if self.closed:
+            return
+        try:
+            await asyncio.wait_for(self.writer.drain(), timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            self.close()
+            self.writer.close()
+
+    def close(self):
+        self.closed = True
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result(None)
+        self.pending.clear()
+
+
+async def play_steps(game, agents, outbox, ask, flush, latencies=None):
+    """
+    Plays a started game to the end of its round with RemoteAgents. A step that raises
+    NeedDecision is rolled back, its events dropped from outbox, and run again once
+    await ask(need) has given the seat's answer (None for the fallback). After each
+    completed step, await flush(game) sends the events in outbox. Seconds from each
+    answer to the engine's next wait are appended to latencies, if given.
+    """
+    answered_at = None
+    while True:
+        snapshot = game.snapshot()
+        for agent in agents:
+            agent.used = 0
+        try:
+            more = game.step()
+        except NeedDecision as need:
+            game.restore(snapshot)
+            outbox.clear()
+            if answered_at is not None and latencies is not None:
+                latencies.append(time.perf_counter() - answered_at)
+            value = await ask(need)
+            answered_at = time.perf_counter()
+            need.agent.answers.append(value)
+            continue
+
+        for agent in agents:
+            agent.answers.clear()
+        await flush(game)
+        if answered_at is not None:
+            if latencies is not None:
+                latencies.append(time.perf_counter() - answered_at)
+            answered_at = None
+            await asyncio.sleep(0)  # Let other tables run between decisions
+        if not more:
+            return
+
+
+class Table:
+    """Four connected seats playing rounds of MahjongGame on the event loop."""
+
+    def __init__(self, server, table_id, connections, rounds):
+        self.server = server
+        self.table_id = table_id
+        self.connections = connections
+        self.rounds = rounds
+        self.agents = [RemoteAgent(seat) for seat in range(4)]
+        self.outbox = []  # Events of the step in progress
+
+    def collect(self, game, event, data):
+        self.outbox.append((event, data))
+
+    async def flush(self, game):
+        for event, data in self.outbox:
+            for seat, connection in enumerate(self.connections):
+                message = event_message(game, event, data, seat)
+                if message is not None:
+                    connection.send(message)
+        self.outbox.clear()
+        await self.drain()
+
+    async def drain(self):
+        """Applies backpressure: waits for every seat to take in what was sent."""
+        await asyncio.gather(*(connection.drain(self.server.timeout) for connection in self.connections))
+
+    async def ask(self, need):
+        """Sends a decision to its seat's client and waits for the parsed answer."""
+        connection = self.connections[need.agent.seat]
+        if connection.closed:
+            return None
+        decision_id = next(self.server.decision_ids)
+        future = asyncio.get_running_loop().create_future()
+        connection.pending[decision_id] = future
+        connection.send({"type": "decide", "id": decision_id, "decision": need.decision, "options": need.options})
+        await connection.drain(self.server.timeout)
+        try:
+            answer = await asyncio.wait_for(future, self.server.timeout)
+        except asyncio.TimeoutError:
+            self.server.timeouts += 1
+            return None
+        finally:
+            connection.pending.pop(decision_id, None)
+        return None if answer is None else parse_answer(need.decision, answer)
+
+    async def play_round(self, round_index):
+        game = MahjongGame(agents=self.agents, events=self.collect, rng=random.Random())
+        game.start_game()
+        await self.flush(game)
+        await play_steps(game, self.agents, self.outbox, self.ask, self.flush, self.server.latencies)
+        result = {key: _jsonable(tile_to_str(value) if key == "tile" else value) for key, value in game.result.items()}
+        for connection in self.connections:
+            connection.send({"type": "result", "round": round_index, "data": result})
+        await self.drain()
+
+    async def run(self):
+        try:
+            for round_index in range(self.rounds):
+                await self.play_round(round_index)
+            self.server.tables_played += 1
+        finally:
+            for connection in self.connections:
+                connection.send({"type": "closed"})
+            self.server.tables.pop(self.table_id, None)
+        await self.drain()
+
+
+class GameServer:
+    """Seats joining clients four to a table and runs every table as a task."""
+
+    def __init__(self, rounds=1, timeout=5.0):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.lobby = []
+        self.tables = {}
+        self.table_ids = itertools.count()
+        self.decision_ids = itertools.count()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Seconds from an answer to the engine's next wait
+        self.timeouts = 0
+        self.tables_played = 0  # Tables that finished all their rounds
+
+    def stats(self):
+        samples = sorted(self.latencies)
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000 if samples else None
+
+        return {"tables_active": len(self.tables), "tables_played": self.tables_played,
+                "decisions": len(samples), "latency_p50_ms": percentile(0.5),
+                "latency_p99_ms": percentile(0.99), "timeouts": self.timeouts}
+
+    def join(self, connection):
+        self.lobby.append(connection)
+        if len(self.lobby) < 4:
+            return
+        seats, self.lobby = self.lobby[:4], self.lobby[4:]
+        table_id = next(self.table_ids)
+        table = Table(self, table_id, seats, self.rounds)
+        for seat, seated in enumerate(seats):
+            seated.send({"type": "seat", "table": table_id, "seat": seat})
+        self.tables[table_id] = asyncio.create_task(table.run())
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                kind = message.get("type")
+                if kind == "join":
+                    self.join(connection)
+                elif kind == "answer":
+                    future = connection.pending.get(message.get("id"))
+                    if future is not None and not future.done():
+                        future.set_result(message.get("value"))
+                elif kind == "stats":
+                    connection.send({"type": "stats", **self.stats()})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            connection.close()
+            if connection in self.lobby:
+                self.lobby.remove(connection)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def _open(host, port, unix_path):
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+def bot_answer(decision, options, rng):
+    """A quick local policy: tsumogiri-ish random discards, always win, sometimes call."""
+    if decision == "discard":
+        allowed = options["allowed"]
+        if options["drawn"] is not None and (allowed is None or options["drawn"].rstrip("*") in allowed):
+            if rng.random() < 0.7:
+                return options["drawn"]
+        choices = [tile for tile in options["hand"] if allowed is None or tile.rstrip("*") in allowed]
+        return rng.choice(choices)
+    if decision == "chii_choice":
+        return rng.randrange(len(options["sequences"]))
+    if decision in ("riichi", "tsumo", "ron"):
+        return True
+    return rng.random() < 0.2
+
+
+async def run_bot(host, port, unix_path, seed):
+    """Joins a table and answers every decision until the table closes; returns rounds seen."""
+    rng = random.Random(seed)
+    reader, writer = await _open(host, port, unix_path)
+    writer.write(b'{"type":"join"}\n')
+    rounds = 0
+    async for line in reader:
+        message = json.loads(line)
+        if message["type"] == "decide":
+            value = bot_answer(message["decision"], message["options"], rng)
+            writer.write(json.dumps({"type": "answer", "id": message["id"], "value": value}).encode() + b"\n")
+            await writer.drain()
+        elif message["type"] == "result":
+            rounds += 1
+        elif message["type"] == "closed":
+            break
+    writer.close()
+    return rounds
+
+
+async def load_test(tables, host="127.0.0.1", port=8765, unix_path=None):
+    """Plays tables full tables of bots against a running server and returns its stats."""
+    started = time.perf_counter()
+    rounds = await asyncio.gather(*(run_bot(host, port, unix_path, seed) for seed in range(tables * 4)))
+    elapsed = time.perf_counter() - started
+    reader, writer = await _open(host, port, unix_path)
+    writer.write(b'{"type":"stats"}\n')
+    stats = json.loads(await reader.readline())
+    writer.close()
+    stats.update(rounds=sum(rounds) // 4, seconds=elapsed)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-table Mahjong server and bot load tester.")
+    parser.add_argument("mode", choices=["serve", "bots"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Unix socket path instead of TCP")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds per table (serve)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds per decision (serve)")
+    parser.add_argument("--tables", type=int, default=10, help="Tables of bots to run (bots)")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        asyncio.run(GameServer(args.rounds, args.timeout).serve(args.host, args.port, args.unix))
+    else:
+        print(json.dumps(asyncio.run(load_test(args.tables, args.host, args.port, args.unix)), indent=2))
@@ -0,0 +1,267 @@
+"""
+Shanten and ukeire on 34-entry count vectors, backed by per-suit lookup tables.
+
+Every suit (and the honors) is summarised by a 10-entry vector: for each
+(has head, number of sets) the largest number of partial sets (pairs and
+two-sided, edge or closed waits) the group can hold alongside them. Vectors
+are memoized by the group's count pattern, can be built for every pattern up
+front with build_tables() and saved to or loaded from disk.
+"""
+
+import pickle
+
+from .agari import GROUPS, TERMINALS_AND_HONORS
+from .tiles import HONOR_START, NUM_KINDS
+
+MAX_SETS = 4
+IMPOSSIBLE = -1000  # Any negative entry is unreachable, even after adding partials
+_EMPTY = (0,) + (IMPOSSIBLE,) * (2 * (MAX_SETS + 1) - 1)
+
+# (index_a, index_b, combined index) for every pair of entries that can be merged
+_MERGES = tuple(
+    (index_a, index_b, index_a + index_b)
+    for index_a in range(len(_EMPTY))
+    for index_b in range(len(_EMPTY))
+    if index_a // (MAX_SETS + 1) + index_b // (MAX_SETS + 1) <= 1
+    and index_a % (MAX_SETS + 1) + index_b % (MAX_SETS + 1) <= MAX_SETS
+)
+
+_tables = ({}, {})  # Suit and honor vectors keyed by count pattern
+# Combined vectors keyed by the pair combined, and standard shanten keyed by the four group
+# vectors and sets needed: far fewer distinct vectors come up than distinct hands
+_combined = {}
+_standard = {}
+MEMO_LIMIT = 1 << 18
+
+
+def _shift(vector, sets, partials, head):
+    """Yields (index, partials) of vector entries after adding blocks to every decomposition."""
+    for index, value in enumerate(vector):
+        if value < 0:
+            continue
+        old_head, old_sets = divmod(index, MAX_SETS + 1)
+        if head and old_head:
+            continue
+        new_sets = old_sets + sets
+        if new_sets > MAX_SETS:
+            continue
+        yield (old_head or head) * (MAX_SETS + 1) + new_sets, value + partials
+
+
+def group_vector(pattern, honors):
+    """Returns the (head, sets) -> most partial sets vector for one group's counts."""
+    table = _tables[honors]
+    vector = table.get(pattern)
+    if vector is not None:
+        return vector
+
+    i = next((index for index, count in enumerate(pattern) if count), None)
+    if i is None:
+        table[pattern] = _EMPTY
+        return _EMPTY
+
+    best = [IMPOSSIBLE] * len(_EMPTY)
+    counts = list(pattern)
+
+    def consider(used, sets, partials, head):
+        for index in used:
+            counts[index] -= 1
+        for index, value in _shift(group_vector(tuple(counts), honors), sets, partials, head):
+            if value > best[index]:
+                best[index] = value
+        for index in used:
+            counts[index] += 1
+
+    consider((i,), 0, 0, 0)  # Leave the tile isolated
+    if counts[i] >= 2:
+        consider((i, i), 0, 1, 0)
+        consider((i, i), 0, 0, 1)
+    if counts[i] >= 3:
+        consider((i, i, i), 1, 0, 0)
+    if not honors:
+        if i + 1 < len(counts) and counts[i + 1]:
+            consider((i, i + 1), 0, 1, 0)
+            if i + 2 < len(counts) and counts[i + 2]:
+                consider((i, i + 1, i + 2), 1, 0, 0)
+        if i + 2 < len(counts) and counts[i + 2]:
+            consider((i, i + 2), 0, 1, 0)
+
+    vector = tuple(best)
+    table[pattern] = vector
+    return vector
+
+
+def _combine(a, b):
+    """Max-plus convolution of two group vectors, memoized."""
+    key = (a, b)
+    combined = _combined.get(key)
+    if combined is not None:
+        return combined
+    out = [IMPOSSIBLE] * len(_EMPTY)
+    for index_a, index_b, index in _MERGES:
+        value = a[index_a] + b[index_b]
+        if value > out[index]:
+            out[index] = value
+    if len(_combined) >= MEMO_LIMIT:
+        _combined.clear()
+    combined = _combined[key] = tuple(out)
+    return combined
+
+
+def _vector_shanten(vector, needed_sets):
+    """Best shanten a combined vector allows when needed_sets sets plus a head are required."""
+    best = 8
+    for index, partials in enumerate(vector):
+        if partials < 0:
+            continue
+        head, sets = divmod(index, MAX_SETS + 1)
+        if sets > needed_sets:
+            continue
+        value = 2 * (needed_sets - sets) - min(partials, needed_sets - sets) - head
+        if value < best:
+            best = value
+    return best
+
+
+def _group_vectors(counts):
+    return [group_vector(tuple(counts[start:start + size]), start == HONOR_START) for start, size in GROUPS]
+
+
+def standard_shanten(counts, called_melds=0):
+    """Shanten of the four sets and a head form, with called_melds sets already fixed."""
+    a, b, c, d = _group_vectors(counts)
+    key = (a, b, c, d, called_melds)
+    result = _standard.get(key)
+    if result is None:
+        result = _vector_shanten(_combine(_combine(a, b), _combine(c, d)), MAX_SETS - called_melds)
+        if len(_standard) >= MEMO_LIMIT:
+            _standard.clear()
+        _standard[key] = result
+    return result
+
+
+def chiitoitsu_shanten(counts):
+    pairs = sum(1 for count in counts if count >= 2)
+    kinds = sum(1 for count in counts if count)
+    return 6 - pairs + max(0, 7 - kinds)
+
+
+def kokushi_shanten(counts):
+    kinds = sum(1 for kind in TERMINALS_AND_HONORS if counts[kind])
+    has_pair = any(counts[kind] >= 2 for kind in TERMINALS_AND_HONORS)
+    return 13 - kinds - has_pair
+
+
+def shanten(counts, called_melds=0):
+    """
+    Returns the shanten number of the concealed counts: -1 is a complete hand,
+    0 is tenpai. Seven pairs and kokushi only count for a closed hand.
+    """
+    result = standard_shanten(counts, called_melds)
+    if called_melds == 0 and result > -1:
+        result = min(result, chiitoitsu_shanten(counts), kokushi_shanten(counts))
+    return result
+
+
+def ukeire(counts, called_melds=0, visible=None):
+    """
+    Returns (shanten, {kind: unseen copies}) for the tiles that would lower the
+    shanten of a hand waiting to draw. visible counts tiles seen outside the
+    hand (discards, melds, dora indicators).
+    """
+    needed_sets = MAX_SETS - called_melds
+    vectors = _group_vectors(counts)
+    standard = _vector_shanten(_combine(_combine(vectors[0], vectors[1]), _combine(vectors[2], vectors[3])), needed_sets)
+    closed = called_melds == 0
+    current = min(standard, chiitoitsu_shanten(counts), kokushi_shanten(counts)) if closed else standard
+
+    if closed:
+        pairs = sum(1 for count in counts if count >= 2)
+        kinds = sum(1 for count in counts if count)
+        terminal_pair = any(counts[kind] >= 2 for kind in TERMINALS_AND_HONORS)
+        kokushi = kokushi_shanten(counts)
+
+    improving = {}
+    for group, (start, size) in enumerate(GROUPS):
+        others = [vectors[g] for g in range(len(GROUPS)) if g != group]
+        rest = _combine(_combine(others[0], others[1]), others[2])
+        honors = start == HONOR_START
+        pattern = list(counts[start:start + size])
+
+        for offset in range(size):
+            held = pattern[offset]
+            if held >= 4:
+                continue
+            kind = start + offset
+
+            best = standard
+            # A tile too far from every held tile of its group cannot join a set or partial set
+            reach = 0 if honors else 2
+            if any(pattern[max(0, offset - reach):offset + reach + 1]):
+                pattern[offset] += 1
+                best = _vector_shanten(_combine(rest, group_vector(tuple(pattern), honors)), needed_sets)
+                pattern[offset] -= 1
+            if closed:
+                new_pairs = pairs + (held == 1)
+                new_kinds = kinds + (held == 0)
+                best = min(best, 6 - new_pairs + max(0, 7 - new_kinds))
+                if kind in TERMINALS_AND_HONORS:
+                    best = min(best, kokushi - (held == 0 or not terminal_pair))
+
+            if best < current:
+                unseen = 4 - held - (visible[kind] if visible is not None else 0)
+                improving[kind] = max(unseen, 0)
+    return current, improving
+
+
+def discard_options(counts, called_melds=0, visible=None):
+    """For a hand that has just drawn, maps each discardable kind to its ukeire() result."""
+    options = {}
+    counts = list(counts)
+    for kind in range(NUM_KINDS):
+        if counts[kind]:
+            counts[kind] -= 1
+            options[kind] = ukeire(counts, called_melds, visible)
+            counts[kind] += 1
+    return options
+
+
+def build_tables(max_tiles=14):
+    """Fills the lookup tables for every suit and honor pattern of up to max_tiles tiles."""
+    def patterns(length, remaining):
+        if length == 0:
+            yield ()
+            return
+        for count in range(min(4, remaining) + 1):
+            for rest in patterns(length - 1, remaining - count):
+                yield (count,) + rest
+
+    for honors, length in ((False, 9), (True, NUM_KINDS - HONOR_START)):
+        for pattern in patterns(length, max_tiles):
+            group_vector(pattern, honors)
+
+
+def save_tables(path):
+    """Writes the current lookup tables to path."""
+    with open(path, "wb") as f:
+        pickle.dump(_tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_tables(path):
+    """Merges lookup tables previously written by save_tables()."""
+    with open(path, "rb") as f:
+        suits, honors = pickle.load(f)
+    _tables[0].update(suits)
+    _tables[1].update(honors)
+
+
+def table_size():
+    """Number of memoized (suit, honor) patterns."""
+    return len(_tables[0]), len(_tables[1])
+
+
+if __name__ == "__main__":
+    import sys
+
+    build_tables()
+    save_tables(sys.argv[1] if len(sys.argv) > 1 else "shanten_tables.pkl")
@@ -0,0 +1,38 @@
+"""Hand-built tables for engine tests."""
+
+import random
+
+from ..agents import Agent
+from ..main import MahjongGame
+from ..tiles import tile_from_str, tiles_from_str
+
+NOTHING = "1s 4s 7s 1p 4p 7p 1m 4m 7m Ea So We No"  # Far from tenpai, and no pairs to call with
+
+
+class CallingAgent(Agent):
+    """Calls Pon and Chii whenever it can."""
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return True
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return True
+
+
+def table(hands, agents=None, seed=0):
+    """A dealt game with the given hands (tile strings by seat; the rest get NOTHING)."""
+    game = MahjongGame(agents=agents or [Agent() for _ in range(4)], rng=random.Random(seed))
+    game.start_game()
+    for player in range(4):
+        game.hands[player].reset(tiles_from_str(hands.get(player, NOTHING).split()))
+        game.refresh_player(player)
+    return game
+
+
+def discard(game, player, text):
+    """Puts tile text in player's discard pile as their last discard, as if just thrown."""
+    tile = tile_from_str(text)
+    game.current_player = player
+    game.discard_piles[player].append(tile)
+    game.last_discard = tile
+    return tile
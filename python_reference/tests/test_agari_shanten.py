@@ -0,0 +1,242 @@
+"""Win detection, shanten and waits against brute-force searches over every set and pair."""
+
+import random
+
+import pytest
+
+from .. import cache, shanten
+from ..agari import TERMINALS_AND_HONORS, decompositions, is_agari
+from ..tiles import HONOR_START, NUM_KINDS
+
+SETS = [(kind,) * 3 for kind in range(NUM_KINDS)] + \
+    [(kind, kind + 1, kind + 2) for suit in range(3) for kind in range(suit * 9, suit * 9 + 7)]
+
+
+def brute_standard(counts):
+    """True if counts split into a pair and sets, trying every pair and every set that fits."""
+    def sets_from(start, left):
+        if left == 0:
+            return True
+        for index in range(start, len(SETS)):
+            tiles = SETS[index]
+            for kind in tiles:
+                counts[kind] -= 1
+            fits = all(counts[kind] >= 0 for kind in tiles) and sets_from(index, left - 3)
+            for kind in tiles:
+                counts[kind] += 1
+            if fits:
+                return True
+        return False
+
+    counts = list(counts)
+    size = sum(counts)
+    if size % 3 != 2:
+        return False
+    for pair in range(NUM_KINDS):
+        if counts[pair] >= 2:
+            counts[pair] -= 2
+            found = sets_from(0, size - 2)
+            counts[pair] += 2
+            if found:
+                return True
+    return False
+
+
+def brute_agari(counts):
+    if brute_standard(counts):
+        return True
+    if sum(counts) != 14:
+        return False
+    return all(count in (0, 2) for count in counts) or \
+        all(counts[kind] for kind in TERMINALS_AND_HONORS) and sum(counts[kind] for kind in TERMINALS_AND_HONORS) == 14
+
+
+def brute_standard_shanten(counts, called_melds):
+    """
+    size - the most tiles the hand shares with any complete hand of a pair and 4 - called_melds
+    sets: that many tiles must be drawn to complete it, less the one that wins.
+    """
+    size = sum(counts)
+    remaining = list(counts)
+    used = [0] * NUM_KINDS
+    best = 0
+
+    def take(tiles):
+        """Adds tiles to the complete hand; returns those the hand shares."""
+        shared = []
+        for kind in tiles:
+            used[kind] += 1
+            if remaining[kind]:
+                remaining[kind] -= 1
+                shared.append(kind)
+        return shared
+
+    def give_back(tiles, shared):
+        for kind in tiles:
+            used[kind] -= 1
+        for kind in shared:
+            remaining[kind] += 1
+
+    def search(start, left, shared):
+        nonlocal best
+        best = max(best, shared)  # Sets still to choose can use tiles the hand does not hold
+        if left == 0 or shared + min(3 * left, sum(remaining)) <= best:
+            return
+        for index in range(start, len(SETS)):
+            tiles = SETS[index]
+            gain = take(tiles)
+            if gain and all(used[kind] <= 4 for kind in tiles):
+                search(index, left - 1, shared + len(gain))
+            give_back(tiles, gain)
+
+    for pair in range(NUM_KINDS):
+        if counts[pair]:
+            gain = take((pair, pair))
+            search(0, 4 - called_melds, len(gain))
+            give_back((pair, pair), gain)
+    search(0, 4 - called_melds, 0)  # A pair the hand holds none of
+    return size - best
+
+
+def brute_shanten(counts, called_melds=0):
+    result = brute_standard_shanten(counts, called_melds)
+    if called_melds == 0:
+        pairs = sorted((min(count, 2) for count in counts), reverse=True)
+        result = min(result, 13 - sum(pairs[:7]))  # Seven distinct pairs
+        kokushi = sum(min(counts[kind], 1) for kind in TERMINALS_AND_HONORS)
+        kokushi += any(counts[kind] >= 2 for kind in TERMINALS_AND_HONORS)
+        result = min(result, 13 - kokushi)
+    return result
+
+
+def brute_waits(counts):
+    waits = []
+    for kind in range(NUM_KINDS):
+        if counts[kind] < 4:
+            counts[kind] += 1
+            if brute_agari(counts):
+                waits.append(kind)
+            counts[kind] -= 1
+    return waits
+
+
+def random_counts(rng, size, kinds=range(NUM_KINDS)):
+    """A random hand of size tiles drawn from the given kinds, four copies each."""
+    pool = [kind for kind in kinds for _ in range(4)]
+    counts = [0] * NUM_KINDS
+    for kind in rng.sample(pool, size):
+        counts[kind] += 1
+    return counts
+
+
+def complete_counts(rng, called_melds=0):
+    """A random complete hand: a pair and 4 - called_melds sets."""
+    while True:
+        counts = [0] * NUM_KINDS
+        counts[rng.randrange(NUM_KINDS)] += 2
+        for _ in range(4 - called_melds):
+            for kind in rng.choice(SETS):
+                counts[kind] += 1
+        if max(counts) <= 4:
+            return counts
+
+
+def hands(seed, number):
+    """Mixed test hands: random, one suit with honors (rich in waits), and nearly complete."""
+    rng = random.Random(seed)
+    one_suit = list(range(9)) + list(range(HONOR_START, HONOR_START + 2))
+    for index in range(number):
+        called_melds = rng.choice((0, 0, 0, 1, 2, 3))
+        size = 13 - 3 * called_melds
+        shape = index % 3
+        if shape == 0:
+            counts = random_counts(rng, size)
+        elif shape == 1:
+            counts = random_counts(rng, size, one_suit)
+        else:
+            counts = complete_counts(rng, called_melds)
+            counts[rng.choice([kind for kind in range(NUM_KINDS) if counts[kind]])] -= 1
+        yield counts, called_melds
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_is_agari_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for index in range(300):
+        called_melds = rng.choice((0, 0, 1, 3))
+        counts = complete_counts(rng, called_melds)
+        if index % 2:
+            kind = rng.choice([kind for kind in range(NUM_KINDS) if counts[kind]])
+            counts[kind] -= 1
+            counts[rng.choice([kind for kind in range(NUM_KINDS) if counts[kind] < 4])] += 1
+        assert is_agari(counts) == brute_agari(counts), counts
+
+
+def test_is_agari_special_forms():
+    seven_pairs = [0] * NUM_KINDS
+    for kind in (0, 4, 9, 13, 20, 27, 33):
+        seven_pairs[kind] = 2
+    assert is_agari(seven_pairs)
+    seven_pairs[0], seven_pairs[4] = 4, 0  # Four of a kind is not two pairs
+    assert not is_agari(seven_pairs)
+
+    kokushi = [0] * NUM_KINDS
+    for kind in TERMINALS_AND_HONORS:
+        kokushi[kind] = 1
+    kokushi[0] += 1
+    assert is_agari(kokushi)
+
+
+def test_decompositions_rebuild_the_hand():
+    rng = random.Random(7)
+    for _ in range(200):
+        counts = complete_counts(rng)
+        readings = decompositions(counts)
+        assert readings
+        for form, pair, triplets, sequences in readings:
+            if form != "standard":
+                continue
+            rebuilt = [0] * NUM_KINDS
+            rebuilt[pair] += 2
+            for kind in triplets:
+                rebuilt[kind] += 3
+            for kind in sequences:
+                for offset in range(3):
+                    rebuilt[kind + offset] += 1
+            assert rebuilt == counts
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_shanten_matches_brute_force(seed):
+    for counts, called_melds in hands(seed, 60):
+        expected = brute_shanten(counts, called_melds)
+        assert shanten.shanten(counts, called_melds) == expected, (counts, called_melds)
+        assert cache.shanten(counts, called_melds) == expected, (counts, called_melds)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_waits_match_brute_force(seed):
+    for counts, called_melds in hands(100 + seed, 150):
+        expected = brute_waits(counts)
+        assert cache.tenpai_waits(counts, called_melds) == expected, (counts, called_melds)
+        assert (shanten.shanten(counts, called_melds) == 0) == bool(expected)
+
+
+def test_ukeire_counts_unseen_improving_tiles():
+    rng = random.Random(11)
+    for counts, called_melds in hands(200, 60):
+        current, improving = shanten.ukeire(counts, called_melds)
+        assert current == brute_shanten(counts, called_melds)
+        for kind in range(NUM_KINDS):
+            if counts[kind] == 4:
+                assert kind not in improving
+                continue
+            counts[kind] += 1
+            better = shanten.shanten(counts, called_melds) < current  # At tenpai, a win is -1
+            counts[kind] -= 1
+            assert (kind in improving) == better, (counts, kind)
+            if better:
+                assert improving[kind] == 4 - counts[kind]
+        visible = [rng.randrange(5 - count) for count in counts]
+        _, seen = cache.ukeire(counts, called_melds, visible)
+        assert seen == {kind: 4 - counts[kind] - visible[kind] for kind in improving}
@@ -0,0 +1,100 @@
+"""The evaluation cache: canonical keys, results against the uncached evaluations, LRU eviction and save/load."""
+
+import random
+from itertools import permutations
+
+import pytest
+
+from .. import cache, shanten
+from ..agari import decompositions
+from ..cache import EvaluationCache, canonical, canonical_counts
+from ..tiles import HONOR_START, NUM_KINDS
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """An empty CACHE for the test, so hits and misses are its own."""
+    monkeypatch.setattr(cache, "CACHE", EvaluationCache())
+    return cache.CACHE
+
+
+def random_counts(rng, size):
+    counts = [0] * NUM_KINDS
+    for kind in rng.sample([kind for kind in range(NUM_KINDS) for _ in range(4)], size):
+        counts[kind] += 1
+    return counts
+
+
+def relabel(counts, suits, honors):
+    """counts with suit s moved to suits[s] and honor h moved to honors[h]."""
+    moved = [0] * NUM_KINDS
+    for kind, count in enumerate(counts):
+        if kind < HONOR_START:
+            moved[suits[kind // 9] * 9 + kind % 9] = count
+        else:
+            moved[HONOR_START + honors[kind - HONOR_START]] = count
+    return moved
+
+
+def test_key_is_the_same_for_every_relabelling_of_a_hand():
+    rng = random.Random(0)
+    for _ in range(50):
+        counts = random_counts(rng, rng.choice((13, 14)))
+        key, kinds = canonical(counts)
+        assert [counts[kind] for kind in kinds] == canonical_counts(key)
+        for suits in permutations(range(3)):
+            honors = list(range(NUM_KINDS - HONOR_START))
+            rng.shuffle(honors)
+            assert canonical(relabel(counts, suits, honors))[0] == key
+
+
+def test_cached_evaluations_equal_the_uncached_ones(fresh):
+    rng = random.Random(1)
+    for _ in range(200):
+        called_melds = rng.choice((0, 0, 1, 2))
+        counts = random_counts(rng, 13 - 3 * called_melds)
+        visible = random_counts(rng, 20)
+        visible = [min(seen, 4 - held) for seen, held in zip(visible, counts)]
+        expected = shanten.shanten(counts, called_melds)
+        for _ in range(2):  # A miss, then a hit
+            assert cache.shanten(counts, called_melds) == expected
+            assert cache.ukeire(counts, called_melds, visible) == shanten.ukeire(counts, called_melds, visible)
+            assert cache.tenpai_waits(counts, called_melds) == \
+                (sorted(shanten.ukeire(counts, called_melds)[1]) if expected == 0 else [])
+        drawn = list(counts)
+        drawn[rng.choice([kind for kind in range(NUM_KINDS) if drawn[kind] < 4])] += 1
+        assert cache.riichi_discards(drawn, called_melds) == \
+            [kind for kind in range(NUM_KINDS) if drawn[kind]
+             and shanten.shanten([held - (k == kind) for k, held in enumerate(drawn)], called_melds) == 0]
+        if called_melds == 0:
+            assert sorted(cache.decompositions(drawn)) == sorted(decompositions(drawn))
+    stats = fresh.stats()["evaluations"]
+    assert stats["shanten"]["hits"] >= 200 and stats["ukeire"]["hits"] >= 200
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    lru = EvaluationCache(capacity=2)
+    lru.put(("a", 1), 1)
+    lru.put(("b", 2), 2)
+    assert lru.get(("a", 1)) == 1  # Now more recent than b
+    lru.put(("c", 3), 3)
+    assert list(lru.entries) == [("a", 1), ("c", 3)]
+    assert lru.get(("b", 2)) is cache._MISSING
+    assert lru.stats()["evaluations"]["b"] == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+
+def test_save_and_load_round_trip(fresh, tmp_path):
+    rng = random.Random(2)
+    hands = [random_counts(rng, 13) for _ in range(30)]
+    for counts in hands:
+        cache.ukeire(counts)
+    path = tmp_path / "evaluations.pickle"
+    fresh.save(path)
+
+    loaded = EvaluationCache()
+    loaded.load(path)
+    assert list(loaded.entries.items()) == list(fresh.entries.items())
+    small = EvaluationCache(capacity=10)
+    small.put(("held", 0), 0)
+    small.load(path)
+    assert len(small.entries) == 10 and next(reversed(small.entries)) == ("held", 0)  # Held entries count as newer
@@ -0,0 +1,55 @@
+"""The incremental call index against a full scan of the hand, through seeded rounds with calls."""
+
+import random
+
+import pytest
+
+from ..agents import RandomAgent, ShantenAgent
+from ..calls import CallIndex
+from ..main import MahjongGame
+from ..tiles import HONOR_START, KIND_MASK, NUM_KINDS
+
+
+def scan(kinds, kind):
+    """Pon, Kan and Chii on a discard of kind, checked from the hand's kinds as the engine once did."""
+    count = kinds.count(kind)
+    chii = set()
+    if kind < HONOR_START:
+        for start in range(kind - 2, kind + 1):
+            if start < 0 or start // 9 != kind // 9 or start % 9 > 6:
+                continue  # Sequences stay within one suit
+            others = tuple(k for k in range(start, start + 3) if k != kind)
+            if all(k in kinds for k in others):
+                chii.add(others)
+    return count >= 2, count >= 3, chii
+
+
+def check(index, hand):
+    kinds = [tile & KIND_MASK for tile in hand.tiles()]
+    for kind in range(NUM_KINDS):
+        pon, kan, chii = scan(kinds, kind)
+        assert (index.can_pon(kind), index.can_kan(kind)) == (pon, kan), kind
+        assert set(index.chii[kind]) == chii and len(index.chii[kind]) == len(chii), kind
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_call_index_matches_a_scan_of_the_hand(seed):
+    calls = 0
+    for round_index in range(5):
+        rng = random.Random(seed * 100 + round_index)
+        agents = [RandomAgent(rng, 1.0), ShantenAgent(open_hand=True), RandomAgent(rng, 0.5),
+                  ShantenAgent(open_hand=True)]
+        game = MahjongGame(agents=agents, rng=rng)
+        game.start_game()
+        checked = [None] * 4  # The counts each player's index was last checked at
+        running = True
+        while running:
+            running = game.step()
+            for player in range(4):
+                hand = game.hands[player]
+                if hand.counts != checked[player]:
+                    check(game.call_index[player], hand)
+                    checked[player] = hand.counts[:]
+            calls += sum(len(melds) for melds in game.open_melds)
+        check(CallIndex(game.hands[0].counts), game.hands[0])  # Built in one go
+    assert calls  # Calls changed hands along the way
@@ -0,0 +1,25 @@
+"""Batched dealing against the scalar Wall, row by row."""
+
+import numpy as np
+import pytest
+
+from ..dealing import deal_batch, deal_wall, roll_dice, shuffled_walls
+from ..tiles import Hand
+from ..wall import Wall
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_every_row_deals_as_the_scalar_wall_does(seed):
+    rng = np.random.default_rng(seed)
+    walls = shuffled_walls(16, rng)
+    rolls = roll_dice(16, rng)
+    deal = deal_batch(walls, rolls)
+    for row, roll in enumerate(rolls):
+        wall = Wall.from_shuffled(walls[row].tolist(), int(roll))
+        hands = wall.deal()
+        assert deal.hands[row].tolist() == hands
+        assert deal.hand_counts[row].tolist() == [Hand(hand).counts for hand in hands]
+        assert deal.dead_walls[row].tolist() == wall.dead_wall()
+        assert deal.draw_orders[row].tolist() == wall.live_tiles()
+        single = deal_wall(walls[row], int(roll))
+        assert [part.tolist() for part in single] == [hands, wall.dead_wall(), wall.live_tiles()]
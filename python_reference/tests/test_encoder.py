@@ -0,0 +1,76 @@
+"""Observation vectors of a hand-built table, read back field by field."""
+
+import numpy as np
+
+from ..encoder import LAYOUT, MAX_DISCARDS, MAX_MELDS, OBS_SIZE, encode, encode_seats
+from ..tiles import NUM_KINDS, tile_from_str, tiles_from_str
+from .tables import table
+
+OBSERVER = 1
+
+
+def tiles(text):
+    return tiles_from_str(text.split())
+
+
+def field(row, name):
+    return row[LAYOUT[name]]
+
+
+def built():
+    """Seat 2 has discarded 3p then a drawn red 5m and declared Riichi, seat 3 has a 4s Pon, seat 0 an East Kan."""
+    game = table({1: "1s 2s 3s 5p* 5p 7p 1m 4m 7m Ea So We No"})
+    game.dealer = 3
+    game.current_player = 2
+    game.discard_piles[2][:] = tiles("3p 5m*")
+    game.tsumogiri[2] = 0b10
+    game.riichi_players[2] = True
+    game.open_melds[3][:] = [tiles("4s 4s 4s")]
+    game.concealed_kans[0][:] = [tiles("Ea Ea Ea Ea")]
+    game.kan_count = 1
+    game.dora_indicators = tiles("9m Ea")
+    game.visible_counts[:] = [0] * NUM_KINDS
+    game.visible_counts[tile_from_str("4s")] = 3
+    return game
+
+
+def test_fields_land_at_their_offsets_relative_to_the_observer():
+    game = built()
+    row = encode_seats([game], [OBSERVER])[0]
+    assert row.shape == (OBS_SIZE,)
+
+    hand = np.zeros(NUM_KINDS)
+    for kind in tiles("1s 2s 3s 5p 5p 7p 1m 4m 7m Ea So We No"):
+        hand[kind] += 1
+    assert (field(row, "hand") == hand).all()
+    assert field(row, "hand_red").tolist() == [0, 1, 0]
+    assert field(row, "visible")[tile_from_str("4s")] == 3 and field(row, "visible").sum() == 3
+
+    across = slice(MAX_DISCARDS, 2 * MAX_DISCARDS)  # Seat 2 is to the observer's right
+    assert field(row, "discard_kinds")[across][:3].tolist() == [tile_from_str("3p") + 1, tile_from_str("5m") + 1, 0]
+    assert field(row, "discard_tsumogiri")[across][:2].tolist() == [0, 1]
+    assert field(row, "discard_red")[across][:2].tolist() == [0, 1]
+    assert field(row, "discard_kinds").sum() == field(row, "discard_kinds")[across].sum()
+
+    melds = [(field(row, "meld_types")[seat * MAX_MELDS], field(row, "meld_kinds")[seat * MAX_MELDS])
+             for seat in range(4)]
+    assert melds == [(0, 0), (0, 0), (2, tile_from_str("4s") + 1), (4, tile_from_str("Ea") + 1)]
+    assert field(row, "dora")[:3].tolist() == [tile_from_str("9m") + 1, tile_from_str("Ea") + 1, 0]
+    assert field(row, "riichi").tolist() == [0, 1, 0, 0]
+    assert field(row, "scalars").tolist() == [game.wall.remaining, 2, game.round_wind, 2, 1, 1]
+
+
+def test_other_players_concealed_hands_do_not_leak():
+    game = built()
+    row = encode_seats([game], [OBSERVER])[0].copy()
+    for other in (0, 2, 3):
+        game.hands[other].reset(tiles("5s* 5p* 5m* Wh Wh Wh Gr Gr Gr Re Re Re No"))
+    assert (encode_seats([game], [OBSERVER])[0] == row).all()
+
+
+def test_encode_gives_every_seat_its_own_row():
+    game = built()
+    out = encode([game, game])
+    assert out.shape == (2, 4, OBS_SIZE)
+    assert (out[1, OBSERVER] == encode_seats([game], [OBSERVER])[0]).all()
+    assert field(out[0, 2], "riichi").tolist() == [1, 0, 0, 0]  # Seat 2 sees its own Riichi at relative seat 0
@@ -0,0 +1,145 @@
+"""Engine rules on hand-built tables."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from ..agents import RandomAgent
+from ..calls import CallIndex
+from ..main import MahjongGame
+from ..tiles import tile_from_str
+from ..wall import DEAD_ROW, RINSHAN_SLOTS
+from .tables import CallingAgent, discard, table
+
+
+def test_ron_goes_to_the_first_claimant_in_turn_order():
+    hands = {1: "2s 3s 4s 3p 4p 6m 7m 8m 2m 3m 4m 6s 6s",  # Waits on 2p and 5p
+             3: "3s 4s 5s 5p 5p 6m 7m 8m 3m 4m 5m 7s 7s"}  # Waits on 5p and 7s
+    for discarder, winner in ((2, 3), (0, 1)):
+        game = table(hands)
+        tile = discard(game, discarder, "5p")
+        assert game.handle_ron(tile, discarder)
+        assert (game.result["player"], game.result["discarding_player"]) == (winner, discarder)
+
+
+def test_pon_beats_chii_whatever_the_seats():
+    hands = {1: "2s 3s 1p 4p 7p 1m 4m 7m Ea So We No Gr",  # Can Chii 4s
+             2: "4s 4s 1p 4p 7p 1m 4m 7m Ea So We No Gr"}  # Can Pon 4s
+    game = table(hands, agents=[CallingAgent() for _ in range(4)])
+    tile = discard(game, 0, "4s")
+    assert game.handle_call(tile, 0)
+    assert game.current_player == 2
+    assert game.open_melds[1] == [] and len(game.open_melds[2]) == 1
+
+
+def test_chii_only_from_the_next_player():
+    game = table({2: "2s 3s 1p 4p 7p 1m 4m 7m Ea So We No Gr"}, agents=[CallingAgent() for _ in range(4)])
+    tile = discard(game, 0, "4s")
+    assert not game.handle_call(tile, 0)
+    tile = discard(game, 1, "4s")
+    assert game.handle_call(tile, 1)
+    assert game.current_player == 2
+
+
+def test_replacement_tile_on_an_empty_wall_is_rinshan_not_haitei():
+    game = table({0: "2s 3s 4s 5p 6p 7p 3m 4m 5m 6s 7s 8s 2p 2p"})
+    game.wall.draw_index = game.wall.live_end
+    game.dora_indicators = []
+    tile = tile_from_str("2p")
+    game.drawn_rinshan = True
+    assert [name for name, _ in game.score_win(0, tile).yaku] == ["menzen tsumo", "tanyao", "rinshan kaihou"]
+    game.drawn_rinshan = False
+    assert [name for name, _ in game.score_win(0, tile).yaku] == ["menzen tsumo", "tanyao", "haitei"]
+
+
+def test_riichi_needs_four_live_tiles_and_a_seat_allowed_to_declare():
+    game = table({0: "2s 3s 4s 5p 6p 7p 3m 4m 5m 6s 7s 8s 2p Ea"})  # Tenpai after discarding 2p or Ea
+    ready = [tile_from_str("2p"), tile_from_str("Ea")]
+    assert game.check_riichi_ready(0) == ready
+    game.wall.draw_index = game.wall.live_end - 4
+    assert game.check_riichi_ready(0) == ready
+    game.wall.draw_index += 1
+    assert game.check_riichi_ready(0) == []
+    game.wall.draw_index -= 1
+    game.can_riichi[0] = False
+    assert game.check_riichi_ready(0) == []
+    assert game.clone().can_riichi is not game.can_riichi
+
+
+def midround(seed, steps=120):
+    """A seeded round with callers, played for steps steps or until it ends."""
+    rng = random.Random(seed)
+    game = MahjongGame(agents=[RandomAgent(rng, 0.6) for _ in range(4)], rng=rng)
+    game.start_game()
+    for _ in range(steps):
+        if not game.step():
+            break
+    return game
+
+
+def public(game):
+    """What every player can see."""
+    wall = game.wall
+    return ([pile[:] for pile in game.discard_piles], [[list(m) for m in melds] for melds in game.open_melds],
+            [[list(k) for k in kans] for kans in game.concealed_kans], game.dora_indicators[:],
+            game.riichi_players[:], game.visible_counts[:], game.genbutsu[:], [len(hand) for hand in game.hands],
+            (wall.draw_index, wall.live_end, wall.rinshan_drawn, wall.dora_revealed), wall.dora_indicators(),
+            game.phase, game.current_player, game.drawn_tile, game.last_discard)
+
+
+def private(game):
+    return [hand.tiles() for hand in game.hands], game.wall.tiles[:], game.waits[:], game.riichi_wait[:]
+
+
+def unseen(game, player):
+    """The tiles player cannot see: opponents' hands, the live wall and the hidden part of the dead wall."""
+    wall = game.wall
+    hidden = Counter(wall.tiles[wall.draw_index:wall.dead_start])  # Tiles cut off by replacement draws too
+    hidden.update(wall.dead_tile(row, column) for row in range(2) for column in range(DEAD_ROW)
+                  if not (row == 0 and 1 <= column <= wall.dora_revealed)
+                  and (row, column) not in RINSHAN_SLOTS[:wall.rinshan_drawn])
+    for other in range(4):
+        if other != player:
+            hidden.update(game.hands[other].tiles())
+    return hidden
+
+
+# Seeds and steps for mid-round positions; seed 8 has had a Kan by step 200
+POSITIONS = [(seed, 120) for seed in range(6)] + [(8, 200)]
+
+
+@pytest.mark.parametrize("seed, steps", POSITIONS)
+def test_a_clone_is_independent_of_its_original(seed, steps):
+    game = midround(seed, steps)
+    before = public(game), private(game), game.can_riichi[:]
+    other = game.clone()
+    other.events = None
+    other.riichi_players[0] = True
+    other.can_riichi[1] = False
+    other.genbutsu[2] |= 1
+    while other.step():
+        pass
+    other.hands[3].add(tile_from_str("Wh"))
+    assert (public(game), private(game), game.can_riichi) == before
+
+
+@pytest.mark.parametrize("seed, steps", POSITIONS)
+def test_determinize_resamples_only_what_the_player_cannot_see(seed, steps):
+    game = midround(seed, steps)
+    player = game.current_player
+    world = game.clone().determinize(player, random.Random(seed))
+    assert public(world) == public(game)
+    assert world.hands[player].tiles() == game.hands[player].tiles()
+    assert unseen(world, player) == unseen(game, player)
+    assert world.wall.tiles != game.wall.tiles  # Something was resampled...
+    assert private(game)[1] == game.wall.tiles  # ...and not in the original
+    for other in range(4):
+        assert world.call_index[other].pon == CallIndex(world.hands[other].counts).pon  # Indexes follow the new hands
+
+
+def test_determinize_with_the_same_rng_gives_the_same_world():
+    game = midround(7)
+    worlds = [game.clone().determinize(0, random.Random(seed)) for seed in (1, 1, 2)]
+    assert private(worlds[0]) == private(worlds[1])
+    assert private(worlds[0]) != private(worlds[2])
@@ -0,0 +1,122 @@
+"""Match settlement: dealer rotation, honba, Riichi sticks and noten payments."""
+
+import random
+
+import pytest
+
+from ..agents import Agent
+from ..match import Match, NOTEN_PAYMENT, RIICHI_STICK, STARTING_POINTS
+from ..scoring import Score, payments
+from ..simulator import default_agents
+
+MANGAN = 2000  # Base points
+
+
+def match(dealer=0, winds=2):
+    match = Match([Agent() for _ in range(4)], winds=winds)
+    match.game.dealer = dealer
+    return match
+
+
+def win(match, outcome, player, discarder=None):
+    """A mangan result for player, as run_round reports it."""
+    game = match.game
+    discarder_seat = None if discarder is None else game.seat_wind(discarder)
+    score = Score((), 5, 30, 0, MANGAN, payments(MANGAN, game.seat_wind(player), discarder_seat, game.honba))
+    return {"outcome": outcome, "player": player, "score": score}
+
+
+def settle(match, result):
+    """Settles and advances the match as play_round does."""
+    changes, renchan = match.settle(result)
+    match.advance(renchan, result["outcome"] in ("tsumo", "ron"))
+    return changes, renchan
+
+
+def test_dealer_win_keeps_the_seat_and_adds_honba():
+    table = match(dealer=1)
+    table.game.honba = 2
+    changes, renchan = settle(table, win(table, "ron", 1, discarder=3))
+    assert renchan
+    assert changes == [0, 12000 + 600, 0, -12600]
+    assert (table.game.dealer, table.game.honba, table.game.round_wind) == (1, 3, 0)
+
+
+def test_non_dealer_win_passes_the_deal_and_clears_honba():
+    table = match(dealer=1)
+    table.game.honba = 1
+    changes, renchan = settle(table, win(table, "tsumo", 2))
+    assert not renchan
+    assert changes == [-2100, -4100, 8300, -2100]  # The dealer pays double
+    assert (table.game.dealer, table.game.honba) == (2, 0)
+
+
+def test_winner_takes_the_riichi_sticks():
+    table = match()
+    game = table.game
+    game.riichi_players[1] = game.riichi_players[3] = True
+    game.riichi_sticks = 3  # Both sticks of this round and one left from an earlier draw
+    changes, _ = settle(table, win(table, "ron", 3, discarder=1))
+    assert changes == [0, -RIICHI_STICK - 8000, 0, -RIICHI_STICK + 8000 + 3 * RIICHI_STICK]
+    assert game.riichi_sticks == 0
+    assert sum(table.scores) == 4 * STARTING_POINTS + RIICHI_STICK  # The stick an earlier round's scores paid
+
+
+@pytest.mark.parametrize("tenpai, expected", [
+    ([0], [3000, -1000, -1000, -1000]),
+    ([0, 2], [1500, -1500, 1500, -1500]),
+    ([1, 2, 3], [-3000, 1000, 1000, 1000]),
+    ([], [0, 0, 0, 0]),
+    ([0, 1, 2, 3], [0, 0, 0, 0]),
+])
+def test_noten_payments(tenpai, expected):
+    table = match()
+    for player in tenpai:
+        table.game.waits[player] = frozenset([5])
+    changes, renchan = settle(table, {"outcome": "exhausted"})
+    assert changes == expected
+    assert sum(changes) == 0 and max(changes) <= NOTEN_PAYMENT
+    assert renchan == (0 in tenpai)
+    assert table.game.honba == 1
+    assert table.game.dealer == (0 if renchan else 1)
+
+
+def test_abortive_draw_is_replayed():
+    table = match(dealer=2)
+    changes, renchan = settle(table, {"outcome": "abortive_draw", "reason": "four_kans"})
+    assert renchan and changes == [0] * 4
+    assert (table.game.dealer, table.game.honba) == (2, 1)
+
+
+def test_last_dealer_passing_ends_the_match_and_pays_leftover_sticks():
+    table = match(dealer=3, winds=1)
+    table.scores[:] = [20000, 31000, 25000, 24000]
+    table.game.riichi_sticks = 2
+    settle(table, {"outcome": "exhausted"})  # Nobody tenpai
+    assert table.finished
+    assert table.game.round_wind == 1
+    assert table.scores == [20000, 33000, 25000, 24000]
+    assert table.game.riichi_sticks == 0
+    with pytest.raises(ValueError):
+        table.play_round()
+
+
+def test_points_are_kept_through_a_played_match():
+    rng = random.Random(5)
+    table = Match(default_agents(rng), rng=rng, winds=1)
+    while not table.finished:
+        result, changes = table.play_round()
+        if result["outcome"] in ("tsumo", "ron"):
+            assert changes[result["player"]] > 0
+        assert sum(table.scores) + table.game.riichi_sticks * RIICHI_STICK == 4 * STARTING_POINTS
+    assert sum(table.scores) == 4 * STARTING_POINTS
+    assert table.rounds >= 4
+
+
+def test_only_players_who_can_pay_the_stick_may_declare_riichi():
+    rng = random.Random(3)
+    table = Match(default_agents(rng), rng=rng)
+    table.scores[:] = [25000, 900, 25000, 49100]
+    table.play_round()
+    assert table.game.can_riichi == [True, False, True, True]
+    assert not table.game.riichi_players[1]
@@ -0,0 +1,56 @@
+"""Monte Carlo discard evaluation: time budgets and results independent of how samples are split."""
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ..agents import Agent
+from ..main import DISCARD, MahjongGame
+from ..montecarlo import evaluate, evaluate_stream
+
+
+def decision(seed, player=0):
+    """A seeded round stopped where player is about to discard."""
+    game = MahjongGame(agents=[Agent() for _ in range(4)], rng=random.Random(seed))
+    game.start_game()
+    while not (game.phase == DISCARD and game.current_player == player):
+        game.step()
+    return game
+
+
+def last(stream):
+    result = None
+    for result in stream:
+        pass
+    return result
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_evaluate_keeps_to_its_time_budget(seed):
+    game = decision(seed)
+    started = time.monotonic()
+    estimates = evaluate(game, 0, time_budget=0.05)
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.05 + 0.015
+    samples = {estimate.samples for estimate in estimates.values()}
+    assert len(samples) == 1  # Every candidate was played on the same samples
+
+
+def test_results_do_not_depend_on_batch_size_or_workers():
+    game = decision(4)
+    expected = last(evaluate_stream(game, 0, batch_size=8, max_samples=8))
+    assert len(expected) > 1 and all(estimate.samples == 8 for estimate in expected.values())
+    for batch_size in (1, 4):
+        assert last(evaluate_stream(game, 0, batch_size=batch_size, max_samples=8)) == expected
+        assert last(evaluate_stream(game, 0, batch_size=batch_size, max_samples=8, workers=2)) == expected
+
+
+def test_a_pool_needs_its_size():
+    game = decision(4)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        with pytest.raises(ValueError):
+            next(evaluate_stream(game, 0, pool=pool))
+        stream = evaluate_stream(game, 0, batch_size=2, max_samples=4, pool=pool, max_in_flight=1)
+        assert all(estimate.samples == 4 for estimate in last(stream).values())
@@ -0,0 +1,71 @@
+"""Profiling leaves play unchanged, comes off cleanly and merges by summing."""
+
+import pickle
+import random
+
+import pytest
+
+from .. import agari, scoring, shanten
+from ..main import MahjongGame
+from ..profiling import Profiler, ProfiledGame, TimedAgent
+from ..simulator import default_agents
+
+
+def played(seed, profiler=None):
+    rng = random.Random(seed)
+    game = MahjongGame(default_agents(rng), rng=rng)
+    if profiler is None:
+        game.start_game()
+        game.run_round()
+        return game
+    profiler.attach(game)
+    with profiler:
+        game.start_game()
+        game.run_round()
+    return game
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_a_profiled_round_plays_out_as_an_unprofiled_one(seed):
+    plain = played(seed)
+    profiler = Profiler()
+    profiled = played(seed, profiler)
+    assert profiled.result == plain.result
+    assert profiled.discard_piles == plain.discard_piles
+    assert [hand.tiles() for hand in profiled.hands] == [hand.tiles() for hand in plain.hands]
+    assert profiler.timers["start_game"][0] == profiler.counters["rounds"] == 1
+    assert profiler.counters["discards"] >= sum(len(pile) for pile in plain.discard_piles)  # Called tiles leave the piles
+    assert sum(profiler.caches["shanten"]) > 0
+
+
+def test_detach_restores_the_plain_game_and_agents():
+    rng = random.Random(0)
+    agents = default_agents(rng)
+    profiler = Profiler()
+    functions = agari._decompose_group, shanten.group_vector, scoring._hand_shape
+    game = profiler.attach(MahjongGame(agents, rng=rng))
+    assert type(game) is ProfiledGame and all(isinstance(agent, TimedAgent) for agent in game.agents)
+    with profiler:
+        game.start_game()
+    assert (agari._decompose_group, shanten.group_vector, scoring._hand_shape) == functions
+    profiler.detach(game)
+    assert type(game) is MahjongGame
+    assert game.agents == agents
+    assert not hasattr(game, "profiler")
+    game.run_round()  # Plays on without reporting
+    assert profiler.counters["discards"] == 0
+
+
+def test_merge_sums_timers_counters_and_caches():
+    first, second = Profiler(), Profiler()
+    played(0, first)
+    played(1, second)
+    expected_counters = first.counters + second.counters
+    expected_timers = {name: first.timers.get(name, [0, 0.0])[0] + second.timers.get(name, [0, 0.0])[0]
+                       for name in set(first.timers) | set(second.timers)}
+    expected_caches = {name: [a + b for a, b in zip(first.caches[name], second.caches[name])] for name in first.caches}
+    first.merge(pickle.loads(pickle.dumps(second)))  # As a worker's profiler arrives
+    assert first.counters == expected_counters
+    assert {name: calls for name, (calls, _) in first.timers.items()} == expected_timers
+    assert first.caches == expected_caches
+    assert first.counters["rounds"] == 2
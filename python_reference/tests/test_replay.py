@@ -0,0 +1,91 @@
+"""Recorded rounds read back and replayed to the same states the live game went through."""
+
+import io
+import random
+
+import pytest
+
+from ..agents import RandomAgent, ShantenAgent
+from ..main import MahjongGame
+from ..record import NO_SEED, RecordReader, RecordWriter, read_events
+from ..replay import ACTIONS, Replay
+
+
+def state(game):
+    """The parts of a round an action can change, as plain comparable values."""
+    return ([hand.counts[:] for hand in game.hands], [hand.red for hand in game.hands],
+            [pile[:] for pile in game.discard_piles], [[list(meld) for meld in melds] for melds in game.open_melds],
+            [[list(kan) for kan in kans] for kans in game.concealed_kans], game.riichi_players[:],
+            game.dora_indicators[:], game.visible_counts[:], game.wall.draw_index, game.wall.live_end,
+            game.waits[:], game.kan_count, game.genbutsu[:], game.temporary_furiten[:], game.riichi_sticks)
+
+
+def play(seed, sink):
+    """Plays a seeded round with callers and Riichi players; returns (result, state after each action)."""
+    rng = random.Random(seed)
+    states = []
+
+    def events(game, event, data):
+        sink(game, event, data)
+        if event in ACTIONS:
+            # A draw is reported before the tile reaches the hand, so only later actions are compared
+            states.append(None if event == "draw" else state(game))
+
+    agents = [RandomAgent(rng, 1.0) for _ in range(2)] + [ShantenAgent(open_hand=True) for _ in range(2)]
+    game = MahjongGame(agents=agents, events=events, rng=rng)
+    game.start_game()
+    return game.run_round(), states
+
+
+def check_seeks(replay, states, seed):
+    """Seeks to every action in a random order and compares against the live states."""
+    assert len(replay) == len(states)
+    steps = list(range(1, len(replay) + 1))
+    random.Random(seed).shuffle(steps)
+    for step in steps:
+        if states[step - 1] is not None:
+            assert state(replay.seek(step)) == states[step - 1], step
+
+
+def test_record_file_round_trip(tmp_path):
+    path = tmp_path / "games.mjr"
+    played = []
+    with RecordWriter(path) as writer:
+        for seed in range(12):
+            writer.seed = seed
+            played.append(play(seed, writer))
+
+    with RecordReader(path) as reader:
+        games = list(reader.games())
+    assert len(games) == len(played)
+    for seed, (events, (result, states)) in enumerate(zip(games, played)):
+        assert events[0][1]["seed"] == seed
+        replay = Replay(events, snapshot_interval=8)
+        check_seeks(replay, states, seed)
+        assert replay.seek(len(replay)).result == result
+
+
+def test_replay_from_seed_and_live_events():
+    for seed in range(100, 110):
+        events = []
+        result, states = play(seed, lambda game, event, data: events.append((event, data)))
+        replay = Replay(events, seed=seed, snapshot_interval=5)
+        check_seeks(replay, states, seed)
+        assert replay.seek(len(replay)).result == result
+        assert replay.seek(0) is replay.seek(len(replay))  # One game, reused between seeks
+
+
+def test_seek_outside_the_round():
+    buffer = io.BytesIO()
+    play(0, RecordWriter(buffer))
+    replay = Replay(list(read_events(buffer.getvalue())))
+    with pytest.raises(IndexError):
+        replay.seek(len(replay) + 1)
+
+
+@pytest.mark.parametrize("seed", [-1, NO_SEED, 1 << 64])
+def test_seeds_outside_the_record_field_are_rejected(seed):
+    writer = RecordWriter(io.BytesIO())
+    writer.seed = seed
+    with pytest.raises(ValueError):
+        play(0, writer)
@@ -0,0 +1,99 @@
+"""Waits, furiten and genbutsu bookkeeping, and the danger tiers built on them."""
+
+from ..agents import Agent
+from ..main import CALLS, NEXT_PLAYER, ROUND_OVER
+from ..safety import GENBUTSU, KABE, SUJI, UNSAFE, danger, safest_discards
+from ..tiles import NUM_KINDS, tile_from_str
+from .tables import discard, table
+
+WAITING = "2s 3s 4s 3p 4p 6m 7m 8m 2m 3m 4m 6s 6s"  # Tanyao, waiting on 2p and 5p
+
+
+def kind(text):
+    return tile_from_str(text)
+
+
+class Declining(Agent):
+    """Never calls Ron."""
+
+    def wants_ron(self, game, player_index, tile, discarding_player_index):
+        return False
+
+
+def passes(game, player, text):
+    """player discards text and nobody Rons it; returns True if it was Ronned instead."""
+    discard(game, player, text)
+    game.phase = CALLS
+    game.calls_phase()
+    return game.phase == ROUND_OVER
+
+
+def test_waits_follow_the_players_discards():
+    game = table({1: WAITING})
+    assert game.waits[1] == {kind("2p"), kind("5p")}
+    game.hands[1].add(kind("5p"))
+    game.discard_tile(1, kind("3p"))  # 4p 5p now waits on 3p and 6p
+    assert game.waits[1] == {kind("3p"), kind("6p")}
+
+
+def test_no_ron_on_any_wait_after_discarding_one():
+    game = table({1: WAITING})
+    game.mark_safe(1, kind("5p"))  # Player 1's own 5p passed earlier
+    assert game.is_furiten(1)
+    assert not game.handle_ron(discard(game, 0, "2p"), 0)
+
+
+def test_passing_a_winning_discard_is_furiten_until_the_players_next_discard():
+    game = table({1: WAITING}, agents=[Agent(), Declining(), Agent(), Agent()])
+    assert not passes(game, 0, "5p")
+    assert game.temporary_furiten[1]
+    game.agents[1] = Agent()
+    assert not passes(game, 2, "2p")  # Still furiten
+    assert game.phase == NEXT_PLAYER
+
+    drawn = kind("Wh")
+    game.hands[1].add(drawn)
+    game.discard_tile(1, drawn)  # The player's own discard clears it
+    assert not game.temporary_furiten[1]
+    assert passes(game, 2, "2p")
+    assert game.result["player"] == 1
+
+
+def test_a_missed_win_in_riichi_lasts_the_round():
+    game = table({1: WAITING})
+    game.declare_riichi(1, game.waits[1])
+    game.mark_safe(1, kind("2p"))  # Already furiten on their own 2p
+    assert not passes(game, 0, "5p")
+    drawn = kind("Wh")
+    game.hands[1].add(drawn)
+    game.discard_tile(1, drawn)
+    assert not game.temporary_furiten[1]
+    assert game.genbutsu[1] >> kind("5p") & 1  # Passed in Riichi
+    assert game.is_furiten(1)
+
+
+def defending():
+    """Player 0 defends against player 1's Riichi with genbutsu 1s and 7s and all four 8p seen."""
+    game = table({0: "1s 4s 7p 5m 1p 4p 7m Ea So We No Gr Re"})
+    game.visible_counts[:] = [0] * NUM_KINDS
+    game.genbutsu[:] = [0] * 4
+    game.riichi_players[1] = True
+    game.mark_safe(1, kind("1s"))
+    game.mark_safe(1, kind("7s"))
+    game.visible_counts[kind("8p")] = 4
+    return game
+
+
+def test_danger_tiers():
+    game = defending()
+    assert danger(game, 0, 1, kind("1s")) == GENBUTSU
+    assert danger(game, 0, 1, kind("4s")) == SUJI  # 1s and 7s are both genbutsu
+    assert danger(game, 0, 1, kind("7p")) == KABE  # No 8p left to wait with
+    assert danger(game, 0, 1, kind("5m")) == UNSAFE
+
+
+def test_safest_discards_put_genbutsu_first_and_live_middle_tiles_last():
+    order = safest_discards(defending(), 0)
+    assert order[0] == kind("1s")
+    assert order.index(kind("4s")) < order.index(kind("5m"))
+    assert order.index(kind("7p")) < order.index(kind("5m"))
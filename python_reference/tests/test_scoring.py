@@ -0,0 +1,98 @@
+"""Fu, han and payments of hands worked out by hand."""
+
+import pytest
+
+from ..scoring import base_points, payments, score_hand
+from ..tiles import Hand, tile_from_str, tiles_from_str
+
+SOUTH = 1  # A non-dealer seat
+
+
+def score(text, win, seat=SOUTH, discarder=2, melds=(), **conditions):
+    """Scores the concealed tiles in text, winning tile included, with open melds as strings."""
+    open_melds = [tiles_from_str(meld.split()) for meld in melds]
+    return score_hand(Hand(tiles_from_str(text.split())), tile_from_str(win), seat,
+                      open_melds=open_melds, discarder_seat=discarder, **conditions)
+
+
+def names(result):
+    return sorted(name for name, _ in result.yaku)
+
+
+def test_pinfu_ron_is_30_fu():
+    result = score("1s 2s 3s 4s 5s 6s 7p 8p 9p 2m 3m 4m 5p 5p", "4m")
+    assert names(result) == ["pinfu"]
+    assert (result.han, result.fu, result.base) == (1, 30, 240)
+    assert result.payments == (0, 1000, -1000, 0)
+
+
+def test_pinfu_tsumo_is_20_fu():
+    result = score("1s 2s 3s 4s 5s 6s 7p 8p 9p 2m 3m 4m 5p 5p", "4m", discarder=None)
+    assert names(result) == ["menzen tsumo", "pinfu"]
+    assert (result.han, result.fu) == (2, 20)
+    assert result.payments == (-700, 1500, -400, -400)  # The dealer pays double
+
+
+def test_honba_is_paid_by_the_discarder():
+    result = score("1s 2s 3s 4s 5s 6s 7p 8p 9p 2m 3m 4m 5p 5p", "4m", honba=2)
+    assert result.payments == (0, 1600, -1600, 0)
+
+
+def test_chiitoitsu_is_25_fu():
+    result = score("1s 1s 3s 3s 5p 5p 7p 7p 9m 9m 2m 2m 4m 4m", "4m")
+    assert names(result) == ["chiitoitsu"]
+    assert (result.han, result.fu, result.payments[SOUTH]) == (2, 25, 1600)
+
+
+def test_open_hand_without_fu_scores_30():
+    result = score("2s 3s 4s 5p 6p 7p 3m 4m 5m 8m 8m", "5m", melds=["6s 7s 8s"])
+    assert names(result) == ["tanyao"]
+    assert (result.han, result.fu) == (1, 30)
+
+
+def test_open_dragon_triplet_and_tanki_wait():
+    result = score("2s 3s 4s 5p 6p 7p 3m 4m 5m 8m 8m", "8m", melds=["Re Re Re"])
+    assert names(result) == ["yakuhai Re"]
+    assert result.fu == 30  # 20 + 4 for the open honor triplet + 2 for the tanki wait, rounded up
+
+
+def test_concealed_terminal_triplet_on_tsumo():
+    result = score("1s 1s 1s 4p 5p 6p 7m 8m 9m 2s 3s 4s 9p 9p", "4p", discarder=None, riichi=True)
+    assert names(result) == ["menzen tsumo", "riichi"]
+    assert (result.han, result.fu) == (2, 30)  # 20 + 2 for tsumo + 8 for the concealed terminal triplet
+
+
+def test_dragon_pair_and_kanchan_wait_on_ron():
+    result = score("2s 3s 4s 5p 6p 7p 3m 4m 5m 6s 7s 8s Re Re", "4m", riichi=True)
+    assert (result.han, result.fu) == (1, 40)  # 20 + 10 closed ron + 2 dragon pair + 2 kanchan
+    assert result.payments[SOUTH] == 1300
+
+
+def test_hand_without_yaku_scores_none():
+    assert score("1s 2s 3s 5p 6p 7p 3m 4m 5m 8m 8m", "5m", melds=["7p 8p 9p"]) is None
+    assert score("2s 3s 4s 5p 6p 7p 3m 4m 5m 6s 7s 8s Re Re", "4m") is None
+
+
+def test_dora_and_red_fives_add_han():
+    result = score("1s 2s 3s 4s 5s 6s 7p 8p 9p 2m 3m 4m 5p 5p*", "4m", dora_indicators=[tile_from_str("4p")])
+    assert dict(result.yaku) == {"pinfu": 1, "dora": 2, "aka dora": 1}
+    assert (result.han, result.fu, result.payments[SOUTH]) == (4, 30, 7700)
+
+
+def test_kokushi_is_yakuman():
+    result = score("1s 9s 1p 9p 1m 9m Ea So We No Gr Re Wh Wh", "Ea", seat=0, discarder=3)
+    assert names(result) == ["kokushi musou"]
+    assert (result.yakuman, result.base) == (1, 8000)
+    assert result.payments == (48000, 0, 0, -48000)
+
+
+@pytest.mark.parametrize("han, fu, yakuman, expected", [
+    (1, 30, 0, 240), (3, 60, 0, 1920), (4, 40, 0, 2000), (5, 30, 0, 2000),
+    (6, 30, 0, 3000), (8, 30, 0, 4000), (11, 30, 0, 6000), (13, 30, 0, 8000), (26, 0, 2, 16000),
+])
+def test_base_points_limits(han, fu, yakuman, expected):
+    assert base_points(han, fu, yakuman) == expected
+
+
+def test_dealer_tsumo_is_paid_by_everyone_alike():
+    assert payments(2000, 0, honba=1) == (12300, -4100, -4100, -4100)
@@ -0,0 +1,126 @@
+"""Remote seats: the play_steps restore-and-retry loop, fallbacks, and a table over a socket."""
+
+import asyncio
+import random
+
+from ..agents import Agent
+from ..main import MahjongGame
+from ..server import GameServer, RemoteAgent, parse_answer, play_steps, run_bot
+from ..tiles import KIND_MASK, NUM_KINDS, tile_from_str, tile_sort_key, tile_to_str, tiles_from_str
+
+
+class CallingAgent(Agent):
+    """Discards its lowest tile and calls Pon and Chii whenever it can."""
+
+    def choose_discard(self, game, player_index, drawn_tile, allowed):
+        tiles = [tile for tile in game.hands[player_index].tiles() if allowed is None or tile & KIND_MASK in allowed]
+        return min(tiles, key=tile_sort_key)
+
+    def wants_pon(self, game, player_index, tile, discarding_player_index):
+        return True
+
+    def wants_chii(self, game, player_index, tile, discarding_player_index):
+        return True
+
+
+def calling_answer(need):
+    """What CallingAgent would decide, worked out from the options a client is sent."""
+    if need.decision == "discard":
+        allowed = need.options["allowed"]
+        tiles = [tile for tile in tiles_from_str(need.options["hand"])
+                 if allowed is None or tile_to_str(tile & KIND_MASK) in allowed]
+        return tile_to_str(min(tiles, key=tile_sort_key))
+    if need.decision == "chii_choice":
+        return 0
+    return need.decision not in ("kan", "concealed_kan")
+
+
+def play_remote(seed, answer):
+    """
+    Plays a seeded round with four RemoteAgents through play_steps, as a Table does.
+    answer(need) gives the client's raw answer. Returns (events sent, decisions asked).
+    """
+    agents = [RemoteAgent(seat) for seat in range(4)]
+    sent, outbox, asked = [], [], []
+    game = MahjongGame(agents=agents, events=lambda game, event, data: outbox.append((event, data)),
+                       rng=random.Random(seed))
+
+    async def ask(need):
+        asked.append(need)
+        value = answer(need)
+        return None if value is None else parse_answer(need.decision, value)
+
+    async def flush(game):
+        sent.extend(outbox)
+        outbox.clear()
+
+    async def main():
+        game.start_game()
+        await flush(game)
+        await play_steps(game, agents, outbox, ask, flush)
+
+    asyncio.run(main())
+    return sent, len(asked)
+
+
+def play_local(seed, agent_type):
+    events = []
+    game = MahjongGame(agents=[agent_type() for _ in range(4)],
+                       events=lambda game, event, data: events.append((event, data)), rng=random.Random(seed))
+    game.start_game()
+    game.run_round()
+    return events
+
+
+def test_missing_answers_fall_back_to_the_base_agent():
+    for seed in range(20):
+        sent, asked = play_remote(seed, lambda need: None)
+        assert asked > 0
+        assert sent == play_local(seed, Agent)
+
+
+def test_invalid_answers_fall_back_to_the_base_agent():
+    def invalid(need):
+        if need.decision == "discard":
+            held = {tile_from_str(tile) & KIND_MASK for tile in need.options["hand"]}
+            return tile_to_str(next(kind for kind in range(NUM_KINDS) if kind not in held))  # Not in hand
+        return "yes"  # Not a boolean or an index
+
+    for seed in range(20):
+        assert play_remote(seed, invalid)[0] == play_local(seed, Agent)
+
+
+def test_retried_steps_match_a_local_game_with_calls():
+    calls = 0
+    for seed in range(30):
+        sent, _ = play_remote(seed, calling_answer)
+        assert sent == play_local(seed, CallingAgent)
+        calls += sum(event in ("pon", "chii") for event, _ in sent)
+    assert calls  # The rounds did go through calls
+
+
+def test_parse_answer():
+    assert parse_answer("discard", "5m*") == tile_from_str("5m*")
+    assert parse_answer("discard", "6x") is None
+    assert parse_answer("pon", True) is True
+    assert parse_answer("pon", 1) is None
+    assert parse_answer("chii_choice", 1) == 1
+    assert parse_answer("chii_choice", True) is None
+
+
+def test_bots_play_a_table_over_a_unix_socket(tmp_path):
+    path = str(tmp_path / "server.sock")
+    server = GameServer(rounds=2, timeout=5.0)
+
+    async def main():
+        serving = await asyncio.start_unix_server(server.handle_client, path=path)
+        async with serving:
+            rounds = await asyncio.wait_for(
+                asyncio.gather(*(run_bot(None, None, path, seed) for seed in range(4))), 60)
+        return rounds
+
+    assert asyncio.run(main()) == [2, 2, 2, 2]
+    assert server.tables_played == 1
+    assert not server.tables
+    assert server.timeouts == 0
+    assert server.stats()["decisions"] > 0  # Latencies were recorded
@@ -0,0 +1,24 @@
+"""Simulation statistics."""
+
+from ..scoring import Score
+from ..simulator import SimulationStats
+
+WIN = Score((), 1, 30, 0, 240, (1000, -1000, 0, 0))
+
+
+def stats(*outcomes):
+    stats = SimulationStats()
+    for outcome in outcomes:
+        if outcome in ("tsumo", "ron"):
+            stats.record_result({"outcome": outcome, "player": 0, "score": WIN})
+        else:
+            stats.record_result({"outcome": outcome})
+    return stats
+
+
+def test_exhaustive_and_abortive_draws_are_counted_apart():
+    merged = stats("exhausted", "abortive_draw", "ron").merge(stats("exhausted", "tsumo"))
+    assert (merged.rounds, merged.exhausted, merged.aborted, merged.tsumo, merged.ron) == (5, 2, 1, 1, 1)
+    summary = merged.summary()
+    assert (summary["draw_rate"], summary["abort_rate"]) == (0.4, 0.2)
+    assert summary["win_rate_by_seat"] == [0.4, 0, 0, 0]
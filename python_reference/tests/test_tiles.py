@@ -0,0 +1,59 @@
+"""The count-vector Hand, red fives in particular."""
+
+import pytest
+
+from ..tiles import Hand, tile_from_str, tiles_from_str
+
+
+def hand(text):
+    return Hand(tiles_from_str(text.split()))
+
+
+def test_red_fives_are_held_apart_from_plain_ones():
+    held = hand("5p 5p* 5p 3s")
+    red, plain = tile_from_str("5p*"), tile_from_str("5p")
+    assert len(held) == 4
+    assert held.count(plain) == held.count(red) == 3
+    assert red in held and plain in held
+    assert held.tiles() == tiles_from_str("3s 5p 5p 5p*".split())
+    assert held.find(plain) == plain  # Plain tiles go first...
+    assert held.take(plain, 2) == [plain, plain]
+    assert held.find(plain) == red  # ...then the red one
+    assert plain not in held and red in held
+    assert held.take(plain) == [red]
+    assert held.tiles() == [tile_from_str("3s")]
+
+
+def test_remove_matches_the_exact_tile():
+    held = hand("5m* 5m 1s")
+    red, plain = tile_from_str("5m*"), tile_from_str("5m")
+    held.remove(plain)
+    with pytest.raises(ValueError):
+        held.remove(plain)  # Only the red five is left
+    held.remove(red)
+    with pytest.raises(ValueError):
+        held.remove(red)
+    assert held == hand("1s") and len(held) == 1
+    with pytest.raises(ValueError):
+        held.find(plain)
+    with pytest.raises(ValueError):
+        held.take(tile_from_str("1s"), 2)
+
+
+def test_a_copy_is_independent():
+    held = hand("5s* 5s 7p Ea")
+    other = held.copy()
+    assert other == held
+    other.remove(tile_from_str("5s*"))
+    other.add(tile_from_str("Wh"))
+    assert held == hand("5s* 5s 7p Ea")
+    assert held.has_red(tile_from_str("5s")) and not other.has_red(tile_from_str("5s"))
+    assert other != held
+
+
+def test_reset_refills_the_same_hand():
+    held = hand("5p* 1s 2s")
+    counts = held.counts
+    held.reset(tiles_from_str("9m 9m".split()))
+    assert held.counts is counts
+    assert held == hand("9m 9m") and held.red == 0 and len(held) == 2
@@ -0,0 +1,101 @@
+"""The cursor Wall: layout against the original list wall, replacement draws, dora and the four-Kan abort."""
+
+import random
+
+import numpy as np
+import pytest
+
+from ..dealing import split_dead_wall
+from ..main import CALLS, NEXT_PLAYER, ROUND_OVER
+from ..tiles import KIND_MASK, create_tileset, tile_from_str
+from ..wall import DEALT_TILES, DICE_ROLLS, MAX_DORA_INDICATORS, RINSHAN_SLOTS, WALL_TILES, Wall
+from .tables import discard, table
+
+
+def legacy_deal(tiles, dealer_roll):
+    """
+    The original list wall: four 2x17 walls with the dead wall cut out, read wall by wall
+    and row by row from the right, dealt three tiles at a time and then one each.
+    Returns (hands, tiles left to draw, dead wall).
+    """
+    walls = [np.reshape(tiles[start:start + 34], (2, 17)) for start in range(0, WALL_TILES, 34)]
+    dead_wall, walls = split_dead_wall(walls, dealer_roll)
+    drawing_order = [int(tile) for wall in walls for row in wall for tile in row[::-1]]
+    hands = [[] for _ in range(4)]
+    for turn in range(16):
+        hands[turn % 4] += drawing_order[:3]
+        drawing_order = drawing_order[3:]
+    for player in range(4):
+        hands[player].append(drawing_order.pop(0))
+    return hands, drawing_order, dead_wall.tolist()
+
+
+def shuffled(seed):
+    tiles = create_tileset()
+    random.Random(seed).shuffle(tiles)
+    return tiles
+
+
+@pytest.mark.parametrize("dealer_roll", DICE_ROLLS)
+def test_draw_order_matches_the_legacy_list_wall(dealer_roll):
+    for seed in range(5):
+        tiles = shuffled(seed)
+        hands, drawing_order, dead_wall = legacy_deal(tiles, dealer_roll)
+        wall = Wall.from_shuffled(tiles, dealer_roll)
+        assert wall.deal() == hands
+        assert wall.remaining == len(drawing_order) == WALL_TILES - 14 - DEALT_TILES
+        drawn = []
+        while (tile := wall.draw()) is not None:
+            drawn.append(tile)
+        assert drawn == drawing_order
+        assert wall.dead_wall() == dead_wall
+
+
+def test_replacement_draws_come_from_the_dead_wall_and_shorten_the_live_wall():
+    wall = Wall.from_shuffled(shuffled(1), 7)
+    wall.deal()
+    live = wall.live_tiles()
+    for drawn, (row, column) in enumerate(RINSHAN_SLOTS, 1):
+        remaining = wall.remaining
+        assert wall.draw_rinshan() == wall.dead_tile(row, column)
+        assert wall.remaining == remaining - 1
+        assert wall.live_tiles() == live[:len(live) - drawn]  # The dead wall keeps its 14 tiles
+    assert wall.draw_rinshan() is None
+    assert wall.remaining == len(live) - len(RINSHAN_SLOTS)
+
+
+def test_indicators_are_revealed_in_turn():
+    wall = Wall.from_shuffled(shuffled(2), 4)
+    assert wall.dora_indicators() == [wall.dead_tile(0, 1)]
+    for revealed in range(2, MAX_DORA_INDICATORS + 1):
+        assert wall.reveal_dora() == wall.dead_tile(0, revealed)
+        assert wall.dora_indicators() == [wall.dead_tile(0, column) for column in range(1, revealed + 1)]
+        assert wall.ura_dora_indicators() == [wall.dead_tile(1, column) for column in range(1, revealed + 1)]
+    assert wall.reveal_dora() is None
+
+
+def test_a_kan_reveals_the_next_indicator():
+    game = table({0: "1s 1s 1s 1s 4p 7p 1m 4m 7m Ea So We No"})
+    game.current_player = 0
+    indicator = game.wall.dead_tile(0, 2)
+    seen = game.visible_counts[indicator & KIND_MASK]
+    game.perform_concealed_kan(tile_from_str("1s"))
+    assert game.dora_indicators == [game.wall.dead_tile(0, 1), indicator]
+    assert game.visible_counts[indicator & KIND_MASK] == seen + 1
+    assert game.rinshan_pending
+
+
+@pytest.mark.parametrize("kans, aborted", [([0, 0, 0, 0], False), ([0, 0, 1, 0], True), ([3, 1, 2, 0], True)])
+def test_four_kans_abort_only_when_split_between_players(kans, aborted):
+    game = table({2: "Wh Wh Wh 1s 4s 7s 1p 4p 7p 1m 4m 7m Ea"})
+    for player in kans:
+        game.record_kan(player)
+    discard(game, 1, "Wh")
+    game.phase = CALLS
+    game.calls_phase()
+    if aborted:
+        assert game.phase == ROUND_OVER
+        assert game.result == {"outcome": "abortive_draw", "reason": "four_kans"}
+    else:
+        assert game.phase == NEXT_PLAYER
+        assert not game.can_kan(2, tile_from_str("Wh"))  # No fifth Kan
@@ -0,0 +1,207 @@
+"""
+Integer tile encoding and the count-vector Hand used by MahjongGame.
+
+Tiles are small ints: kinds 0-8 are 1s-9s, 9-17 are 1p-9p, 18-26 are 1m-9m and
+27-33 are the honors in HONORS order. The red five of a suit is its plain five
+kind with the RED bit set, so `tile & KIND_MASK` always gives the kind.
+"""
+
+SUITS = ["s", "p", "m"]
+HONORS = ["Ea", "No", "So", "We", "Gr", "Re", "Wh"]
+
+NUM_KINDS = 34
+RED = 64  # Flag bit marking a red five
+KIND_MASK = RED - 1
+HONOR_START = 27
+FIVES = (4, 13, 22)  # Kinds of 5s, 5p and 5m
+
+
+def create_tileset():
+    """Creates a standard Riichi Mahjong tileset of 136 tile codes."""
+    tiles = []
+    # Basic tiles
+    for suit_index in range(len(SUITS)):
+        for value in range(1, 10):
+            tile = suit_index * 9 + value - 1
+            tiles.extend([tile] * 4)
+            if value == 5:  # Swap a regular 5 for the red 5
+                tiles[-1] = tile | RED
+
+    # Honor tiles
+    for honor_index in range(len(HONORS)):
+        tiles.extend([HONOR_START + honor_index] * 4)
+
+    return tiles
+
+
+def tile_from_str(text):
+    """Parses a tile string such as '3p', '5m*' or 'Re' into its tile code."""
+    if text in HONORS:
+        return HONOR_START + HONORS.index(text)
+    red = text.endswith("*")
+    body = text[:-1] if red else text
+    if len(body) != 2 or body[1] not in SUITS or body[0] not in "123456789":
+        raise ValueError(f"Unknown tile: {text!r}")
+    tile = SUITS.index(body[1]) * 9 + int(body[0]) - 1
+    if red:
+        if tile not in FIVES:
+            raise ValueError(f"Only fives can be red: {text!r}")
+        tile |= RED
+    return tile
+
+
+def tile_to_str(tile):
+    """Formats a tile code the way the console has always shown it."""
+    kind = tile & KIND_MASK
+    if kind >= HONOR_START:
+        return HONORS[kind - HONOR_START]
+    text = f"{kind % 9 + 1}{SUITS[kind // 9]}"
+    return text + "*" if tile & RED else text
+
+
+def tiles_from_str(texts):
+    """Parses an iterable of tile strings into a list of tile codes."""
+    return [tile_from_str(text) for text in texts]
+
+
+def tiles_to_str(tiles):
+    """Formats tile codes as a space separated string."""
+    return " ".join(tile_to_str(tile) for tile in tiles)
+
+
+def tile_sort_key(tile):
+    """Sort key for tile codes: suits, numbers, honors, with red fives after plain fives."""
+    return (tile & KIND_MASK, tile)
+
+
+def is_honor(kind):
+    return kind >= HONOR_START
+
+
+def is_terminal_or_honor(kind):
+    return kind >= HONOR_START or kind % 9 in (0, 8)
+
+
+class Hand:
+    """
+    Concealed tiles held as a fixed 34-entry count vector.
+
+    Red fives are recorded in a three bit mask next to the counts (bit n set means
+    the red five of SUITS[n] is held), so draws, discards and calls are O(1)
+    updates and nothing is reallocated during play.
+    """
+
+    __slots__ = ("counts", "red", "size")
+
+    def __init__(self, tiles=()):
+        self.counts = [0] * NUM_KINDS
+        self.red = 0
+        self.size = 0
+        for tile in tiles:
+            self.add(tile)
+
+    def reset(self, tiles=()):
+        """Empties the hand in place, then adds tiles."""
+        counts = self.counts
+        for kind in range(NUM_KINDS):
+            counts[kind] = 0
+        self.red = 0
+        self.size = 0
+        for tile in tiles:
+            self.add(tile)
+
+    def add(self, tile):
+        """Adds a single tile to the hand."""
+        kind = tile & KIND_MASK
+        self.counts[kind] += 1
+        self.size += 1
+        if tile & RED:
+            self.red |= 1 << (kind // 9)
+
+    def remove(self, tile):
+        """Removes exactly this tile; a red five is only matched by the red code."""
+        kind = tile & KIND_MASK
+        if tile & RED:
+            bit = 1 << (kind // 9)
+            if not self.red & bit:
+                raise ValueError(f"{tile_to_str(tile)} is not in hand")
+            self.red &= ~bit
+        elif self.counts[kind] - self.has_red(kind) <= 0:
+            raise ValueError(f"{tile_to_str(tile)} is not in hand")
+        self.counts[kind] -= 1
+        self.size -= 1
+
+    def take(self, kind, n=1):
+        """Removes n tiles of a kind, plain tiles first, and returns their codes."""
+        if self.counts[kind] < n:
+            raise ValueError(f"Fewer than {n} {tile_to_str(kind)} in hand")
+        taken = []
+        plain = self.counts[kind] - self.has_red(kind)
+        for _ in range(n):
+            if plain > 0:
+                plain -= 1
+                taken.append(kind)
+            else:
+                self.red &= ~(1 << (kind // 9))
+                taken.append(kind | RED)
+        self.counts[kind] -= n
+        self.size -= n
+        return taken
+
+    def find(self, kind):
+        """Returns the tile code take() would remove first for this kind."""
+        if self.counts[kind] - self.has_red(kind) > 0:
+            return kind
+        if self.has_red(kind):
+            return kind | RED
+        raise ValueError(f"No {tile_to_str(kind)} in hand")
+
+    def count(self, kind):
+        """Number of tiles of this kind held, red fives included."""
+        return self.counts[kind & KIND_MASK]
+
+    def has_red(self, kind):
+        return kind in FIVES and bool(self.red & (1 << (kind // 9)))
+
+    def copy(self):
+        other = Hand.__new__(Hand)
+        other.counts = self.counts[:]
+        other.red = self.red
+        other.size = self.size
+        return other
+
+    def tiles(self):
+        """Returns the tile codes held, in display order."""
+        tiles = []
+        for kind, count in enumerate(self.counts):
+            if count:
+                if self.has_red(kind):
+                    tiles.extend([kind] * (count - 1))
+                    tiles.append(kind | RED)
+                else:
+                    tiles.extend([kind] * count)
+        return tiles
+
+    def __contains__(self, tile):
+        if tile & RED:
+            return self.has_red(tile & KIND_MASK)
+        return self.counts[tile] - self.has_red(tile) > 0
+
+    def __iter__(self):
+        return iter(self.tiles())
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        return isinstance(other, Hand) and self.counts == other.counts and self.red == other.red
+
+    # A hand changes in place, so it cannot be a set member or dict key; use
+    # (tuple(hand.counts), hand.red) as the key instead
+    __hash__ = None
+
+    def __str__(self):
+        return tiles_to_str(self.tiles())
+
+    def __repr__(self):
+        return f"Hand({str(self)!r})"
@@ -0,0 +1,159 @@
+"""
+The round's wall: all 136 tiles stored once, read through cursors.
+
+Tiles are kept in drawing order followed by the 2x7 dead wall, so drawing,
+replacement (rinshan) draws after a Kan, dora and ura-dora reveals and the
+remaining tile count are all O(1) and never allocate.
+
+The table geometry (four 2x17 walls, the dead wall cut by the dice roll and the
+order tiles are drawn in) only moves tiles around, so it is worked out once per
+dice roll as positions into the shuffled 136-tile sequence, in plain Python:
+dealing.py turns the same tables into arrays for batched deals.
+"""
+
+WALL_TILES = 136
+DEAD_WALL_TILES = 14
+HAND_TILES = 13
+DEALT_TILES = 4 * HAND_TILES
+DICE_ROLLS = range(2, 13)
+DEAD_ROW = 7
+MAX_KANS = 4
+MAX_DORA_INDICATORS = 1 + MAX_KANS
+# Dead wall (row, column) of each replacement tile, in the order they are drawn;
+# dora indicators sit on the top row from column 1, ura-dora beneath them
+RINSHAN_SLOTS = ((0, 0), (1, 0), (0, 6), (1, 6))
+
+
+def layout(dealer_roll):
+    """
+    Returns (drawing order, dead wall) as positions into the shuffled tile sequence:
+    the live walls read wall by wall, each row right to left, and the 2x7 dead wall
+    cut out of them as the dice roll decides.
+    """
+    walls = [[list(range(start, start + 17)), list(range(start + 17, start + 34))]
+             for start in range(0, WALL_TILES, 34)]
+    wall_index = (dealer_roll - 1) % 4
+    previous = (wall_index - 1) % 4
+    cut = 17 - dealer_roll  # Count from right, both rows
+
+    if cut > 10:
+        # The dead wall runs on into the previous wall
+        rest = (cut + 7) % 17
+        dead_wall = [walls[wall_index][row][cut:] + walls[previous][row][:rest] for row in range(2)]
+        walls[wall_index] = [row[:cut] for row in walls[wall_index]]
+        walls[previous] = [row[rest:] for row in walls[previous]]
+    else:
+        dead_wall = [row[cut:cut + DEAD_ROW] for row in walls[wall_index]]
+        walls[previous] = [after[cut + DEAD_ROW:] + before for after, before in zip(walls[wall_index], walls[previous])]
+        walls[wall_index] = [row[:cut] for row in walls[wall_index]]
+
+    drawing_order = [position for wall in walls for row in wall for position in reversed(row)]
+    return drawing_order, dead_wall
+
+
+def _hand_slots():
+    """Positions in the drawing order of each player's starting tiles: three at a time, then one each."""
+    slots = [[] for _ in range(4)]
+    position = 0
+    for turn in range(16):
+        slots[turn % 4].extend(range(position, position + 3))
+        position += 3
+    for player in range(4):
+        slots[player].append(position)
+        position += 1
+    return slots
+
+
+# Indexed by dice roll; entries for impossible rolls 0 and 1 are never used
+LAYOUTS = [layout(max(roll, DICE_ROLLS.start)) for roll in range(DICE_ROLLS.stop)]
+DRAW_ORDERS = [order for order, _ in LAYOUTS]
+DEAD_SLOTS = [dead[0] + dead[1] for _, dead in LAYOUTS]  # Dead wall positions, row by row
+HAND_SLOTS = _hand_slots()  # Into the drawing order
+
+
+class Wall:
+    __slots__ = ("tiles", "dead_start", "draw_index", "live_end", "rinshan_drawn", "dora_revealed")
+
+    def __init__(self, drawing_order, dead_wall):
+        """drawing_order holds every live tile (dealt ones included) in draw order; dead_wall is 2x7."""
+        self.tiles = [int(tile) for tile in drawing_order] + [int(tile) for row in dead_wall for tile in row]
+        self.dead_start = len(drawing_order)
+        self.draw_index = 0
+        self.live_end = self.dead_start  # Shrinks by one per replacement draw to keep 14 dead tiles
+        self.rinshan_drawn = 0
+        self.dora_revealed = 1
+
+    @classmethod
+    def from_shuffled(cls, wall, dealer_roll):
+        """Lays out a shuffled 136-tile sequence (list or array) for the given dice roll."""
+        dead = [wall[position] for position in DEAD_SLOTS[dealer_roll]]
+        return cls([wall[position] for position in DRAW_ORDERS[dealer_roll]], (dead[:DEAD_ROW], dead[DEAD_ROW:]))
+
+    def snapshot(self):
+        """The wall's tiles and cursors; the tile list is shared, not copied."""
+        return self.tiles, self.dead_start, self.draw_index, self.live_end, self.rinshan_drawn, self.dora_revealed
+
+    @classmethod
+    def restore(cls, snapshot):
+        wall = cls.__new__(cls)
+        wall.tiles, wall.dead_start, wall.draw_index, wall.live_end, wall.rinshan_drawn, wall.dora_revealed = snapshot
+        return wall
+
+    def dead_tile(self, row, column):
+        return self.tiles[self.dead_start + row * DEAD_ROW + column]
+
+    def deal(self):
+        """Takes the four starting hands off the front of the wall as lists of tile codes."""
+        hands = [[self.tiles[slot] for slot in slots] for slots in HAND_SLOTS]
+        self.draw_index = DEALT_TILES
+        return hands
+
+    def draw(self):
+        """Draws the next live tile, or returns None once the live wall is empty."""
+        if self.draw_index >= self.live_end:
+            return None
+        tile = self.tiles[self.draw_index]
+        self.draw_index += 1
+        return tile
+
+    def draw_rinshan(self):
+        """Draws a replacement tile after a Kan, or returns None once all four are used."""
+        if self.rinshan_drawn >= len(RINSHAN_SLOTS):
+            return None
+        tile = self.dead_tile(*RINSHAN_SLOTS[self.rinshan_drawn])
+        self.rinshan_drawn += 1
+        self.live_end -= 1
+        return tile
+
+    def reveal_dora(self):
+        """Turns over the next dora indicator, or returns None once all are revealed."""
+        if self.dora_revealed >= MAX_DORA_INDICATORS:
+            return None
+        self.dora_revealed += 1
+        return self.dead_tile(0, self.dora_revealed)
+
+    def dora_indicators(self):
+        return [self.dead_tile(0, 1 + i) for i in range(self.dora_revealed)]
+
+    def ura_dora_indicators(self):
+        """The tiles beneath the revealed dora indicators, shown when a Riichi hand wins."""
+        return [self.dead_tile(1, 1 + i) for i in range(self.dora_revealed)]
+
+    @property
+    def remaining(self):
+        """Live tiles left to draw."""
+        return self.live_end - self.draw_index
+
+    @property
+    def is_haitei(self):
+        """True once the last live tile has been drawn."""
+        return self.draw_index >= self.live_end
+
+    def live_tiles(self):
+        """The live tiles still to be drawn, in order."""
+        return self.tiles[self.draw_index:self.live_end]
+
+    def dead_wall(self):
+        """The dead wall as two rows of 7 tiles."""
+        dead = self.tiles[self.dead_start:]
+        return [dead[:DEAD_ROW], dead[DEAD_ROW:]]